@@ -1,30 +1,48 @@
-from flask import Flask, request, jsonify, Blueprint
+from flask import Flask, request, jsonify, Blueprint, Response, stream_with_context, g, send_from_directory
+from flask import has_request_context
 from flask_cors import CORS
 import numpy as np
-import joblib
-from tensorflow import keras
 import os
 import json
-from datetime import datetime
+import time
+import hmac
+import atexit
+import shutil
+import tempfile
+from datetime import datetime, date, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from bisect import bisect_right
+from functools import wraps
 
-# ADD THIS IMPORT SECTION
-from reward_system import (
-    MedicalRewardCalculator, 
-    BatchRewardCalculator, 
-    AdaptiveRewardSystem, 
-    setup_reward_system,
-    evaluate_model_performance
-)
+from config import Config as SystemConfig
+from logging_setup import configure_logging
+from inference_engine import NumpyDenseModel, load_keras_h5, scaler_statistics
+from prediction_batcher import PredictionCoalescer
+from model_bundle import load_bundle, bundle_matches_model, compute_model_version
+from prediction_cache import PredictionCache, canonical_key
+from shared_weights import share_model, remove_stale_weights
+from input_validation import get_validator
+from response_templates import FastJSONProvider, ResponseTemplate, Slot, dumps, join_object, json_response
+from metrics import REGISTRY, BATCH_SIZE_BUCKETS, CONTENT_TYPE, timed
+from sampling_profiler import RequestProfiler
+from history_writer import HistoryWriter
+from model_reloader import ModelReloader
+from model_registry import ModelRegistry
+from shadow_scoring import ShadowScorer
+from user_auth import sign_user_token, verify_user_token, verify_firebase_token
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('api.log'),
-        logging.StreamHandler()
-    ]
+# TensorFlow, joblib/sklearn and the reward system are imported on first use,
+# so lite serving never loads them
+
+# Configure logging (no-op when main.py already did)
+configure_logging(
+    SystemConfig.LOG_FILE,
+    level=SystemConfig.LOG_LEVEL,
+    max_bytes=SystemConfig.LOG_MAX_BYTES,
+    backup_count=SystemConfig.LOG_BACKUP_COUNT,
+    rate_limit_seconds=SystemConfig.LOG_RATE_LIMIT_SECONDS
 )
 logger = logging.getLogger(__name__)
 
@@ -47,6 +65,12 @@ class Config:
     KIDNEY_SCALER_PATH = os.path.join(MODELS_DIR, "kidney_scaler.pkl")
     MENTAL_HEALTH_SCALER_PATH = os.path.join(MODELS_DIR, "mental_health_scaler.pkl")
     
+    # Serving bundle paths
+    DENGUE_BUNDLE_PATH = SystemConfig.DENGUE_BUNDLE_PATH
+    KIDNEY_BUNDLE_PATH = SystemConfig.KIDNEY_BUNDLE_PATH
+    MENTAL_HEALTH_BUNDLE_PATH = SystemConfig.MENTAL_HEALTH_BUNDLE_PATH
+    USE_MODEL_BUNDLES = SystemConfig.USE_MODEL_BUNDLES
+    
     # Feature names (13 features for each model)
     DENGUE_FEATURES = [
         'Age', 'Gender', 'NS1', 'IgG', 'IgM', 'Area', 'AreaType', 
@@ -64,48 +88,414 @@ class Config:
         'activity', 'depression', 'anxiety', 'support', 'productivity', 
         'mh_history', 'treatment'
     ]
+    
+    # Inference engine per disease ('numpy' or 'keras')
+    INFERENCE_ENGINES = SystemConfig.INFERENCE_ENGINES
+    FOLD_SCALER_INTO_MODEL = SystemConfig.FOLD_SCALER_INTO_MODEL
+    SHARED_WEIGHTS_ENABLED = SystemConfig.SHARED_WEIGHTS_ENABLED
+    SHARED_WEIGHTS_DIR = SystemConfig.SHARED_WEIGHTS_DIR
+    LITE_MODE = SystemConfig.LITE_MODE
+    MODEL_WATCH_ENABLED = SystemConfig.MODEL_WATCH_ENABLED
+    MODEL_WATCH_INTERVAL = SystemConfig.MODEL_WATCH_INTERVAL
+    MODEL_REGISTRY_DIR = SystemConfig.MODEL_REGISTRY_DIR
+    SHADOW_SAMPLE_RATE = SystemConfig.SHADOW_SAMPLE_RATE
+    SHADOW_MAX_PENDING = SystemConfig.SHADOW_MAX_PENDING
+    SHADOW_LOG_DIR = SystemConfig.SHADOW_LOG_DIR
+    
+    # Micro-batching of concurrent single-record predictions
+    MICRO_BATCHING_ENABLED = SystemConfig.MICRO_BATCHING_ENABLED
+    PREDICTION_BATCH_SIZE = SystemConfig.PREDICTION_BATCH_SIZE
+    PREDICTION_BATCH_WINDOW_MS = SystemConfig.PREDICTION_BATCH_WINDOW_MS
+    REQUEST_TIMEOUT = SystemConfig.REQUEST_TIMEOUT
+    
+    # Rows per forward pass in batch endpoints
+    BATCH_PREDICT_CHUNK_SIZE = SystemConfig.BATCH_PREDICT_CHUNK_SIZE
+    
+    # Prediction result cache
+    CACHE_TYPE = SystemConfig.CACHE_TYPE
+    CACHE_DEFAULT_TIMEOUT = SystemConfig.CACHE_DEFAULT_TIMEOUT
+    CACHE_MAX_ENTRIES = SystemConfig.CACHE_MAX_ENTRIES
+    
+    # Admin endpoints and request profiling
+    ADMIN_TOKEN = SystemConfig.ADMIN_TOKEN
+    USER_TOKEN_SECRET = SystemConfig.USER_TOKEN_SECRET
+    USER_TOKEN_TTL = SystemConfig.USER_TOKEN_TTL
+    FIREBASE_PROJECT_ID = SystemConfig.FIREBASE_PROJECT_ID
+    PROFILING_ENABLED = SystemConfig.PROFILING_ENABLED
+    PROFILE_SAMPLE_RATE = SystemConfig.PROFILE_SAMPLE_RATE
+    PROFILE_INTERVAL_MS = SystemConfig.PROFILE_INTERVAL_MS
+    PROFILE_WINDOW_SECONDS = SystemConfig.PROFILE_WINDOW_SECONDS
+    PROFILE_MAX_FILES = SystemConfig.PROFILE_MAX_FILES
+    PROFILE_DIR = SystemConfig.PROFILE_DIR
+    
+    # Write-behind prediction history
+    HISTORY_ENABLED = SystemConfig.HISTORY_ENABLED
+    HISTORY_FLUSH_ROWS = SystemConfig.HISTORY_FLUSH_ROWS
+    HISTORY_FLUSH_INTERVAL_MS = SystemConfig.HISTORY_FLUSH_INTERVAL_MS
+    HISTORY_MAX_PENDING = SystemConfig.HISTORY_MAX_PENDING
+
+# Model, scaler and bundle paths per disease
+MODEL_ARTIFACTS = {
+    'dengue': (Config.DENGUE_MODEL_PATH, Config.DENGUE_SCALER_PATH, Config.DENGUE_BUNDLE_PATH),
+    'kidney': (Config.KIDNEY_MODEL_PATH, Config.KIDNEY_SCALER_PATH, Config.KIDNEY_BUNDLE_PATH),
+    'mental_health': (Config.MENTAL_HEALTH_MODEL_PATH, Config.MENTAL_HEALTH_SCALER_PATH, Config.MENTAL_HEALTH_BUNDLE_PATH)
+}
+
+MODEL_LABELS = {
+    'dengue': 'Dengue',
+    'kidney': 'Kidney',
+    'mental_health': 'Mental health'
+}
+
+# Metrics exposed at /api/metrics (per process)
+REQUEST_LATENCY = REGISTRY.histogram(
+    'medai_request_duration_seconds', 'Request latency by endpoint', ('endpoint',))
+REQUESTS = REGISTRY.counter(
+    'medai_requests_total', 'Requests by endpoint and status code', ('endpoint', 'status'))
+STAGE_LATENCY = REGISTRY.histogram(
+    'medai_stage_duration_seconds', 'Prediction pipeline stage latency', ('stage',))
+BATCH_SIZES = REGISTRY.histogram(
+    'medai_batch_size', 'Rows per model forward pass', ('disease', 'source'), buckets=BATCH_SIZE_BUCKETS)
+MODEL_LOADED = REGISTRY.gauge(
+    'medai_model_loaded', 'Whether the model is loaded (1) or not (0)', ('disease',))
+MODEL_INFO = REGISTRY.gauge(
+    'medai_model_info', 'Engine, source and version of each loaded model', ('disease', 'engine', 'source', 'version'))
+SHADOW_LATENCY = REGISTRY.histogram(
+    'medai_shadow_duration_seconds', 'Single-row forward pass latency in shadow scoring',
+    ('disease', 'version', 'role'))
+SHADOW_PREDICTIONS = REGISTRY.counter(
+    'medai_shadow_predictions_total', 'Shadow-scored predictions by agreement with the serving model',
+    ('disease', 'version', 'agreement'))
+
+class InstrumentedJSONProvider(FastJSONProvider):
+    """FastJSONProvider that records request body parse time"""
+    loads = timed(STAGE_LATENCY.labels('json_parse'))(FastJSONProvider.loads)
+
+# Samples the stacks of one request in every PROFILE_SAMPLE_RATE when enabled
+request_profiler = RequestProfiler(
+    Config.PROFILE_DIR,
+    sample_rate=Config.PROFILE_SAMPLE_RATE,
+    interval_ms=Config.PROFILE_INTERVAL_MS,
+    window_seconds=Config.PROFILE_WINDOW_SECONDS,
+    max_files=Config.PROFILE_MAX_FILES,
+    enabled=Config.PROFILING_ENABLED
+)
 
 app = Flask(__name__)
+app.json = InstrumentedJSONProvider(app)
 CORS(app)
 
+@app.before_request
+def start_request_timer():
+    """Remember when the request started, and start profiling if it is sampled"""
+    g.request_started_at = time.perf_counter()
+    if request_profiler.should_profile():
+        request_profiler.start(request.endpoint or 'unmatched')
+        g.profiled = True
+
+@app.teardown_request
+def stop_request_profiler(exc):
+    """Stop profiling once the response (including streamed bodies) is done"""
+    if g.get('profiled'):
+        request_profiler.stop()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request latency and status (streamed bodies: time to first byte)"""
+    started_at = g.get('request_started_at')
+    if started_at is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - started_at)
+        REQUESTS.labels(endpoint, str(response.status_code)).inc()
+    return response
+
 # Global models and scalers
 models = {}
 scalers = {}
+model_engines = {}
+model_sources = {}
+model_versions = {}
+optimal_thresholds = {}
+
+# Models as loaded, before the scaler was folded in (kept for verification)
+unfused_models = {}
+
+# A loaded model with everything needed to serve it; never changed once built
+ServingModel = namedtuple('ServingModel', [
+    'model', 'scaler', 'engine', 'source', 'version', 'optimal_threshold', 'unfused_model'
+])
+
+# What requests are served from, one ServingModel per disease. A reload
+# replaces an entry with a single assignment; the dicts above describe the
+# current entries for model info, health and metrics
+serving_models = {}
+
+# Reward calculators, created on first use of the evaluation endpoints
+reward_systems = None
+
+# Boot timings reported by warm_up_models()
+startup_stats = {}
+
+# Per-disease micro-batching queues; rows are batched per ServingModel
+coalescers = {
+    disease_type: PredictionCoalescer(
+        disease_type,
+        lambda X, serving, disease_type=disease_type: run_micro_batch(disease_type, X, serving),
+        max_batch_size=Config.PREDICTION_BATCH_SIZE,
+        window_ms=Config.PREDICTION_BATCH_WINDOW_MS
+    )
+    for disease_type in ('dengue', 'kidney', 'mental_health')
+}
+
+# Per-disease prediction caches keyed on (model version, feature vector)
+prediction_caches = {
+    disease_type: PredictionCache(
+        disease_type,
+        max_entries=Config.CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.CACHE_DEFAULT_TIMEOUT
+    )
+    for disease_type in ('dengue', 'kidney', 'mental_health')
+}
+
+def write_prediction_history(rows_by_table):
+    """Insert one flush of queued prediction history rows (history writer thread)"""
+    from database import add_records_bulk
+    
+    with app.app_context():
+        add_records_bulk(rows_by_table)
+
+# Write-behind prediction history; main.py enables it once the database is initialized
+history_writer = HistoryWriter(
+    write_prediction_history,
+    flush_rows=Config.HISTORY_FLUSH_ROWS,
+    flush_interval_ms=Config.HISTORY_FLUSH_INTERVAL_MS,
+    max_pending=Config.HISTORY_MAX_PENDING
+)
+atexit.register(history_writer.close)
+
+def admin_required(view):
+    """Restrict an endpoint to requests carrying Config.ADMIN_TOKEN in X-Admin-Token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.ADMIN_TOKEN:
+            return jsonify({'error': 'Admin endpoints are disabled (ADMIN_TOKEN is not set)'}), 403
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+            return jsonify({'error': 'Invalid admin token'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def authenticated_user_id():
+    """User id proven by the request's 'Authorization: Bearer' token, or None
+    
+    Accepts tokens signed with Config.USER_TOKEN_SECRET and, when
+    Config.FIREBASE_PROJECT_ID is set, Firebase ID tokens. The result is
+    kept for the rest of the request.
+    """
+    if 'user_id' in g:
+        return g.user_id
+    
+    g.user_id = None
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    token = token.strip()
+    
+    if Config.USER_TOKEN_SECRET:
+        try:
+            g.user_id = verify_user_token(token, Config.USER_TOKEN_SECRET)
+            return g.user_id
+        except ValueError:
+            pass
+    if Config.FIREBASE_PROJECT_ID:
+        try:
+            g.user_id = verify_firebase_token(token, Config.FIREBASE_PROJECT_ID)
+        except ValueError as e:
+            logger.warning(f"Rejected bearer token: {str(e)}")
+    return g.user_id
+
+def login_required(view):
+    """Restrict an endpoint to requests with a valid user token (see authenticated_user_id)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if authenticated_user_id() is None:
+            return jsonify({'error': 'Authentication required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def run_micro_batch(disease_type, X, serving):
+    """Run one coalesced batch of single-record predictions on the model they were queued for"""
+    BATCH_SIZES.labels(disease_type, 'micro_batch').observe(len(X))
+    return serving.model.predict(X, verbose=0)
+
+def load_model_for_engine(disease_type, model_path):
+    """Load a model with the inference engine configured for the disease
+    
+    Returns (model, engine name).
+    """
+    engine = Config.INFERENCE_ENGINES.get(disease_type, 'keras')
+    
+    if engine == 'numpy':
+        try:
+            return load_keras_h5(model_path), 'numpy'
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning(f"NumPy engine cannot load {model_path} ({str(e)}), falling back to Keras")
+    
+    from tensorflow import keras
+    
+    return keras.models.load_model(model_path), 'keras'
+
+def fold_scaler_into_model(disease_type, model, scaler):
+    """Fold the disease's StandardScaler into the first layer of its model
+    
+    Returns the folded model, or None when the model cannot take the scaler.
+    """
+    if model is None or scaler is None or not hasattr(model, 'fold_input_scaler'):
+        return None
+    
+    mean, scale = scaler_statistics(scaler)
+    logger.info(f"Scaler folded into {disease_type} model")
+    return model.fold_input_scaler(mean, scale)
+
+def share_model_weights(disease_type, model, version):
+    """Get a NumPy model reading its weights from a shared memory-mapped file (other models as is)"""
+    if not isinstance(model, NumpyDenseModel) or version is None:
+        return model
+    
+    folding = 'folded' if model.expects_raw_input else 'raw'
+    key = f"{disease_type}-{version}-{folding}"
+    try:
+        return share_model(model, key, Config.SHARED_WEIGHTS_DIR)
+    except (OSError, ValueError) as e:
+        logger.error(f"Weights of {disease_type} model {version} not shared: {str(e)}")
+        return model
+
+def remove_stale_shared_weights(disease_type):
+    """Delete the shared weight files of a disease's versions that are no longer loaded"""
+    serving = serving_models.get(disease_type)
+    keep_versions = set(shadow_scorer.candidates.get(disease_type, {}))
+    if serving is not None:
+        keep_versions.add(serving.version)
+    try:
+        remove_stale_weights(Config.SHARED_WEIGHTS_DIR, disease_type, keep_versions)
+    except OSError as e:
+        logger.error(f"Error removing stale shared weights for {disease_type}: {str(e)}")
+
+def build_serving_model(disease_type, model, scaler, engine, source, version, optimal_threshold=None):
+    """Prepare a loaded model for serving: fold its scaler and share its weights as configured"""
+    unfused_model = None
+    
+    # Fold the scaler into a NumPy model so serving skips scaler.transform
+    if Config.FOLD_SCALER_INTO_MODEL:
+        folded = fold_scaler_into_model(disease_type, model, scaler)
+        if folded is not None:
+            unfused_model, model = model, folded
+    
+    # Serve from shared memory-mapped weights so forked workers share one copy
+    if Config.SHARED_WEIGHTS_ENABLED:
+        model = share_model_weights(disease_type, model, version)
+    
+    return ServingModel(model, scaler, engine, source, version, optimal_threshold, unfused_model)
+
+def load_disease_model(disease_type):
+    """Load one disease's model and scaler, preferring an up-to-date serving bundle
+    
+    Returns a ServingModel, or None when no usable artifacts exist. Does not
+    change what is being served (see install_model).
+    """
+    model_path, scaler_path, bundle_path = MODEL_ARTIFACTS[disease_type]
+    use_bundle = Config.LITE_MODE or (
+        Config.USE_MODEL_BUNDLES and Config.INFERENCE_ENGINES.get(disease_type) == 'numpy'
+    )
+    
+    if use_bundle and os.path.exists(bundle_path):
+        bundle = load_bundle(bundle_path)
+        if bundle_matches_model(bundle, model_path):
+            return build_serving_model(
+                disease_type, bundle.model, bundle.scaler, 'numpy', bundle_path,
+                compute_model_version(bundle_path), bundle.optimal_threshold
+            )
+        logger.warning(f"Bundle {bundle_path} is older than {model_path}, loading the .h5 model instead")
+    
+    if Config.LITE_MODE:
+        # The .h5/.pkl path needs TensorFlow or sklearn
+        logger.warning(f"Lite mode needs an up-to-date {bundle_path} "
+                       f"(run: python main.py export-bundles)")
+        return None
+    
+    if os.path.exists(model_path):
+        import joblib
+        
+        model, engine = load_model_for_engine(disease_type, model_path)
+        return build_serving_model(
+            disease_type, model, joblib.load(scaler_path), engine, model_path,
+            compute_model_version(model_path, scaler_path)
+        )
+    
+    return None
+
+def install_model(disease_type, serving):
+    """Serve a loaded model (or None) for new requests
+    
+    The swap is the single assignment to serving_models; the descriptive
+    dicts are refreshed after it. Shared weight files of the version
+    replaced are deleted.
+    """
+    previous = serving_models.get(disease_type)
+    serving_models[disease_type] = serving
+    
+    if Config.SHARED_WEIGHTS_ENABLED and serving is not None and getattr(previous, 'version', None) != serving.version:
+        remove_stale_shared_weights(disease_type)
+    
+    models[disease_type] = serving.model if serving else None
+    if serving is None:
+        return
+    scalers[disease_type] = serving.scaler
+    model_engines[disease_type] = serving.engine
+    model_sources[disease_type] = serving.source
+    model_versions[disease_type] = serving.version
+    optimal_thresholds[disease_type] = serving.optimal_threshold
+    if serving.unfused_model is not None:
+        unfused_models[disease_type] = serving.unfused_model
+    else:
+        unfused_models.pop(disease_type, None)
+
+def current_model(disease_type):
+    """The ServingModel the current request uses for a disease
+    
+    Taken from serving_models on first use and kept for the rest of the
+    request, so a request in flight during a hot reload finishes on the
+    model it started with.
+    """
+    if not has_request_context():
+        return serving_models.get(disease_type)
+    
+    pinned = g.get('serving_models')
+    if pinned is None:
+        pinned = g.serving_models = {}
+    serving = pinned.get(disease_type)
+    if serving is None:
+        serving = pinned[disease_type] = serving_models.get(disease_type)
+    return serving
 
 def load_models():
     """Load all trained models"""
-    global models, scalers
-    
     try:
         # Create models directory if it doesn't exist
         os.makedirs(Config.MODELS_DIR, exist_ok=True)
         
-        # Load dengue model and scaler
-        if os.path.exists(Config.DENGUE_MODEL_PATH):
-            models['dengue'] = keras.models.load_model(Config.DENGUE_MODEL_PATH)
-            scalers['dengue'] = joblib.load(Config.DENGUE_SCALER_PATH)
-            print("✅ Dengue model loaded successfully")
-        else:
-            print("⚠️ Dengue model not found")
-            models['dengue'] = None
-        
-        # Load kidney model and scaler
-        if os.path.exists(Config.KIDNEY_MODEL_PATH):
-            models['kidney'] = keras.models.load_model(Config.KIDNEY_MODEL_PATH)
-            scalers['kidney'] = joblib.load(Config.KIDNEY_SCALER_PATH)
-            print("✅ Kidney model loaded successfully")
-        else:
-            print("⚠️ Kidney model not found")
-            models['kidney'] = None
-        
-        # Load mental health model and scaler
-        if os.path.exists(Config.MENTAL_HEALTH_MODEL_PATH):
-            models['mental_health'] = keras.models.load_model(Config.MENTAL_HEALTH_MODEL_PATH)
-            scalers['mental_health'] = joblib.load(Config.MENTAL_HEALTH_SCALER_PATH)
-            print("✅ Mental health model loaded successfully")
-        else:
-            print("⚠️ Mental health model not found")
-            models['mental_health'] = None
+        for disease_type, label in MODEL_LABELS.items():
+            # Artifacts are recorded before loading so later changes are picked up
+            model_reloader.mark_loaded(disease_type)
+            serving = load_disease_model(disease_type)
+            install_model(disease_type, serving)
+            if serving is not None:
+                print(f"✅ {label} model loaded successfully "
+                      f"({serving.engine} engine, {os.path.basename(serving.source)})")
+            else:
+                print(f"⚠️ {label} model not found")
+        
+        load_shadow_models()
         
         logger.info("Models loaded successfully")
         return True
@@ -115,43 +505,724 @@ def load_models():
         print(f"❌ Error loading models: {str(e)}")
         return False
 
+def warm_up_model(disease_type, serving):
+    """Run a model on a single row and on a full micro-batch of zeros
+    
+    Returns the output width; raises ValueError when the outputs have the
+    wrong number of rows or are not finite.
+    """
+    width = len(get_expected_features(disease_type))
+    for rows in (1, Config.PREDICTION_BATCH_SIZE):
+        outputs = np.asarray(serving.model.predict(np.zeros((rows, width)), verbose=0))
+        if outputs.shape[0] != rows or not np.all(np.isfinite(outputs)):
+            raise ValueError(f"{disease_type} model gave invalid outputs on warm-up")
+    return outputs.shape[1]
+
+def warm_up_models(started_at=None):
+    """Warm up each loaded model and record startup-to-first-prediction time
+    
+    started_at is a time.perf_counter() value taken when the process started.
+    """
+    for disease_type, serving in serving_models.items():
+        if serving is not None:
+            warm_up_model(disease_type, serving)
+    
+    startup_stats['lite_mode'] = Config.LITE_MODE
+    if started_at is not None:
+        startup_stats['startup_to_first_prediction_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+        logger.info(f"Startup to first prediction: {startup_stats['startup_to_first_prediction_ms']} ms "
+                    f"({'lite' if Config.LITE_MODE else 'full'} mode)")
+    return startup_stats
+
+def reload_disease_model(disease_type):
+    """Load, warm up and swap in a disease's model from its current artifacts
+    
+    The new model is loaded and warmed while requests keep using the current
+    one, then installed with a single assignment. Returns the new version, or
+    None when the artifacts hold the version already serving. Raises when the
+    new model cannot be loaded or does not warm up like the current one,
+    which then stays in place.
+    """
+    current = serving_models.get(disease_type)
+    serving = load_disease_model(disease_type)
+    if serving is None:
+        raise ValueError(f"No loadable {disease_type} model artifacts")
+    if current is not None and serving.version == current.version:
+        return None
+    
+    width = warm_up_model(disease_type, serving)
+    if current is not None and width != warm_up_model(disease_type, current):
+        raise ValueError(f"New {disease_type} model has {width} outputs, the serving one a different number")
+    
+    install_model(disease_type, serving)
+    return serving.version
+
+# Hot reload of retrained models; main.py starts the watcher in each serving process
+model_reloader = ModelReloader(
+    MODEL_ARTIFACTS,
+    reload_disease_model,
+    interval_seconds=Config.MODEL_WATCH_INTERVAL,
+    enabled=Config.MODEL_WATCH_ENABLED
+)
+
+def get_reward_systems():
+    """Create the reward calculators on first use (imports sklearn)"""
+    global reward_systems
+    
+    if reward_systems is None:
+        from reward_system import setup_reward_system
+        reward_systems = setup_reward_system()
+    return reward_systems
+
+def get_expected_features(disease_type):
+    """Get the ordered feature names the model for a disease expects"""
+    if disease_type == 'dengue':
+        return Config.DENGUE_FEATURES
+    elif disease_type == 'kidney':
+        return Config.KIDNEY_FEATURES
+    elif disease_type == 'mental_health':
+        return Config.MENTAL_HEALTH_FEATURES
+    raise ValueError(f"Unknown disease type: {disease_type}")
+
+def is_scaler_folded(disease_type):
+    """Check whether the serving model takes raw (unscaled) features"""
+    serving = current_model(disease_type)
+    return serving is not None and getattr(serving.model, 'expects_raw_input', False)
+
+def scale_features(input_array, disease_type):
+    """Scale a raw feature matrix unless the scaler is folded into the model"""
+    if is_scaler_folded(disease_type):
+        return input_array
+    return current_model(disease_type).scaler.transform(input_array)
+
+@timed(STAGE_LATENCY.labels('preprocess'))
 def preprocess_input(input_data, disease_type):
-    """Preprocess input for prediction with proper feature mapping"""
+    """Validate and preprocess one input record for prediction
+    
+    Returns (model_input, error) where error is None or a message for the client.
+    """
     try:
-        # Get the expected features for this disease type
-        if disease_type == 'dengue':
-            expected_features = Config.DENGUE_FEATURES
-        elif disease_type == 'kidney':
-            expected_features = Config.KIDNEY_FEATURES
-        elif disease_type == 'mental_health':
-            expected_features = Config.MENTAL_HEALTH_FEATURES
-        else:
-            raise ValueError(f"Unknown disease type: {disease_type}")
-       
-
-        # Create input array in correct order
-        input_array = []
-        for feature in expected_features:
-            if feature in input_data:
-                input_array.append(input_data[feature])
-            else:
-                # Use default value if feature is missing
-                input_array.append(0.0)
-                logger.warning(f"Missing feature {feature} in input, using default value 0.0")
+        if not isinstance(input_data, dict):
+            return None, 'Input must be a JSON object'
         
-        input_array = np.array([input_array])
+        input_array, row_errors = build_feature_matrix([input_data], disease_type)
+        if row_errors:
+            return None, row_errors[0]
         
         # Scale the input
-        if disease_type in scalers and scalers[disease_type] is not None:
-            scaled_input = scalers[disease_type].transform(input_array)
-            return scaled_input, True
+        serving = current_model(disease_type)
+        if is_scaler_folded(disease_type):
+            return input_array, None
+        elif serving is not None and serving.scaler is not None:
+            scaled_input = serving.scaler.transform(input_array)
+            return scaled_input, None
         else:
             logger.error(f"Scaler not found for {disease_type}")
-            return None, False
+            return None, 'Error preprocessing input data'
             
     except Exception as e:
         logger.error(f"Error preprocessing input for {disease_type}: {str(e)}")
-        return None, False
+        return None, 'Error preprocessing input data'
+
+# JSON type names for error messages about non-numeric values
+JSON_TYPE_NAMES = {str: 'string', type(None): 'null', list: 'array', dict: 'object'}
+
+def describe_non_numeric(row, features):
+    """Describe the first non-numeric value of a record row"""
+    for feature, value in zip(features, row):
+        if not isinstance(value, (int, float)):
+            type_name = JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+            return f"Feature '{feature}' must be a number, got {type_name}"
+    return None
+
+def build_feature_matrix(records, disease_type):
+    """Build and validate the raw feature matrix for a list of records
+    
+    Returns (matrix, row_errors) where row_errors maps a record index to an
+    error message. Rows with errors are left as zeros and must be skipped.
+    Values must be JSON numbers; they are then checked against
+    Config.FEATURE_VALIDATION for the whole matrix at once. Missing features
+    default to 0.0 and are not range checked.
+    """
+    expected_features = get_expected_features(disease_type)
+    row_errors = {}
+    
+    rows = []
+    missing_cells = []
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            row_errors[index] = 'Record must be a JSON object'
+            rows.append([0.0] * len(expected_features))
+            continue
+        if not all(feature in record for feature in expected_features):
+            missing_cells.extend(
+                (index, column) for column, feature in enumerate(expected_features) if feature not in record
+            )
+        rows.append([record.get(feature, 0.0) for feature in expected_features])
+    
+    # Only numbers (and booleans) give a numeric array; strings, null and
+    # nested values fall back to a row-by-row check to find the records
+    try:
+        matrix = np.array(rows) if rows else np.zeros((0, len(expected_features)))
+    except (TypeError, ValueError):
+        # Arrays or objects of different shapes cannot form an array at all
+        matrix = np.array([], dtype=object)
+    if matrix.dtype.kind in 'biuf' and matrix.ndim == 2:
+        matrix = matrix.astype(np.float64)
+    else:
+        matrix = np.zeros((len(rows), len(expected_features)))
+        for index, row in enumerate(rows):
+            if index in row_errors:
+                continue
+            error = describe_non_numeric(row, expected_features)
+            if error:
+                row_errors[index] = error
+            else:
+                matrix[index] = row
+    
+    present = np.ones(matrix.shape, dtype=bool)
+    if missing_cells:
+        rows_missing, columns_missing = zip(*missing_cells)
+        present[list(rows_missing), list(columns_missing)] = False
+        logger.warning(f"{len(set(rows_missing))} {disease_type} records missing features, using default value 0.0")
+    if row_errors:
+        present[list(row_errors)] = False
+    
+    row_errors.update(get_validator(disease_type).validate(matrix, present))
+    return matrix, row_errors
+
+def predict_in_chunks(disease_type, model_input, chunk_size=None):
+    """Run the model over a matrix in fixed-size chunked forward passes"""
+    chunk_size = chunk_size or Config.BATCH_PREDICT_CHUNK_SIZE
+    model = current_model(disease_type).model
+    batch_sizes = BATCH_SIZES.labels(disease_type, 'batch')
+    
+    outputs = []
+    for start in range(0, len(model_input), chunk_size):
+        chunk = model_input[start:start + chunk_size]
+        batch_sizes.observe(len(chunk))
+        outputs.append(model.predict(chunk, verbose=0))
+    return np.vstack(outputs)
+
+def interpret_outputs(outputs, disease_type):
+    """Vectorized probability and class extraction, matching the single-record endpoints"""
+    if outputs.shape[1] == 1:
+        probabilities = outputs[:, 0]
+        predictions = (probabilities >= 0.5).astype(int)
+    elif disease_type == 'mental_health':
+        probabilities = outputs.max(axis=1)
+        predictions = outputs.argmax(axis=1)
+    else:
+        probabilities = outputs[:, 1]
+        predictions = outputs.argmax(axis=1)
+    return probabilities, predictions
+
+@timed(STAGE_LATENCY.labels('batch_predict'))
+def predict_matrix(matrix, disease_type):
+    """Get (probabilities, predictions) for a raw feature matrix"""
+    outputs = predict_in_chunks(disease_type, scale_features(matrix, disease_type))
+    return interpret_outputs(outputs, disease_type)
+
+def score_batch(records, disease_type):
+    """Score a list of records with one scaler transform and chunked forward passes"""
+    matrix, row_errors = build_feature_matrix(records, disease_type)
+    
+    valid = np.ones(len(records), dtype=bool)
+    if row_errors:
+        valid[list(row_errors)] = False
+    
+    probabilities = np.zeros(len(records))
+    predictions = np.zeros(len(records), dtype=int)
+    if valid.any():
+        probabilities[valid], predictions[valid] = predict_matrix(matrix[valid], disease_type)
+    
+    results = []
+    for index, (prediction, probability) in enumerate(zip(predictions.tolist(), probabilities.round(4).tolist())):
+        if index in row_errors:
+            results.append({'index': index, 'status': 'error', 'message': row_errors[index]})
+        else:
+            results.append({'prediction': prediction, 'probability': probability, 'status': 'success'})
+    
+    return results, len(row_errors)
+
+# Registered model versions, one directory with a bundle and manifest each
+model_registry = ModelRegistry(Config.MODEL_REGISTRY_DIR)
+
+def shadow_model_input(candidate, serving, model_input):
+    """Convert a request's input for the serving model into a candidate's input
+    
+    Candidates may scale differently from the serving model (or have their
+    scaler folded in), so the raw features are recovered first.
+    """
+    if getattr(serving.model, 'expects_raw_input', False):
+        raw_input = model_input
+    else:
+        mean, scale = scaler_statistics(serving.scaler)
+        raw_input = model_input * scale + mean
+    
+    if getattr(candidate.model, 'expects_raw_input', False):
+        return raw_input
+    return candidate.scaler.transform(raw_input)
+
+def record_shadow_metrics(record):
+    """Export one shadow comparison as metrics"""
+    disease_type, version = record['disease'], record['candidate_version']
+    SHADOW_LATENCY.labels(disease_type, version, 'serving').observe(record['serving_ms'] / 1000)
+    SHADOW_LATENCY.labels(disease_type, version, 'candidate').observe(record['candidate_ms'] / 1000)
+    agreement = 'agree' if record['serving_prediction'] == record['candidate_prediction'] else 'disagree'
+    SHADOW_PREDICTIONS.labels(disease_type, version, agreement).inc()
+
+# Candidate models scoring a sample of live predictions in the background
+shadow_scorer = ShadowScorer(
+    shadow_model_input,
+    interpret_outputs,
+    Config.SHADOW_LOG_DIR,
+    sample_rate=Config.SHADOW_SAMPLE_RATE,
+    max_pending=Config.SHADOW_MAX_PENDING,
+    record_fn=record_shadow_metrics
+)
+
+def load_registered_model(disease_type, version):
+    """Load and warm up a registered version without serving it
+    
+    Returns the ServingModel, or None when the version is not registered.
+    Raises ValueError when it does not fit the API's features or the
+    serving model's outputs.
+    """
+    manifest = model_registry.manifest(disease_type, version)
+    if manifest is None:
+        return None
+    
+    bundle_path = model_registry.bundle_path(disease_type, version)
+    bundle = load_bundle(bundle_path)
+    if bundle.features and bundle.features != get_expected_features(disease_type):
+        raise ValueError(f"{disease_type} model {version} was trained on different features")
+    
+    candidate = build_serving_model(
+        disease_type, bundle.model, bundle.scaler, 'numpy', bundle_path, version, bundle.optimal_threshold
+    )
+    width = warm_up_model(disease_type, candidate)
+    serving = serving_models.get(disease_type)
+    if serving is not None and width != warm_up_model(disease_type, serving):
+        raise ValueError(f"{disease_type} model {version} has {width} outputs, the serving one a different number")
+    return candidate
+
+def load_shadow_models():
+    """Load the registered versions marked as shadow candidates"""
+    for disease_type, label in MODEL_LABELS.items():
+        for manifest in model_registry.versions(disease_type):
+            if not manifest.get('shadow'):
+                continue
+            version = manifest['version']
+            try:
+                candidate = load_registered_model(disease_type, version)
+                shadow_scorer.add_candidate(disease_type, version, candidate)
+                print(f"✅ {label} model {version} shadowing {Config.SHADOW_SAMPLE_RATE:.0%} of predictions")
+            except Exception as e:
+                logger.error(f"Error loading shadow {disease_type} model {version}: {str(e)}")
+                print(f"⚠️ {label} shadow model {version} not loaded: {str(e)}")
+
+@timed(STAGE_LATENCY.labels('predict'))
+def predict_single(disease_type, model_input):
+    """Score one preprocessed record, serving repeats from the prediction cache"""
+    serving = current_model(disease_type)
+    shadow_scorer.submit(disease_type, serving, model_input)
+    use_cache = Config.CACHE_TYPE != 'NullCache'
+    if use_cache:
+        cache_key = canonical_key(serving.version, model_input)
+        cached = prediction_caches[disease_type].get(cache_key)
+        if cached is not None:
+            return cached
+    
+    # Coalesce concurrent requests into one forward pass when enabled
+    if Config.MICRO_BATCHING_ENABLED:
+        prediction = coalescers[disease_type].predict(model_input, timeout=Config.REQUEST_TIMEOUT, key=serving)[0]
+    else:
+        prediction = serving.model.predict(model_input, verbose=0)[0]
+    
+    if use_cache:
+        # Copy so the entry does not keep the whole coalesced batch alive
+        prediction = np.array(prediction)
+        prediction.flags.writeable = False
+        prediction_caches[disease_type].set(cache_key, prediction)
+    return prediction
+
+@timed(STAGE_LATENCY.labels('response_build'))
+def build_dengue_result(prediction, templates=None):
+    """Encode the dengue prediction response for one model output row
+    
+    Returns (body, history record). The static fields come from the
+    pre-encoded template of the predicted class.
+    """
+    # Handle binary classification (sigmoid output)
+    if len(prediction) == 1:
+        prediction_prob = float(prediction[0])
+        binary_prediction = 1 if prediction_prob >= 0.5 else 0
+    else:
+        # Multi-class classification (softmax output)
+        prediction_prob = float(prediction[1]) if len(prediction) > 1 else float(prediction[0])
+        binary_prediction = int(np.argmax(prediction))
+    
+    confidence = float(prediction_prob) if binary_prediction == 1 else float(1 - prediction_prob)
+    
+    template = (templates or RESPONSE_TEMPLATES)['dengue'][binary_prediction]
+    body = template.render(
+        confidence=round(confidence, 4),
+        probability=round(float(prediction_prob), 4),
+        timestamp=datetime.now().isoformat()
+    )
+    
+    record = dict(
+        HISTORY_FIELDS['dengue'][binary_prediction],
+        prediction=binary_prediction,
+        probability=prediction_prob,
+        confidence=confidence
+    )
+    return body, record
+
+@timed(STAGE_LATENCY.labels('response_build'))
+def build_kidney_result(prediction, templates=None):
+    """Encode the kidney prediction response for one model output row
+    
+    Returns (body, history record). The static fields come from the
+    pre-encoded template of the probability bucket.
+    """
+    if len(prediction) == 1:
+        prediction_prob = float(prediction[0])
+        binary_prediction = 1 if prediction_prob >= 0.5 else 0
+    else:
+        prediction_prob = float(prediction[1]) if len(prediction) > 1 else float(prediction[0])
+        binary_prediction = int(np.argmax(prediction))
+    
+    bucket = bisect_right(KIDNEY_BUCKETS, prediction_prob)
+    template = (templates or RESPONSE_TEMPLATES)['kidney'][bucket]
+    body = template.render(
+        prediction=binary_prediction,
+        confidence=round(float(prediction_prob), 4),
+        probability=round(float(prediction_prob), 4),
+        timestamp=datetime.now().isoformat()
+    )
+    
+    record = dict(
+        HISTORY_FIELDS['kidney'][bucket],
+        prediction=binary_prediction,
+        probability=prediction_prob,
+        confidence=prediction_prob
+    )
+    return body, record
+
+@timed(STAGE_LATENCY.labels('response_build'))
+def build_mental_health_result(prediction, templates=None):
+    """Encode the mental health assessment response for one model output row
+    
+    Returns (body, history record). The static fields come from the
+    pre-encoded template of the probability bucket.
+    """
+    # For mental health, we might have multi-class output
+    if len(prediction) > 1:
+        # Multi-class: get the highest probability
+        prediction_prob = float(np.max(prediction))
+        predicted_class = int(np.argmax(prediction))
+    else:
+        # Binary classification
+        prediction_prob = float(prediction[0])
+        predicted_class = 1 if prediction_prob >= 0.5 else 0
+    
+    bucket = bisect_right(MENTAL_HEALTH_BUCKETS, prediction_prob)
+    template = (templates or RESPONSE_TEMPLATES)['mental_health'][bucket]
+    body = template.render(
+        assessment_score=round(float(prediction_prob), 4),
+        predicted_class=predicted_class,
+        timestamp=datetime.now().isoformat()
+    )
+    
+    record = dict(
+        HISTORY_FIELDS['mental_health'][bucket],
+        assessment_score=prediction_prob,
+        predicted_class=predicted_class
+    )
+    return body, record
+
+# ==================== PREDICTION HISTORY ====================
+
+# History table per disease, and the input features copied into its columns
+HISTORY_TABLES = {
+    'dengue': 'dengue_predictions',
+    'kidney': 'kidney_predictions',
+    'mental_health': 'mental_health_assessments'
+}
+HISTORY_INPUT_COLUMNS = {
+    'dengue': {'age': 'Age', 'temperature': 'Temperature'},
+    'kidney': {'age': 'age', 'creatinine': 'sc'},
+    'mental_health': {}
+}
+
+# Input records kept with a batch prediction
+HISTORY_BATCH_SAMPLE_SIZE = 10
+
+# Page size of the patient history endpoint (default and maximum)
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+def request_user_id():
+    """User a prediction is recorded for: the authenticated user or 'anonymous'
+    
+    User ids claimed in the payload or headers are ignored, so requests
+    cannot add records to another user's history.
+    """
+    return authenticated_user_id() or 'anonymous'
+
+def record_prediction(disease_type, input_data, record, user_id):
+    """Record a single prediction in its disease's history table"""
+    if not history_writer.enabled:
+        return
+    for column, feature in HISTORY_INPUT_COLUMNS[disease_type].items():
+        record[column] = input_data.get(feature)
+    now = datetime.utcnow()
+    record.update(user_id=user_id, input_data=input_data, created_at=now, updated_at=now)
+    history_writer.enqueue(HISTORY_TABLES[disease_type], record)
+
+def record_risk_assessment(disease_type, input_data, response, user_id):
+    """Record a risk assessment response in risk_assessments"""
+    if not history_writer.enabled:
+        return
+    history_writer.enqueue('risk_assessments', {
+        'user_id': user_id,
+        'disease_type': disease_type,
+        'risk_probability': response['risk_probability'],
+        'risk_category': response.get('risk_category', response.get('ckd_stage')),
+        'recommended_action': response.get('recommended_action', response.get('clinical_significance')),
+        'preventive_measures': response.get('preventive_measures'),
+        'recommended_tests': response.get('recommended_tests'),
+        'lifestyle_recommendations': response.get('lifestyle_recommendations'),
+        'input_data': input_data,
+        'created_at': datetime.utcnow()
+    })
+
+def record_batch_prediction(disease_type, records, results, failed, user_id):
+    """Record a JSON batch prediction in batch_predictions, with a sample of its input"""
+    if not history_writer.enabled:
+        return
+    history_writer.enqueue('batch_predictions', {
+        'user_id': user_id,
+        'disease_type': disease_type,
+        'total_records': len(records),
+        'processed_records': len(results) - failed,
+        'results': results,
+        'input_data': records[:HISTORY_BATCH_SAMPLE_SIZE],
+        'created_at': datetime.utcnow()
+    })
+
+@app.route('/api/history', methods=['GET'])
+@login_required
+def patient_history():
+    """Get one page of the authenticated user's prediction history, newest first
+    
+    Query parameters: limit, disease and cursor, the next_cursor of the
+    previous page. Items have the shape the
+    frontend's PatientHistory view keeps; their details only hold the scalar
+    inputs, the full record comes from /api/history/<disease>/<record_id>.
+    """
+    try:
+        if 'sqlalchemy' not in app.extensions:
+            return jsonify({'error': 'Prediction history database is not initialized'}), 503
+        
+        from database import get_patient_history, HISTORY_SUMMARY_COLUMNS
+        
+        user_id = authenticated_user_id()
+        limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+        if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {HISTORY_MAX_PAGE_SIZE}'}), 400
+        disease_type = request.args.get('disease')
+        if disease_type == 'all':
+            disease_type = None
+        
+        try:
+            rows, next_cursor = get_patient_history(user_id, limit, request.args.get('cursor'), disease_type)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        items = [{
+            'id': f'{row.disease}-{row.id}',
+            'record_id': row.id,
+            'disease': row.disease,
+            # Stored in UTC
+            'timestamp': row.created_at.isoformat() + 'Z',
+            'riskScore': row.score,
+            'prediction': row.prediction,
+            'label': row.label,
+            'details': {name: getattr(row, name) for name in HISTORY_SUMMARY_COLUMNS
+                        if getattr(row, name) is not None}
+        } for row in rows]
+        
+        return jsonify({
+            'user_id': user_id,
+            'items': items,
+            'next_cursor': next_cursor
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting patient history: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/history/<disease_type>/<int:record_id>', methods=['GET'])
+@login_required
+def patient_history_record(disease_type, record_id):
+    """Get one prediction of the authenticated user's history with its inputs and recommendations"""
+    try:
+        if 'sqlalchemy' not in app.extensions:
+            return jsonify({'error': 'Prediction history database is not initialized'}), 503
+        
+        from database import get_patient_record, HISTORY_SOURCES
+        
+        if disease_type not in HISTORY_SOURCES:
+            return jsonify({'error': f'Unknown disease type: {disease_type}'}), 404
+        user_id = authenticated_user_id()
+        record = get_patient_record(disease_type, record_id, user_id)
+        if record is None or record.user_id != user_id:
+            return jsonify({'error': 'Record not found'}), 404
+        
+        # The raw inputs are only returned to the record's owner
+        return jsonify({'disease': disease_type, 'record': record.to_dict(inputs=True)}), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting patient history record: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# ==================== DASHBOARD ENDPOINTS ====================
+
+# Longest window the dashboard endpoints aggregate
+DASHBOARD_MAX_DAYS = 366
+
+def dashboard_window():
+    """Disease and (since, until) days of a dashboard request; raises ValueError on bad parameters"""
+    from database import HISTORY_SOURCES
+    
+    disease_type = request.args.get('disease', 'dengue')
+    if disease_type not in HISTORY_SOURCES:
+        raise ValueError(f'Unknown disease type: {disease_type}')
+    days = request.args.get('days', 30, type=int)
+    if not 1 <= days <= DASHBOARD_MAX_DAYS:
+        raise ValueError(f'days must be between 1 and {DASHBOARD_MAX_DAYS}')
+    until = datetime.utcnow().date()
+    return disease_type, until - timedelta(days=days - 1), until
+
+@app.route('/api/dashboard/daily', methods=['GET'])
+def dashboard_daily():
+    """Predictions per day and risk bucket, from the daily rollups
+    
+    Query parameters: disease, days (window ending today, UTC), risk_bucket
+    and district to filter, by_district=true to keep districts apart.
+    """
+    try:
+        if 'sqlalchemy' not in app.extensions:
+            return jsonify({'error': 'Prediction history database is not initialized'}), 503
+        
+        from database import get_daily_rollups
+        
+        try:
+            disease_type, since, until = dashboard_window()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        by_district = request.args.get('by_district', 'false').lower() == 'true'
+        rollups = get_daily_rollups(disease_type, since, until, request.args.get('risk_bucket'),
+                                    request.args.get('district'))
+        
+        series = {}
+        for rollup in rollups:
+            key = (rollup.day, rollup.risk_bucket, rollup.district if by_district else None)
+            total = series.setdefault(key, [0, 0.0])
+            total[0] += rollup.prediction_count
+            total[1] += rollup.probability_sum
+        
+        items = []
+        for (day, risk_bucket, district), (count, probability_sum) in series.items():
+            item = {
+                'day': day.isoformat(),
+                'risk_bucket': risk_bucket,
+                'count': count,
+                'mean_probability': round(probability_sum / count, 4) if count else None
+            }
+            if by_district:
+                item['district'] = district or None
+            items.append(item)
+        
+        return jsonify({
+            'disease': disease_type,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'series': items
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting daily dashboard: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard/distribution', methods=['GET'])
+def dashboard_distribution():
+    """Risk bucket distribution over a window (e.g. kidney stages this week), from the daily rollups"""
+    try:
+        if 'sqlalchemy' not in app.extensions:
+            return jsonify({'error': 'Prediction history database is not initialized'}), 503
+        
+        from database import get_daily_rollups
+        
+        try:
+            disease_type, since, until = dashboard_window()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        rollups = get_daily_rollups(disease_type, since, until, district=request.args.get('district'))
+        
+        counts = {}
+        for rollup in rollups:
+            counts[rollup.risk_bucket] = counts.get(rollup.risk_bucket, 0) + rollup.prediction_count
+        total = sum(counts.values())
+        
+        return jsonify({
+            'disease': disease_type,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'total': total,
+            'buckets': {bucket: {'count': count, 'share': round(count / total, 4)}
+                        for bucket, count in sorted(counts.items())}
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting dashboard distribution: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/rollups/rebuild', methods=['POST'])
+@admin_required
+def rebuild_rollups():
+    """Recompute the daily rollups from the prediction tables
+    
+    POST payload: {"since": "2026-01-31"} to rebuild from that day only.
+    """
+    try:
+        if 'sqlalchemy' not in app.extensions:
+            return jsonify({'error': 'Prediction history database is not initialized'}), 503
+        
+        from database import rebuild_daily_rollups
+        
+        data = request.get_json(silent=True) or {}
+        since = data.get('since')
+        try:
+            since = date.fromisoformat(since) if since else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'since must be a YYYY-MM-DD date'}), 400
+        
+        started_at = time.perf_counter()
+        rows = rebuild_daily_rollups(since)
+        logger.info(f"Rebuilt {rows} daily rollup rows since {since or 'the beginning'}")
+        return jsonify({
+            'rollup_rows': rows,
+            'since': since.isoformat() if since else None,
+            'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 2)
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error rebuilding daily rollups: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 # ==================== DENGUE ENDPOINTS ====================
 
@@ -168,89 +1239,198 @@ def dengue_predict():
             return jsonify({'error': 'Dengue model not available'}), 503
         
         # Preprocess input
-        scaled_input, success = preprocess_input(data, 'dengue')
-        if not success:
-            return jsonify({'error': 'Error preprocessing input data'}), 400
+        scaled_input, error = preprocess_input(data, 'dengue')
+        if error:
+            return jsonify({'error': error}), 400
         
         # Make prediction
-        prediction = models['dengue'].predict(scaled_input, verbose=0)[0]
-        
-        # Handle binary classification (sigmoid output)
-        if len(prediction) == 1:
-            prediction_prob = float(prediction[0])
-            binary_prediction = 1 if prediction_prob >= 0.5 else 0
-        else:
-            # Multi-class classification (softmax output)
-            prediction_prob = float(prediction[1]) if len(prediction) > 1 else float(prediction[0])
-            binary_prediction = np.argmax(prediction)
-        
-        risk_level = 'High Risk' if binary_prediction == 1 else 'Low Risk'
-        confidence = float(prediction_prob) if binary_prediction == 1 else float(1 - prediction_prob)
+        prediction = predict_single('dengue', scaled_input)
         
-        recommendations = get_dengue_recommendation(binary_prediction, prediction_prob)
+        body, record = build_dengue_result(prediction)
+        record_prediction('dengue', data, record, request_user_id())
         
-        response = {
-            'disease': 'dengue',
-            'prediction': int(binary_prediction),
-            'risk_level': risk_level,
-            'confidence': round(confidence, 4),
-            'probability': round(float(prediction_prob), 4),
-            'timestamp': datetime.now().isoformat(),
-            'recommendations': recommendations
-        }
-        
-        logger.info(f"Dengue prediction made: {risk_level}")
-        return jsonify(response), 200
+        logger.info(f"Dengue prediction made: {record['risk_level']}")
+        return json_response(body)
     
     except Exception as e:
         logger.error(f"Error in dengue prediction: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/dengue/batch-predict', methods=['POST'])
-def dengue_batch_predict():
-    """Batch prediction for dengue"""
+def batch_predict(disease_type, label):
+    """Shared vectorized batch prediction handler"""
     try:
         data = request.get_json()
         
         if not isinstance(data, list):
             return jsonify({'error': 'Input must be a list of records'}), 400
         
-        if models.get('dengue') is None:
-            return jsonify({'error': 'Dengue model not available'}), 503
+        if models.get(disease_type) is None:
+            return jsonify({'error': f'{label} model not available'}), 503
         
-        results = []
-        for record in data:
-            scaled_input, success = preprocess_input(record, 'dengue')
-            if not success:
-                results.append({'status': 'error', 'message': 'Preprocessing failed'})
-                continue
-            
-            prediction = models['dengue'].predict(scaled_input, verbose=0)[0]
-            
-            if len(prediction) == 1:
-                prediction_prob = float(prediction[0])
-                binary_prediction = 1 if prediction_prob >= 0.5 else 0
-            else:
-                prediction_prob = float(prediction[1]) if len(prediction) > 1 else float(prediction[0])
-                binary_prediction = np.argmax(prediction)
-            
-            results.append({
-                'prediction': int(binary_prediction),
-                'probability': round(float(prediction_prob), 4),
-                'status': 'success'
-            })
+        if scalers.get(disease_type) is None and not is_scaler_folded(disease_type):
+            return jsonify({'error': f'{label} scaler not available'}), 503
         
-        logger.info(f"Batch dengue prediction: processed {len(results)} records")
+        results, failed = score_batch(data, disease_type)
+        record_batch_prediction(disease_type, data, results, failed, request_user_id())
+        
+        logger.info(f"Batch {disease_type} prediction: processed {len(results)} records ({failed} failed)")
         return jsonify({
             'total_records': len(data),
-            'processed': len(results),
+            'processed': len(results) - failed,
+            'failed': failed,
             'results': results
         }), 200
     
     except Exception as e:
-        logger.error(f"Error in batch dengue prediction: {str(e)}")
+        logger.error(f"Error in batch {disease_type} prediction: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def iter_lines(stream, block_size=65536):
+    """Split a byte stream into lines, reading it in fixed-size blocks"""
+    remainder = b''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (remainder + block).split(b'\n')
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+def read_ndjson_chunks(stream, chunk_size):
+    """Yield (offset, records) chunks parsed from a newline-delimited JSON stream
+    
+    Lines that are not valid JSON are passed on as None so they are reported
+    as errors at their own index.
+    """
+    offset = 0
+    records = []
+    for line in iter_lines(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            records.append(None)
+        
+        if len(records) >= chunk_size:
+            yield offset, records
+            offset += len(records)
+            records = []
+    
+    if records:
+        yield offset, records
+
+def stream_batch_predict(disease_type, label):
+    """Shared streaming batch handler: NDJSON records in, NDJSON results out
+    
+    Records are read and scored one chunk at a time and each chunk's results
+    are sent as soon as they are ready, so memory use does not grow with the
+    size of the upload. The last line is a summary object. Clients sending
+    large uploads must read the response while still sending (curl -N does).
+    """
+    if models.get(disease_type) is None:
+        return jsonify({'error': f'{label} model not available'}), 503
+    
+    if scalers.get(disease_type) is None and not is_scaler_folded(disease_type):
+        return jsonify({'error': f'{label} scaler not available'}), 503
+    
+    def generate():
+        total = failed = 0
+        try:
+            for offset, records in read_ndjson_chunks(request.stream, Config.BATCH_PREDICT_CHUNK_SIZE):
+                results, chunk_failed = score_batch(records, disease_type)
+                
+                lines = []
+                for index, (record, result) in enumerate(zip(records, results)):
+                    if record is None:
+                        result['message'] = 'Invalid JSON'
+                    result['index'] = offset + index
+                    lines.append(dumps(result))
+                
+                total += len(records)
+                failed += chunk_failed
+                yield b'\n'.join(lines) + b'\n'
+        
+        except Exception as e:
+            logger.error(f"Error in streaming {disease_type} prediction: {str(e)}")
+            yield dumps({'error': str(e)}) + b'\n'
+            return
+        
+        logger.info(f"Streaming {disease_type} prediction: processed {total} records ({failed} failed)")
+        yield dumps({'summary': {'total_records': total, 'processed': total - failed, 'failed': failed}}) + b'\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def csv_batch_predict(disease_type, label):
+    """Shared CSV upload handler: scores the file in chunks and streams the scored CSV back
+    
+    The CSV is sent either as the 'file' field of a multipart form or as the
+    raw request body (Content-Type: text/csv).
+    """
+    from csv_scoring import score_csv
+    import pandas as pd
+    
+    if models.get(disease_type) is None:
+        return jsonify({'error': f'{label} model not available'}), 503
+    
+    if scalers.get(disease_type) is None and not is_scaler_folded(disease_type):
+        return jsonify({'error': f'{label} scaler not available'}), 503
+    
+    # Multipart uploads are closed at request teardown, before the response has
+    # finished streaming, so they are copied to a temporary file first
+    upload = request.files.get('file')
+    if upload:
+        source = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, source)
+        source.seek(0)
+    else:
+        source = request.stream
+    scoring = score_csv(source, disease_type, lambda matrix: predict_matrix(matrix, disease_type))
+    
+    # Parse the header and first chunk up front so malformed files get a 400
+    try:
+        first_chunk = next(scoring)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        source.close()
+        return jsonify({'error': f'Invalid CSV file: {str(e)}'}), 400
+    except StopIteration:
+        source.close()
+        return jsonify({'error': 'CSV file has no rows'}), 400
+    
+    def generate():
+        yield first_chunk
+        try:
+            yield from scoring
+        except Exception as e:
+            logger.error(f"Error in CSV {disease_type} prediction: {str(e)}")
+        finally:
+            source.close()
+    
+    filename = f"{disease_type}_predictions.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/dengue/batch-predict', methods=['POST'])
+def dengue_batch_predict():
+    """Batch prediction for dengue"""
+    return batch_predict('dengue', 'Dengue')
+
+@app.route('/api/dengue/batch-predict/stream', methods=['POST'])
+def dengue_batch_predict_stream():
+    """Streaming NDJSON batch prediction for dengue"""
+    return stream_batch_predict('dengue', 'Dengue')
+
+@app.route('/api/dengue/batch-predict/csv', methods=['POST'])
+def dengue_batch_predict_csv():
+    """CSV batch prediction for dengue"""
+    return csv_batch_predict('dengue', 'Dengue')
+
 @app.route('/api/dengue/risk-assessment', methods=['POST'])
 def dengue_risk_assessment():
     """Get detailed risk assessment for dengue"""
@@ -260,12 +1440,12 @@ def dengue_risk_assessment():
         if models.get('dengue') is None:
             return jsonify({'error': 'Dengue model not available'}), 503
         
-        scaled_input, success = preprocess_input(data, 'dengue')
+        scaled_input, error = preprocess_input(data, 'dengue')
         
-        if not success:
-            return jsonify({'error': 'Error preprocessing input'}), 400
+        if error:
+            return jsonify({'error': error}), 400
         
-        prediction = models['dengue'].predict(scaled_input, verbose=0)[0]
+        prediction = predict_single('dengue', scaled_input)
         prediction_prob = float(prediction[0]) if len(prediction) == 1 else float(prediction[1])
         
         # Determine risk categories
@@ -296,6 +1476,8 @@ def dengue_risk_assessment():
             ]
         }
         
+        record_risk_assessment('dengue', data, response, request_user_id())
+        
         logger.info(f"Dengue risk assessment completed: {risk_category}")
         return jsonify(response), 200
     
@@ -317,40 +1499,37 @@ def kidney_predict():
         if models.get('kidney') is None:
             return jsonify({'error': 'Kidney model not available'}), 503
         
-        scaled_input, success = preprocess_input(data, 'kidney')
-        if not success:
-            return jsonify({'error': 'Error preprocessing input data'}), 400
-        
-        prediction = models['kidney'].predict(scaled_input, verbose=0)[0]
+        scaled_input, error = preprocess_input(data, 'kidney')
+        if error:
+            return jsonify({'error': error}), 400
         
-        if len(prediction) == 1:
-            prediction_prob = float(prediction[0])
-            binary_prediction = 1 if prediction_prob >= 0.5 else 0
-        else:
-            prediction_prob = float(prediction[1]) if len(prediction) > 1 else float(prediction[0])
-            binary_prediction = np.argmax(prediction)
+        prediction = predict_single('kidney', scaled_input)
         
-        stage = get_kidney_disease_stage(prediction_prob)
-        recommendations = get_kidney_recommendation(prediction_prob)
-        
-        response = {
-            'disease': 'kidney_disease',
-            'prediction': int(binary_prediction),
-            'disease_status': stage['status'],
-            'confidence': round(float(prediction_prob), 4),
-            'probability': round(float(prediction_prob), 4),
-            'stage': stage['stage'],
-            'timestamp': datetime.now().isoformat(),
-            'recommendations': recommendations
-        }
+        body, record = build_kidney_result(prediction)
+        record_prediction('kidney', data, record, request_user_id())
         
-        logger.info(f"Kidney prediction made: {stage['stage']}")
-        return jsonify(response), 200
+        logger.info(f"Kidney prediction made: {record['ckd_stage']}")
+        return json_response(body)
     
     except Exception as e:
         logger.error(f"Error in kidney prediction: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/kidney/batch-predict', methods=['POST'])
+def kidney_batch_predict():
+    """Batch prediction for kidney disease"""
+    return batch_predict('kidney', 'Kidney')
+
+@app.route('/api/kidney/batch-predict/stream', methods=['POST'])
+def kidney_batch_predict_stream():
+    """Streaming NDJSON batch prediction for kidney disease"""
+    return stream_batch_predict('kidney', 'Kidney')
+
+@app.route('/api/kidney/batch-predict/csv', methods=['POST'])
+def kidney_batch_predict_csv():
+    """CSV batch prediction for kidney disease"""
+    return csv_batch_predict('kidney', 'Kidney')
+
 @app.route('/api/kidney/risk-assessment', methods=['POST'])
 def kidney_risk_assessment():
     """Get detailed risk assessment for kidney disease"""
@@ -360,12 +1539,12 @@ def kidney_risk_assessment():
         if models.get('kidney') is None:
             return jsonify({'error': 'Kidney model not available'}), 503
         
-        scaled_input, success = preprocess_input(data, 'kidney')
+        scaled_input, error = preprocess_input(data, 'kidney')
         
-        if not success:
-            return jsonify({'error': 'Error preprocessing input'}), 400
+        if error:
+            return jsonify({'error': error}), 400
         
-        prediction = models['kidney'].predict(scaled_input, verbose=0)[0]
+        prediction = predict_single('kidney', scaled_input)
         prediction_prob = float(prediction[0]) if len(prediction) == 1 else float(prediction[1])
         stage = get_kidney_disease_stage(prediction_prob)
         
@@ -391,6 +1570,8 @@ def kidney_risk_assessment():
             ]
         }
         
+        record_risk_assessment('kidney', data, response, request_user_id())
+        
         logger.info(f"Kidney risk assessment: {stage['stage']}")
         return jsonify(response), 200
     
@@ -412,42 +1593,120 @@ def mental_health_assessment():
         if models.get('mental_health') is None:
             return jsonify({'error': 'Mental health model not available'}), 503
         
-        scaled_input, success = preprocess_input(data, 'mental_health')
-        if not success:
-            return jsonify({'error': 'Error preprocessing input data'}), 400
+        scaled_input, error = preprocess_input(data, 'mental_health')
+        if error:
+            return jsonify({'error': error}), 400
         
-        prediction = models['mental_health'].predict(scaled_input, verbose=0)[0]
+        prediction = predict_single('mental_health', scaled_input)
         
-        # For mental health, we might have multi-class output
-        if len(prediction) > 1:
-            # Multi-class: get the highest probability
-            prediction_prob = float(np.max(prediction))
-            predicted_class = int(np.argmax(prediction))
-        else:
-            # Binary classification
-            prediction_prob = float(prediction[0])
-            predicted_class = 1 if prediction_prob >= 0.5 else 0
+        body, record = build_mental_health_result(prediction)
+        record_prediction('mental_health', data, record, request_user_id())
         
-        severity = get_mental_health_severity(prediction_prob)
-        recommendations = get_mental_health_recommendations(prediction_prob)
+        logger.info(f"Mental health assessment: {record['severity_level']}")
+        return json_response(body)
+    
+    except Exception as e:
+        logger.error(f"Error in mental health assessment: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+@app.route('/api/mental-health/batch-predict', methods=['POST'])
+def mental_health_batch_predict():
+    """Batch assessment for mental health"""
+    return batch_predict('mental_health', 'Mental health')
+
+@app.route('/api/mental-health/batch-predict/stream', methods=['POST'])
+def mental_health_batch_predict_stream():
+    """Streaming NDJSON batch assessment for mental health"""
+    return stream_batch_predict('mental_health', 'Mental health')
+
+@app.route('/api/mental-health/batch-predict/csv', methods=['POST'])
+def mental_health_batch_predict_csv():
+    """CSV batch assessment for mental health"""
+    return csv_batch_predict('mental_health', 'Mental health')
+
+# ==================== SCREENING ENDPOINT ====================
+
+# Response builders per disease, shared with the single-disease endpoints
+RESULT_BUILDERS = {
+    'dengue': build_dengue_result,
+    'kidney': build_kidney_result,
+    'mental_health': build_mental_health_result
+}
+
+# One thread per disease so a screening waits only for its slowest model
+screening_executor = ThreadPoolExecutor(max_workers=len(RESULT_BUILDERS), thread_name_prefix='screen')
+
+def screening_error(message):
+    """Encode a failed disease section of a screening response"""
+    return False, dumps({'status': 'error', 'error': message})
+
+def screen_disease(disease_type, features, user_id):
+    """Score one disease section of a screening payload
+    
+    Returns (success, encoded result).
+    """
+    if models.get(disease_type) is None:
+        return screening_error(f'{MODEL_LABELS[disease_type]} model not available')
+    
+    if not isinstance(features, dict) or not features:
+        return screening_error('Feature set must be a non-empty JSON object')
+    
+    model_input, error = preprocess_input(features, disease_type)
+    if error:
+        return screening_error(error)
+    
+    body, record = RESULT_BUILDERS[disease_type](predict_single(disease_type, model_input), SCREENING_TEMPLATES)
+    record_prediction(disease_type, features, record, user_id)
+    return True, body
+
+@app.route('/api/screen', methods=['POST'])
+def screen_patient():
+    """Screen one patient for any subset of dengue, kidney and mental health
+    
+    Payload: {"dengue": {...}, "kidney": {...}, "mental_health": {...}}
+    """
+    try:
+        started_at = time.perf_counter()
+        data = request.get_json()
         
-        response = {
-            'disease': 'mental_health',
-            'assessment_score': round(float(prediction_prob), 4),
-            'predicted_class': predicted_class,
-            'severity_level': severity['level'],
-            'risk_category': severity['category'],
-            'timestamp': datetime.now().isoformat(),
-            'recommendations': recommendations,
-            'professional_help_needed': severity['needs_professional_help']
+        if not isinstance(data, dict):
+            return jsonify({'error': 'No input data provided'}), 400
+        
+        requested = [disease_type for disease_type in RESULT_BUILDERS if disease_type in data]
+        if not requested:
+            return jsonify({'error': f'Provide at least one of: {", ".join(RESULT_BUILDERS)}'}), 400
+        
+        # Score the requested models concurrently
+        user_id = request_user_id()
+        futures = {
+            disease_type: screening_executor.submit(screen_disease, disease_type, data[disease_type], user_id)
+            for disease_type in requested
         }
         
-        logger.info(f"Mental health assessment: {severity['level']}")
-        return jsonify(response), 200
+        results = {}
+        failed = 0
+        for disease_type, future in futures.items():
+            try:
+                success, results[disease_type] = future.result(timeout=Config.REQUEST_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error screening {disease_type}: {str(e)}")
+                success, results[disease_type] = screening_error(str(e))
+            failed += 0 if success else 1
+        
+        body = SCREENING_RESPONSE_TEMPLATE.render(
+            screened=requested,
+            results=join_object(results),
+            failed=failed,
+            latency_ms=round((time.perf_counter() - started_at) * 1000, 2),
+            timestamp=datetime.now().isoformat()
+        )
+        
+        logger.info(f"Screening completed for {', '.join(requested)} ({failed} failed)")
+        return json_response(body)
     
     except Exception as e:
-        logger.error(f"Error in mental health assessment: {str(e)}")
+        logger.error(f"Error in screening: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
 # ==================== MODEL EVALUATION ENDPOINTS ====================
 
 @app.route('/api/<disease_type>/evaluate', methods=['POST'])
@@ -474,7 +1733,7 @@ def evaluate_model(disease_type):
             sample_data = sample_predictions[disease_type]
             
             # Calculate optimal threshold
-            optimal_threshold, optimal_reward, metrics = reward_systems['medical_calculator'].find_optimal_threshold(
+            optimal_threshold, optimal_reward, metrics = get_reward_systems()['medical_calculator'].find_optimal_threshold(
                 [0, 1, 0, 1, 0],  # Sample true labels
                 [0.2, 0.8, 0.3, 0.9, 0.4],  # Sample probabilities
                 disease_type
@@ -513,7 +1772,7 @@ def batch_evaluate_model(disease_type):
             return jsonify({'error': 'No predictions data provided'}), 400
         
         # Calculate batch rewards
-        batch_result = reward_systems['batch_calculator'].calculate_batch_rewards(
+        batch_result = get_reward_systems()['batch_calculator'].calculate_batch_rewards(
             data, disease_type
         )
         
@@ -542,32 +1801,19 @@ def mental_health_therapy_plan():
         if models.get('mental_health') is None:
             return jsonify({'error': 'Mental health model not available'}), 503
         
-        scaled_input, success = preprocess_input(data, 'mental_health')
+        scaled_input, error = preprocess_input(data, 'mental_health')
         
-        if not success:
-            return jsonify({'error': 'Error preprocessing input'}), 400
+        if error:
+            return jsonify({'error': error}), 400
         
-        prediction = models['mental_health'].predict(scaled_input, verbose=0)[0]
+        prediction = predict_single('mental_health', scaled_input)
         prediction_prob = float(prediction[0]) if len(prediction) == 1 else float(np.max(prediction))
-        severity = get_mental_health_severity(prediction_prob)
         
-        response = {
-            'disease': 'mental_health',
-            'assessment_score': round(float(prediction_prob), 4),
-            'severity_level': severity['level'],
-            'personalized_therapy_plan': {
-                'coping_strategies': get_coping_strategies(severity['level']),
-                'daily_exercises': get_daily_exercises(severity['level']),
-                'meditation_practices': get_meditation_practices(),
-                'lifestyle_changes': get_lifestyle_changes(),
-                'crisis_resources': get_crisis_resources()
-            },
-            'follow_up_frequency': severity['follow_up_frequency'],
-            'professional_referral': severity['needs_professional_help']
-        }
+        template = THERAPY_PLAN_TEMPLATES[bisect_right(MENTAL_HEALTH_SEVERITY_BUCKETS, prediction_prob)]
+        body = template.render(assessment_score=round(float(prediction_prob), 4))
         
-        logger.info(f"Therapy plan generated: {severity['level']}")
-        return jsonify(response), 200
+        logger.info(f"Therapy plan generated: {template.document['severity_level']}")
+        return json_response(body)
     
     except Exception as e:
         logger.error(f"Error in therapy plan generation: {str(e)}")
@@ -613,9 +1859,208 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'services': model_status
+        'pid': os.getpid(),
+        'services': model_status,
+        'startup': startup_stats,
+        'micro_batching': {
+            'enabled': Config.MICRO_BATCHING_ENABLED,
+            'window_ms': Config.PREDICTION_BATCH_WINDOW_MS,
+            'max_batch_size': Config.PREDICTION_BATCH_SIZE,
+            'queues': {name: coalescer.stats() for name, coalescer in coalescers.items()}
+        },
+        'prediction_history': history_writer.stats(),
+        'model_reload': model_reloader.stats(),
+        'shadow_scoring': shadow_scorer.stats(),
+        'prediction_cache': {
+            'type': Config.CACHE_TYPE,
+            'timeout': Config.CACHE_DEFAULT_TIMEOUT,
+            'max_entries': Config.CACHE_MAX_ENTRIES,
+            'models': {name: {'version': model_versions.get(name), **cache.stats()}
+                       for name, cache in prediction_caches.items()}
+        }
     }), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, stage, batch size and model metrics in the Prometheus text format
+    
+    Each process keeps its own metrics; with pre-fork workers a scrape reads
+    the worker that accepted it.
+    """
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def collect_model_metrics():
+    """Refresh the model gauges at scrape time"""
+    MODEL_INFO.clear()
+    for disease_type in MODEL_ARTIFACTS:
+        loaded = models.get(disease_type) is not None
+        MODEL_LOADED.labels(disease_type).set(1 if loaded else 0)
+        if loaded:
+            MODEL_INFO.labels(
+                disease_type,
+                model_engines.get(disease_type, 'unknown'),
+                model_sources.get(disease_type, 'unknown'),
+                model_versions.get(disease_type, 'unknown')
+            ).set(1)
+
+REGISTRY.add_collector(collect_model_metrics)
+
+@app.route('/api/admin/profiling', methods=['GET', 'POST'])
+@admin_required
+def profiling_settings():
+    """Get or change request profiling settings
+    
+    POST payload: {"enabled": true, "sample_rate": 100}. Settings apply to the
+    process serving the request (one worker when running pre-fork workers).
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            sample_rate = data.get('sample_rate')
+            if sample_rate is not None and (not isinstance(sample_rate, int) or sample_rate < 1):
+                return jsonify({'error': 'sample_rate must be a positive integer'}), 400
+            request_profiler.configure(enabled=data.get('enabled'), sample_rate=sample_rate)
+        
+        # Write out the current window so it can be downloaded right away
+        request_profiler.flush()
+        return jsonify({'pid': os.getpid(), **request_profiler.stats()}), 200
+    
+    except Exception as e:
+        logger.error(f"Error updating profiling settings: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/auth/token', methods=['POST'])
+@admin_required
+def issue_user_token():
+    """Issue a user token for a user id, for integrations and tests
+    
+    POST payload: {"user_id": "...", "ttl": seconds}, ttl optional (at most
+    USER_TOKEN_TTL). Requires JWT_SECRET_KEY to be set.
+    """
+    try:
+        if not Config.USER_TOKEN_SECRET:
+            return jsonify({'error': 'User tokens are disabled (JWT_SECRET_KEY is not set)'}), 503
+        
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id')
+        if not isinstance(user_id, str) or not user_id.strip():
+            return jsonify({'error': 'user_id must be a non-empty string'}), 400
+        ttl = data.get('ttl', Config.USER_TOKEN_TTL)
+        if not isinstance(ttl, int) or not 1 <= ttl <= Config.USER_TOKEN_TTL:
+            return jsonify({'error': f'ttl must be between 1 and {Config.USER_TOKEN_TTL} seconds'}), 400
+        
+        return jsonify({
+            'user_id': user_id,
+            'token': sign_user_token(user_id, Config.USER_TOKEN_SECRET, ttl),
+            'expires_in': ttl
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error issuing user token: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/models/reload', methods=['POST'])
+@admin_required
+def reload_models():
+    """Load, warm up and swap in models whose artifacts changed since they were loaded
+    
+    POST payload: {"disease": "dengue", "force": true}, both optional; force
+    reloads unchanged artifacts too. Applies to the process serving the
+    request; with pre-fork workers the others pick new artifacts up through
+    their watchers (MODEL_WATCH_ENABLED).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        disease_type = data.get('disease')
+        if disease_type is not None and disease_type not in MODEL_ARTIFACTS:
+            return jsonify({'error': f'Unknown disease type: {disease_type}'}), 400
+        
+        results = model_reloader.check(
+            force=bool(data.get('force')),
+            settle=False,
+            diseases=[disease_type] if disease_type else None
+        )
+        return jsonify({
+            'pid': os.getpid(),
+            'results': results,
+            'versions': {name: model_versions.get(name) for name in MODEL_ARTIFACTS}
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error reloading models: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/models/shadow', methods=['GET', 'POST'])
+@admin_required
+def shadow_models():
+    """Get the shadow scoring comparisons, or start or stop a shadow candidate
+    
+    POST payload: {"disease": "kidney", "version": "<registered version>",
+    "enabled": true, "sample_rate": 0.1}; sample_rate alone only changes the
+    sampling. The candidate flag is saved in the version's manifest, so it is
+    loaded again at startup; loading applies to the process serving the
+    request (one worker when running pre-fork workers).
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            sample_rate = data.get('sample_rate')
+            if sample_rate is not None and (not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1):
+                return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+            shadow_scorer.configure(sample_rate=sample_rate)
+            
+            version = data.get('version')
+            if version is not None:
+                disease_type = data.get('disease')
+                if disease_type not in MODEL_ARTIFACTS:
+                    return jsonify({'error': f'Unknown disease type: {disease_type}'}), 400
+                try:
+                    manifest = model_registry.manifest(disease_type, version)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                if manifest is None:
+                    return jsonify({'error': f'{disease_type} model version {version} is not registered'}), 404
+                
+                enabled = bool(data.get('enabled', True))
+                if enabled:
+                    try:
+                        candidate = load_registered_model(disease_type, version)
+                    except ValueError as e:
+                        return jsonify({'error': str(e)}), 400
+                    shadow_scorer.add_candidate(disease_type, version, candidate)
+                else:
+                    shadow_scorer.remove_candidate(disease_type, version)
+                model_registry.set_shadow(disease_type, version, enabled)
+        
+        return jsonify({'pid': os.getpid(), **shadow_scorer.stats()}), 200
+    
+    except Exception as e:
+        logger.error(f"Error updating shadow models: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/profiling/profiles/<path:filename>', methods=['GET'])
+@admin_required
+def download_profile(filename):
+    """Download a collapsed-stack profile file"""
+    if filename not in request_profiler.list_files():
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(os.path.abspath(Config.PROFILE_DIR), filename,
+                               mimetype='text/plain', as_attachment=True)
+
+def registered_versions(disease_type):
+    """Summaries of a disease's registered versions, newest first"""
+    return [
+        {
+            'version': manifest['version'],
+            'registered_at': manifest['registered_at'],
+            'test_metrics': manifest.get('test_metrics'),
+            'notes': manifest.get('notes'),
+            'serving': manifest['version'] == model_versions.get(disease_type),
+            'shadow': manifest['version'] in shadow_scorer.candidates.get(disease_type, {})
+        }
+        for manifest in model_registry.versions(disease_type)
+    ]
+
 @app.route('/api/model-info', methods=['GET'])
 def model_info():
     """Get information about all models"""
@@ -624,16 +2069,34 @@ def model_info():
             'dengue': {
                 'input_features': Config.DENGUE_FEATURES,
                 'model_path': Config.DENGUE_MODEL_PATH,
+                'engine': model_engines.get('dengue'),
+                'scaler_folded': is_scaler_folded('dengue'),
+                'source': model_sources.get('dengue'),
+                'version': model_versions.get('dengue'),
+                'optimal_threshold': optimal_thresholds.get('dengue'),
+                'registered_versions': registered_versions('dengue'),
                 'status': 'active' if models.get('dengue') else 'inactive'
             },
             'kidney': {
                 'input_features': Config.KIDNEY_FEATURES,
                 'model_path': Config.KIDNEY_MODEL_PATH,
+                'engine': model_engines.get('kidney'),
+                'scaler_folded': is_scaler_folded('kidney'),
+                'source': model_sources.get('kidney'),
+                'version': model_versions.get('kidney'),
+                'optimal_threshold': optimal_thresholds.get('kidney'),
+                'registered_versions': registered_versions('kidney'),
                 'status': 'active' if models.get('kidney') else 'inactive'
             },
             'mental_health': {
                 'input_features': Config.MENTAL_HEALTH_FEATURES,
                 'model_path': Config.MENTAL_HEALTH_MODEL_PATH,
+                'engine': model_engines.get('mental_health'),
+                'scaler_folded': is_scaler_folded('mental_health'),
+                'source': model_sources.get('mental_health'),
+                'version': model_versions.get('mental_health'),
+                'optimal_threshold': optimal_thresholds.get('mental_health'),
+                'registered_versions': registered_versions('mental_health'),
                 'status': 'active' if models.get('mental_health') else 'inactive'
             }
         }
@@ -890,6 +2353,137 @@ def generate_psychiatrist_response(user_message):
     
     return 'Thank you for sharing. Can you tell me more about how you\'re feeling? I\'m here to listen and help.'
 
+# ==================== RESPONSE TEMPLATES ====================
+
+# Probability bucket boundaries of the helpers above (>= boundary moves up a
+# bucket); keep them in sync when changing a threshold there
+KIDNEY_BUCKETS = [0.3, 0.4, 0.5, 0.7, 0.9]
+MENTAL_HEALTH_BUCKETS = [0.4, 0.6, 0.7, 0.8]
+MENTAL_HEALTH_SEVERITY_BUCKETS = [0.4, 0.6, 0.8]
+
+def bucket_probabilities(buckets):
+    """Get one probability inside each bucket (its lower bound)"""
+    return [0.0] + buckets
+
+def build_response_templates():
+    """Pre-encode the static part of every prediction response, per bucket
+    
+    Dengue templates are indexed by predicted class, the others by
+    bisect_right(<DISEASE>_BUCKETS, probability).
+    """
+    dengue = []
+    for binary_prediction in (0, 1):
+        dengue.append(ResponseTemplate({
+            'disease': 'dengue',
+            'prediction': binary_prediction,
+            'risk_level': 'High Risk' if binary_prediction == 1 else 'Low Risk',
+            'confidence': Slot('confidence'),
+            'probability': Slot('probability'),
+            'timestamp': Slot('timestamp'),
+            'recommendations': get_dengue_recommendation(binary_prediction, None)
+        }))
+    
+    kidney = []
+    for probability in bucket_probabilities(KIDNEY_BUCKETS):
+        stage = get_kidney_disease_stage(probability)
+        kidney.append(ResponseTemplate({
+            'disease': 'kidney_disease',
+            'prediction': Slot('prediction'),
+            'disease_status': stage['status'],
+            'confidence': Slot('confidence'),
+            'probability': Slot('probability'),
+            'stage': stage['stage'],
+            'timestamp': Slot('timestamp'),
+            'recommendations': get_kidney_recommendation(probability)
+        }))
+    
+    mental_health = []
+    for probability in bucket_probabilities(MENTAL_HEALTH_BUCKETS):
+        severity = get_mental_health_severity(probability)
+        mental_health.append(ResponseTemplate({
+            'disease': 'mental_health',
+            'assessment_score': Slot('assessment_score'),
+            'predicted_class': Slot('predicted_class'),
+            'severity_level': severity['level'],
+            'risk_category': severity['category'],
+            'timestamp': Slot('timestamp'),
+            'recommendations': get_mental_health_recommendations(probability),
+            'professional_help_needed': severity['needs_professional_help']
+        }))
+    
+    return {'dengue': dengue, 'kidney': kidney, 'mental_health': mental_health}
+
+def build_therapy_plan_templates():
+    """Pre-encode the therapy plan response per severity level"""
+    templates = []
+    for probability in bucket_probabilities(MENTAL_HEALTH_SEVERITY_BUCKETS):
+        severity = get_mental_health_severity(probability)
+        templates.append(ResponseTemplate({
+            'disease': 'mental_health',
+            'assessment_score': Slot('assessment_score'),
+            'severity_level': severity['level'],
+            'personalized_therapy_plan': {
+                'coping_strategies': get_coping_strategies(severity['level']),
+                'daily_exercises': get_daily_exercises(severity['level']),
+                'meditation_practices': get_meditation_practices(),
+                'lifestyle_changes': get_lifestyle_changes(),
+                'crisis_resources': get_crisis_resources()
+            },
+            'follow_up_frequency': severity['follow_up_frequency'],
+            'professional_referral': severity['needs_professional_help']
+        }))
+    return templates
+
+def build_history_fields():
+    """Static history table columns per response template bucket"""
+    dengue = [
+        {'risk_level': template.document['risk_level'], 'recommendations': template.document['recommendations']}
+        for template in RESPONSE_TEMPLATES['dengue']
+    ]
+    
+    kidney = []
+    for probability in bucket_probabilities(KIDNEY_BUCKETS):
+        stage = get_kidney_disease_stage(probability)
+        kidney.append({
+            'ckd_stage': stage['stage'],
+            'disease_status': stage['status'],
+            'gfr_range': stage['gfr_range'],
+            'clinical_significance': stage['clinical_significance'],
+            'recommendations': get_kidney_recommendation(probability)
+        })
+    
+    mental_health = []
+    for probability in bucket_probabilities(MENTAL_HEALTH_BUCKETS):
+        severity = get_mental_health_severity(probability)
+        mental_health.append({
+            'severity_level': severity['level'],
+            'risk_category': severity['category'],
+            'recommendations': get_mental_health_recommendations(probability),
+            'professional_help_needed': severity['needs_professional_help'],
+            'follow_up_frequency': severity['follow_up_frequency']
+        })
+    
+    return {'dengue': dengue, 'kidney': kidney, 'mental_health': mental_health}
+
+RESPONSE_TEMPLATES = build_response_templates()
+HISTORY_FIELDS = build_history_fields()
+
+# Screening results carry a status field next to the usual response fields
+SCREENING_TEMPLATES = {
+    disease_type: [template.with_fields(status='success') for template in templates]
+    for disease_type, templates in RESPONSE_TEMPLATES.items()
+}
+
+SCREENING_RESPONSE_TEMPLATE = ResponseTemplate({
+    'screened': Slot('screened'),
+    'results': Slot('results'),
+    'failed': Slot('failed'),
+    'latency_ms': Slot('latency_ms'),
+    'timestamp': Slot('timestamp')
+})
+
+THERAPY_PLAN_TEMPLATES = build_therapy_plan_templates()
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
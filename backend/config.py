@@ -11,6 +11,11 @@ class Config:
     API_PORT = int(os.getenv('API_PORT', 5000))
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
     
+    # Pre-forked worker processes for 'python main.py api' (1 = single process)
+    API_WORKERS = int(os.getenv('API_WORKERS', 1))
+    # BLAS/TensorFlow threads per worker (0 = CPU count divided by workers)
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', 0))
+    
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
     
@@ -27,6 +32,55 @@ class Config:
     KIDNEY_SCALER_PATH = os.path.join(MODELS_DIR, "kidney_scaler.pkl")
     MENTAL_HEALTH_SCALER_PATH = os.path.join(MODELS_DIR, "mental_health_scaler.pkl")
     
+    # Self-contained serving bundles (weights, scaler statistics, features, threshold)
+    DENGUE_BUNDLE_PATH = os.path.join(MODELS_DIR, "dengue.bundle.npz")
+    KIDNEY_BUNDLE_PATH = os.path.join(MODELS_DIR, "kidney.bundle.npz")
+    MENTAL_HEALTH_BUNDLE_PATH = os.path.join(MODELS_DIR, "mental_health.bundle.npz")
+    
+    # Load serving bundles instead of .h5 + .pkl when they are up to date
+    USE_MODEL_BUNDLES = os.getenv('USE_MODEL_BUNDLES', 'True').lower() == 'true'
+    
+    # ==================== INFERENCE CONFIGURATION ====================
+    # Serving engine per disease: 'numpy' (folded NumPy forward pass) or 'keras'
+    INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'numpy')
+    INFERENCE_ENGINES = {
+        'dengue': os.getenv('DENGUE_INFERENCE_ENGINE', INFERENCE_ENGINE),
+        'kidney': os.getenv('KIDNEY_INFERENCE_ENGINE', INFERENCE_ENGINE),
+        'mental_health': os.getenv('MENTAL_HEALTH_INFERENCE_ENGINE', INFERENCE_ENGINE)
+    }
+    
+    # Fold each StandardScaler into its model's first Dense layer at load time
+    # (NumPy engine only), so serving feeds raw feature vectors to one fused model
+    FOLD_SCALER_INTO_MODEL = os.getenv('FOLD_SCALER_INTO_MODEL', 'True').lower() == 'true'
+    
+    # Serving weights are published to memory-mapped files in SHARED_WEIGHTS_DIR
+    # (RAM-backed /dev/shm where available) so all workers map the same pages
+    SHARED_WEIGHTS_ENABLED = os.getenv('SHARED_WEIGHTS_ENABLED', 'True').lower() == 'true'
+    SHARED_WEIGHTS_DIR = os.getenv(
+        'SHARED_WEIGHTS_DIR',
+        '/dev/shm/medai' if os.path.isdir('/dev/shm') else os.path.join(MODELS_DIR, 'shared')
+    )
+    
+    # Lite serving: models come only from bundles and TensorFlow/sklearn are
+    # never imported (also enabled by 'python main.py api --lite')
+    LITE_MODE = os.getenv('LITE_MODE', 'False').lower() == 'true'
+    
+    # Hot reload: each serving process checks the model artifacts every
+    # MODEL_WATCH_INTERVAL seconds and swaps in retrained models without a
+    # restart (POST /api/admin/models/reload forces a check)
+    MODEL_WATCH_ENABLED = os.getenv('MODEL_WATCH_ENABLED', 'True').lower() == 'true'
+    MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 5))
+    
+    # Model registry: versioned bundles with manifests in MODEL_REGISTRY_DIR
+    # (python main.py register-model). Versions marked as shadow candidates are
+    # loaded next to the serving model and score SHADOW_SAMPLE_RATE of the
+    # single-record predictions in a background thread, writing the
+    # comparisons to SHADOW_LOG_DIR
+    MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join(MODELS_DIR, 'registry'))
+    SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', 0.1))
+    SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', 1000))
+    SHADOW_LOG_DIR = os.path.join('logs', 'shadow')
+    
     # ==================== FEATURE CONFIGURATION ====================
     # All models use 13 features as per API requirements
     INPUT_FEATURES = 13
@@ -52,21 +106,56 @@ class Config:
     # Feature data types and validation ranges
     FEATURE_VALIDATION = {
         'dengue': {
-            'Age': {'min': 0, 'max': 120, 'type': 'int'},
+            'Age': {'min': 0, 'max': 120, 'type': 'float'},
             'Gender': {'min': 0, 'max': 1, 'type': 'int'},
             'Temperature': {'min': 35.0, 'max': 42.0, 'type': 'float'},
             'Platelet_Count': {'min': 0, 'max': 500000, 'type': 'int'},
             'WBC_Count': {'min': 0, 'max': 50000, 'type': 'int'}
         },
         'kidney': {
-            'age': {'min': 0, 'max': 120, 'type': 'int'},
+            'age': {'min': 0, 'max': 120, 'type': 'float'},
             'bp': {'min': 0, 'max': 200, 'type': 'int'},
             'sc': {'min': 0, 'max': 20, 'type': 'float'}  # serum creatinine
         },
         'mental_health': {
-            'age': {'min': 0, 'max': 120, 'type': 'int'},
+            'age': {'min': 0, 'max': 120, 'type': 'float'},
             'stress': {'min': 0, 'max': 10, 'type': 'int'},
-            'sleep': {'min': 0, 'max': 24, 'type': 'int'}
+            'sleep': {'min': 0, 'max': 24, 'type': 'float'}
+        }
+    }
+    
+    # CSV export column names that differ from the model feature names
+    CSV_COLUMN_ALIASES = {
+        'dengue': {
+            'District': 'District_encoded'
+        },
+        'kidney': {
+            'Age of the patient': 'age',
+            'Blood pressure (mm/Hg)': 'bp',
+            'Specific gravity of urine': 'sg',
+            'Albumin in urine': 'al',
+            'Sugar in urine': 'su',
+            'Random blood glucose level (mg/dl)': 'bgr',
+            'Blood urea (mg/dl)': 'bu',
+            'Serum creatinine (mg/dl)': 'sc',
+            'Sodium level (mEq/L)': 'sod',
+            'Potassium level (mEq/L)': 'pot',
+            'Hemoglobin level (gms)': 'hemo',
+            'Packed cell volume (%)': 'pcv',
+            'White blood cell count (cells/cumm)': 'wc'
+        },
+        'mental_health': {
+            'employment_status': 'employment',
+            'work_environment': 'work_env',
+            'mental_health_history': 'mh_history',
+            'seeks_treatment': 'treatment',
+            'stress_level': 'stress',
+            'sleep_hours': 'sleep',
+            'physical_activity_days': 'activity',
+            'depression_score': 'depression',
+            'anxiety_score': 'anxiety',
+            'social_support_score': 'support',
+            'productivity_score': 'productivity'
         }
     }
     
@@ -76,11 +165,44 @@ class Config:
     KIDNEY_DATA_PATH = os.path.join(DATA_DIR, "kidney_disease_data.csv")
     MENTAL_HEALTH_DATA_PATH = os.path.join(DATA_DIR, "mental_health_data.csv")
     
+    # Datasets whose text columns give the category codes (LabelEncoder order,
+    # as in training) for text values in CSV uploads
+    CATEGORY_DATA_PATHS = {
+        'dengue': DENGUE_DATA_PATH,
+        'kidney': KIDNEY_DATA_PATH,
+        'mental_health': os.path.join(DATA_DIR, "mental_health_scaler.csv")
+    }
+    
     # ==================== DATABASE CONFIGURATION ====================
+    # Relative SQLite paths are resolved against the backend directory
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///instance/medai.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = DEBUG
     
+    # SQLite connection profile, applied by init_db to every connection:
+    # WAL lets readers run alongside the single writer, NORMAL skips the fsync
+    # per commit (safe in WAL mode) and writers wait up to SQLITE_BUSY_TIMEOUT_MS
+    # for the lock instead of failing with "database is locked"
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    
+    # Connection pool for other databases (PostgreSQL, MySQL)
+    DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 10))
+    DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 20))
+    DATABASE_POOL_TIMEOUT = int(os.getenv('DATABASE_POOL_TIMEOUT', 30))
+    DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', 1800))
+    
+    # Prediction history: the predict endpoints queue their results and a
+    # writer thread inserts them in bulk every HISTORY_FLUSH_ROWS rows or
+    # HISTORY_FLUSH_INTERVAL_MS; rows beyond HISTORY_MAX_PENDING are dropped
+    HISTORY_ENABLED = os.getenv('HISTORY_ENABLED', 'True').lower() == 'true'
+    HISTORY_FLUSH_ROWS = int(os.getenv('HISTORY_FLUSH_ROWS', 500))
+    HISTORY_FLUSH_INTERVAL_MS = float(os.getenv('HISTORY_FLUSH_INTERVAL_MS', 200))
+    HISTORY_MAX_PENDING = int(os.getenv('HISTORY_MAX_PENDING', 100000))
+    
     # ==================== MODEL TRAINING PARAMETERS ====================
     # Neural Network Architecture
     NN_LAYERS = [128, 64, 32, 16]
@@ -130,20 +252,64 @@ class Config:
     LOG_FILE = 'api.log'
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
+    # LOG_FILE is rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT gzipped files
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    
+    # Repeated warnings from one place are logged once per this many seconds (0 logs all)
+    LOG_RATE_LIMIT_SECONDS = float(os.getenv('LOG_RATE_LIMIT_SECONDS', 60))
+    
     # ==================== SECURITY CONFIGURATION ====================
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     
+    # Token expected in the X-Admin-Token header of /api/admin/* requests;
+    # admin endpoints are disabled when it is not set
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
+    # 'Authorization: Bearer' tokens identify whose prediction history a request
+    # reads and records: HS256 tokens signed with JWT_SECRET_KEY (accepted only
+    # when it is set, never with the default above) or Firebase ID tokens of
+    # FIREBASE_PROJECT_ID (needs firebase-admin)
+    USER_TOKEN_SECRET = os.getenv('JWT_SECRET_KEY')
+    USER_TOKEN_TTL = int(os.getenv('USER_TOKEN_TTL', 3600))
+    FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
+    
     # Rate limiting
     RATE_LIMIT = os.getenv('RATE_LIMIT', '100 per hour')
     
     # ==================== PERFORMANCE CONFIGURATION ====================
     # Prediction batch size for optimal performance
-    PREDICTION_BATCH_SIZE = 32
+    PREDICTION_BATCH_SIZE = int(os.getenv('PREDICTION_BATCH_SIZE', 32))
+    
+    # Micro-batching: coalesce concurrent single-record predictions for up to
+    # PREDICTION_BATCH_WINDOW_MS or until PREDICTION_BATCH_SIZE rows arrive
+    MICRO_BATCHING_ENABLED = os.getenv('MICRO_BATCHING_ENABLED', 'True').lower() == 'true'
+    PREDICTION_BATCH_WINDOW_MS = float(os.getenv('PREDICTION_BATCH_WINDOW_MS', 2.0))
+    
+    # Rows per forward pass in the batch-predict endpoints
+    BATCH_PREDICT_CHUNK_SIZE = int(os.getenv('BATCH_PREDICT_CHUNK_SIZE', 1024))
+    
+    # Rows parsed per pandas.read_csv chunk when scoring uploaded CSV files
+    CSV_CHUNK_SIZE = int(os.getenv('CSV_CHUNK_SIZE', 5000))
     
-    # Cache configuration
-    CACHE_TYPE = 'SimpleCache'
-    CACHE_DEFAULT_TIMEOUT = 300
+    # Cache configuration: prediction results are cached per disease in a bounded
+    # LRU with a TTL ('SimpleCache'), or not at all ('NullCache')
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    
+    # ==================== PROFILING CONFIGURATION ====================
+    # Sample the Python stacks of one request in every PROFILE_SAMPLE_RATE and
+    # write them as collapsed stacks (flame graph input) to PROFILE_DIR, one file
+    # per PROFILE_WINDOW_SECONDS. Can also be switched at runtime through
+    # /api/admin/profiling.
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', 100))
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 1.0))
+    PROFILE_WINDOW_SECONDS = int(os.getenv('PROFILE_WINDOW_SECONDS', 300))
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 48))
+    PROFILE_DIR = os.path.join('logs', 'profiles')
     
     # ==================== HEALTH CHECK CONFIGURATION ====================
     HEALTH_CHECK_INTERVAL = 300  # 5 minutes
@@ -172,6 +338,23 @@ class Config:
         if len(cls.MENTAL_HEALTH_FEATURES) != cls.INPUT_FEATURES:
             errors.append(f"Mental health features count mismatch: expected {cls.INPUT_FEATURES}, got {len(cls.MENTAL_HEALTH_FEATURES)}")
         
+        # Validate inference engines
+        for disease_type, engine in cls.INFERENCE_ENGINES.items():
+            if engine not in ('numpy', 'keras'):
+                errors.append(f"Unknown inference engine '{engine}' for {disease_type} (use 'numpy' or 'keras')")
+        
+        # Validate worker count
+        if cls.API_WORKERS < 1:
+            errors.append(f"API_WORKERS must be at least 1, got {cls.API_WORKERS}")
+        
+        # Validate cache type
+        if cls.CACHE_TYPE not in ('SimpleCache', 'NullCache'):
+            errors.append(f"Unknown cache type '{cls.CACHE_TYPE}' (use 'SimpleCache' or 'NullCache')")
+        
+        # Validate profiling sample rate
+        if cls.PROFILE_SAMPLE_RATE < 1:
+            errors.append(f"PROFILE_SAMPLE_RATE must be at least 1, got {cls.PROFILE_SAMPLE_RATE}")
+        
         # Validate port range
         if not (1024 <= cls.API_PORT <= 65535):
             errors.append(f"API port {cls.API_PORT} is not in valid range (1024-65535)")
@@ -215,6 +398,31 @@ class Config:
             'mental_health': cls.MENTAL_HEALTH_SCALER_PATH
         }
         return path_map.get(disease_type)
+    
+    @classmethod
+    def get_bundle_path(cls, disease_type):
+        """Get serving bundle path for specific disease type"""
+        path_map = {
+            'dengue': cls.DENGUE_BUNDLE_PATH,
+            'kidney': cls.KIDNEY_BUNDLE_PATH,
+            'mental_health': cls.MENTAL_HEALTH_BUNDLE_PATH
+        }
+        return path_map.get(disease_type)
+    
+    @classmethod
+    def get_data_path(cls, disease_type):
+        """Get training dataset path for specific disease type"""
+        path_map = {
+            'dengue': cls.DENGUE_DATA_PATH,
+            'kidney': cls.KIDNEY_DATA_PATH,
+            'mental_health': cls.MENTAL_HEALTH_DATA_PATH
+        }
+        return path_map.get(disease_type)
+    
+    @classmethod
+    def get_summary_path(cls, disease_type):
+        """Get training summary path for specific disease type"""
+        return os.path.join(cls.MODELS_DIR, f"{disease_type}_training_summary.json")
 
 
 # Validate configuration on import
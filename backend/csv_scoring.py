@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import time
+import os
+import logging
+
+from config import Config
+from input_validation import get_validator
+
+logger = logging.getLogger(__name__)
+
+# Columns appended to every scored CSV row
+RESULT_COLUMNS = ['prediction', 'probability', 'status', 'message']
+
+_category_codes = {}
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def load_category_codes(disease_type):
+    """Get {feature: {category: code}} for the text columns of a disease's dataset
+
+    Codes follow LabelEncoder, as used in training: the sorted category labels
+    of the disease's dataset in Config.CATEGORY_DATA_PATHS numbered from 0.
+    Without the dataset, text values cannot be encoded and are reported as
+    row errors.
+    """
+    if disease_type in _category_codes:
+        return _category_codes[disease_type]
+
+    codes = {}
+    data_path = Config.CATEGORY_DATA_PATHS.get(disease_type)
+    if data_path and os.path.exists(data_path):
+        df = pd.read_csv(data_path).rename(columns=Config.CSV_COLUMN_ALIASES.get(disease_type, {}))
+        features = set(Config.get_features(disease_type))
+        for column in df.columns:
+            if column in features and not pd.api.types.is_numeric_dtype(df[column]):
+                labels = sorted(df[column].fillna('Unknown').astype(str).unique())
+                codes[column] = {label: code for code, label in enumerate(labels)}
+    else:
+        logger.warning(f"Dataset for {disease_type} not found, text values in CSV uploads will not be encoded")
+
+    _category_codes[disease_type] = codes
+    return codes
+
+
+def build_csv_matrix(chunk, features, aliases, category_codes, validator=None):
+    """Map a CSV chunk onto the model features, one vectorized pass per column
+
+    Returns (matrix, errors, defaulted): errors holds per-row messages (''
+    for valid rows) and defaulted names the features each row had no value
+    for. Missing columns and empty cells default to 0.0 and are not range
+    checked, as in the JSON endpoints. Given values are checked with the
+    validator.
+    """
+    chunk = chunk.rename(columns=aliases)
+    matrix = np.zeros((len(chunk), len(features)))
+    present = np.zeros(matrix.shape, dtype=bool)
+    errors = np.full(len(chunk), '', dtype=object)
+
+    for index, feature in enumerate(features):
+        if feature not in chunk.columns:
+            continue
+
+        column = chunk[feature]
+        values = pd.to_numeric(column, errors='coerce')
+        if feature in category_codes:
+            values = values.fillna(column.astype(str).str.strip().map(category_codes[feature]))
+
+        invalid = (values.isna() & column.notna()).to_numpy()
+        errors[invalid & (errors == '')] = f'Invalid value for {feature}'
+        present[:, index] = values.notna().to_numpy()
+        matrix[:, index] = values.fillna(0.0).to_numpy(dtype=np.float64)
+
+    defaulted = np.full(len(chunk), '', dtype=object)
+    for row in np.flatnonzero(~present.all(axis=1)).tolist():
+        missing = [feature for feature, given in zip(features, present[row]) if not given]
+        defaulted[row] = f"Defaulted to 0.0: {', '.join(missing)}"
+
+    if validator is not None:
+        present[errors != ''] = False
+        for row, message in validator.validate(matrix, present).items():
+            errors[row] = message
+
+    return matrix, errors, defaulted
+
+
+def score_csv(source, disease_type, predict_fn, chunk_size=None, stats=None):
+    """Score a CSV file chunk by chunk, yielding the scored CSV as text
+
+    predict_fn maps a raw feature matrix to (probabilities, predictions).
+    Each chunk is parsed with pandas.read_csv(chunksize=...), scored and
+    written out before the next one is read, so memory use does not depend
+    on the file size. Row counts, rows per second and peak memory are logged
+    at the end and stored in the optional stats dict.
+    """
+    chunk_size = chunk_size or Config.CSV_CHUNK_SIZE
+    features = Config.get_features(disease_type)
+    aliases = Config.CSV_COLUMN_ALIASES.get(disease_type, {})
+    category_codes = load_category_codes(disease_type)
+    validator = get_validator(disease_type)
+
+    stats = stats if stats is not None else {}
+    stats.update({'rows': 0, 'failed': 0})
+    started_at = time.perf_counter()
+
+    for chunk_index, chunk in enumerate(pd.read_csv(source, chunksize=chunk_size, skipinitialspace=True)):
+        if chunk_index == 0:
+            mapped_columns = set(chunk.rename(columns=aliases).columns)
+            missing = [feature for feature in features if feature not in mapped_columns]
+            if missing:
+                logger.warning(f"CSV for {disease_type} is missing {', '.join(missing)}, using default value 0.0")
+
+        matrix, errors, defaulted = build_csv_matrix(chunk, features, aliases, category_codes, validator)
+        valid = errors == ''
+
+        probabilities = np.full(len(chunk), np.nan)
+        predictions = pd.array([None] * len(chunk), dtype='Int64')
+        if valid.any():
+            chunk_probabilities, chunk_predictions = predict_fn(matrix[valid])
+            probabilities[valid] = np.round(chunk_probabilities, 4)
+            predictions[valid] = chunk_predictions
+
+        scored = chunk.assign(
+            prediction=predictions,
+            probability=probabilities,
+            status=np.where(valid, 'success', 'error'),
+            message=np.where(valid, defaulted, errors)
+        )
+        yield scored.to_csv(index=False, header=chunk_index == 0)
+
+        stats['rows'] += len(chunk)
+        stats['failed'] += int((~valid).sum())
+
+    elapsed = time.perf_counter() - started_at
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(stats['rows'] / elapsed, 1) if elapsed > 0 else 0.0
+    stats['peak_memory_mb'] = peak_memory_mb()
+
+    logger.info(f"CSV {disease_type} scoring: {stats['rows']} rows ({stats['failed']} failed) "
+                f"in {stats['seconds']}s, {stats['rows_per_second']} rows/s, "
+                f"peak memory {stats['peak_memory_mb']} MB")
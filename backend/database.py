@@ -1,14 +1,35 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, JSON, Index, UniqueConstraint
+from sqlalchemy import inspect, text, event, select, update, literal, null, union_all, and_, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import load_only
+from sqlalchemy.dialects import sqlite, postgresql
 from datetime import datetime
+from itertools import groupby
+import base64
 import json
 import os
 
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 db = SQLAlchemy()
 
+# Placeholder per DB-API paramstyle for the positional bulk INSERT statements
+POSITIONAL_PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s'}
+
+# (columns, SQL, encoders, memoize flags) per (table, dialect), built on first bulk insert
+_bulk_insert_plans = {}
+
+
 class DenguePrediction(db.Model):
     """Dengue prediction records"""
     __tablename__ = 'dengue_predictions'
+    __table_args__ = (Index('ix_dengue_predictions_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -24,8 +45,10 @@ class DenguePrediction(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'age': self.age,
@@ -35,15 +58,20 @@ class DenguePrediction(db.Model):
             'confidence': round(self.confidence, 4),
             'risk_level': self.risk_level,
             'risk_category': self.risk_category,
-            'recommendations': self.recommendations,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+        if details:
+            record['recommendations'] = self.recommendations
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class KidneyDiseasePrediction(db.Model):
     """Kidney disease prediction records"""
     __tablename__ = 'kidney_predictions'
+    __table_args__ = (Index('ix_kidney_predictions_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -61,8 +89,10 @@ class KidneyDiseasePrediction(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'age': self.age,
@@ -74,15 +104,20 @@ class KidneyDiseasePrediction(db.Model):
             'disease_status': self.disease_status,
             'gfr_range': self.gfr_range,
             'clinical_significance': self.clinical_significance,
-            'recommendations': self.recommendations,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+        if details:
+            record['recommendations'] = self.recommendations
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class MentalHealthAssessment(db.Model):
     """Mental health assessment records"""
     __tablename__ = 'mental_health_assessments'
+    __table_args__ = (Index('ix_mental_health_assessments_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -97,25 +132,32 @@ class MentalHealthAssessment(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'assessment_score': round(self.assessment_score, 4),
             'predicted_class': self.predicted_class,
             'severity_level': self.severity_level,
             'risk_category': self.risk_category,
-            'recommendations': self.recommendations,
             'professional_help_needed': self.professional_help_needed,
             'follow_up_frequency': self.follow_up_frequency,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+        if details:
+            record['recommendations'] = self.recommendations
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class MentalHealthTherapyPlan(db.Model):
     """Mental health therapy plan records"""
     __tablename__ = 'mental_health_therapy_plans'
+    __table_args__ = (Index('ix_mental_health_therapy_plans_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -127,17 +169,23 @@ class MentalHealthTherapyPlan(db.Model):
     input_data = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'assessment_score': round(self.assessment_score, 4),
             'severity_level': self.severity_level,
-            'therapy_plan': self.therapy_plan,
             'follow_up_frequency': self.follow_up_frequency,
             'professional_referral': self.professional_referral,
             'created_at': self.created_at.isoformat()
         }
+        if details:
+            record['therapy_plan'] = self.therapy_plan
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class MentalHealthChat(db.Model):
@@ -167,6 +215,7 @@ class MentalHealthChat(db.Model):
 class RiskAssessment(db.Model):
     """Generic risk assessment records"""
     __tablename__ = 'risk_assessments'
+    __table_args__ = (Index('ix_risk_assessments_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -180,24 +229,31 @@ class RiskAssessment(db.Model):
     input_data = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'disease_type': self.disease_type,
             'risk_probability': round(self.risk_probability, 4),
             'risk_category': self.risk_category,
             'recommended_action': self.recommended_action,
-            'preventive_measures': self.preventive_measures,
-            'recommended_tests': self.recommended_tests,
-            'lifestyle_recommendations': self.lifestyle_recommendations,
             'created_at': self.created_at.isoformat()
         }
+        if details:
+            record['preventive_measures'] = self.preventive_measures
+            record['recommended_tests'] = self.recommended_tests
+            record['lifestyle_recommendations'] = self.lifestyle_recommendations
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class BatchPrediction(db.Model):
     """Batch prediction records"""
     __tablename__ = 'batch_predictions'
+    __table_args__ = (Index('ix_batch_predictions_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -208,16 +264,22 @@ class BatchPrediction(db.Model):
     input_data = Column(JSON)  # Store input data samples
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=None, inputs=False):
+        if details is None:
+            details = json_columns_loaded(self)
+        record = {
             'id': self.id,
             'user_id': self.user_id,
             'disease_type': self.disease_type,
             'total_records': self.total_records,
             'processed_records': self.processed_records,
-            'results': self.results,
             'created_at': self.created_at.isoformat()
         }
+        if details:
+            record['results'] = self.results
+        if inputs:
+            record['input_data'] = self.input_data
+        return record
 
 
 class User(db.Model):
@@ -275,6 +337,7 @@ class ModelPerformance(db.Model):
 class PredictionHistory(db.Model):
     """General prediction history"""
     __tablename__ = 'prediction_history'
+    __table_args__ = (Index('ix_prediction_history_user_created', 'user_id', 'created_at'),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(100), default='anonymous')
@@ -300,65 +363,236 @@ class PredictionHistory(db.Model):
         }
 
 
+class DailyRollup(db.Model):
+    """Prediction counts per (disease, day, risk bucket, district) for dashboards
+    
+    Maintained incrementally as predictions are persisted (see
+    update_daily_rollups) and rebuildable from the prediction tables. An
+    empty district means the prediction had none.
+    """
+    __tablename__ = 'daily_rollups'
+    __table_args__ = (UniqueConstraint('disease_type', 'day', 'risk_bucket', 'district',
+                                       name='uq_daily_rollups_key'),)
+    
+    id = Column(Integer, primary_key=True)
+    disease_type = Column(String(50), nullable=False)
+    day = Column(Date, nullable=False)
+    risk_bucket = Column(String(50), nullable=False)
+    district = Column(String(100), nullable=False, default='')
+    prediction_count = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'disease_type': self.disease_type,
+            'day': self.day.isoformat(),
+            'risk_bucket': self.risk_bucket,
+            'district': self.district or None,
+            'prediction_count': self.prediction_count,
+            'mean_probability': round(self.probability_sum / self.prediction_count, 4) if self.prediction_count else None
+        }
+
+
+def sqlite_database_path(database_url):
+    """Absolute file path of a SQLite database URL (None for other databases)
+    
+    Relative paths are taken from the backend directory, so the database
+    does not depend on the working directory.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    if os.path.isabs(url.database):
+        return url.database
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), url.database)
+
+
+def resolve_database_uri(database_url):
+    """Make a relative SQLite database path absolute and create its directory"""
+    database_path = sqlite_database_path(database_url)
+    if database_path is None:
+        return database_url
+    os.makedirs(os.path.dirname(database_path), exist_ok=True)
+    return make_url(database_url).set(database=database_path).render_as_string(hide_password=False)
+
+
+def sqlite_pragmas():
+    """PRAGMA statements of the SQLite connection profile (see Config.SQLITE_*)"""
+    return [
+        f'PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}',
+        f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}',
+        f'PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}',
+        f'PRAGMA mmap_size={int(Config.SQLITE_MMAP_SIZE)}',
+        # Negative cache sizes are in KiB rather than pages
+        f'PRAGMA cache_size={-int(Config.SQLITE_CACHE_SIZE_KB)}'
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Apply the SQLite connection profile to a new DB-API connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def engine_options(database_uri):
+    """SQLAlchemy engine options for a database URI
+    
+    SQLite keeps SQLAlchemy's default pool (the profile is applied per
+    connection); other backends get a sized pool that checks connections
+    before use and recycles them before server-side timeouts.
+    """
+    if make_url(database_uri).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': Config.DATABASE_POOL_SIZE,
+        'max_overflow': Config.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': Config.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': Config.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': True
+    }
+
+
 def init_db(app):
     """Initialize database with proper configuration"""
-    # Configure database URI if not already set
+    # Use Config.DATABASE_URL unless the app was given a database already
     if not app.config.get('SQLALCHEMY_DATABASE_URI'):
-        # Create instance directory if it doesn't exist
-        instance_path = os.path.join(os.path.dirname(__file__), 'instance')
-        os.makedirs(instance_path, exist_ok=True)
-        
-        # Set SQLite database path
-        database_path = os.path.join(instance_path, 'medai.db')
-        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+        app.config['SQLALCHEMY_DATABASE_URI'] = resolve_database_uri(Config.DATABASE_URL)
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
     
     # Essential configuration
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(database_uri))
     
     # Initialize the database with the app
     db.init_app(app)
     
     # Create all tables
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', apply_sqlite_pragmas)
+        # One inspector for the whole schema check; tables create_all() makes are
+        # complete, so only the ones that existed before are compared with the models
+        inspector = inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
         db.create_all()
-        print(f"✅ Database initialized successfully at: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        add_missing_columns(inspector, existing_tables)
+        add_missing_indexes(inspector, existing_tables)
+        if DailyRollup.__tablename__ not in existing_tables and rebuild_daily_rollups():
+            # Predictions stored before the rollups existed
+            print("✅ Built daily rollups from the existing predictions")
+        print(f"✅ Database initialized successfully at: {make_url(database_uri).render_as_string(hide_password=True)}")
 
 
-def get_dengue_predictions(user_id=None, limit=10):
-    """Get dengue predictions"""
+def add_missing_columns(inspector, table_names):
+    """Add model columns missing from tables created by an older schema
+    
+    create_all() skips tables that already exist, so columns added to a
+    model later are added here (as nullable columns) for the inserts to work.
+    Only the tables in table_names are checked, and a transaction is only
+    opened when a column is missing.
+    """
+    statements = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in table_names:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                statements.append((f'{table.name}.{column.name}',
+                                   f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    
+    if not statements:
+        return
+    with db.engine.begin() as connection:
+        for name, statement in statements:
+            connection.execute(text(statement))
+            print(f"✅ Added missing column {name}")
+
+
+def add_missing_indexes(inspector, table_names):
+    """Create model indexes missing from the tables in table_names (created by an older schema)"""
+    for table in db.metadata.sorted_tables:
+        if table.name not in table_names or not table.indexes:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                print(f"✅ Added missing index {index.name}")
+
+
+def scalar_columns(model):
+    """Loader option reading only a model's scalar columns
+    
+    The JSON columns (input_data, recommendations, ...) are deferred, so
+    listings neither load nor decode them; they load on first access.
+    """
+    return load_only(*[getattr(model, column.key) for column in model.__table__.columns
+                       if not isinstance(column.type, JSON)])
+
+
+def json_columns_loaded(record):
+    """Whether a record's JSON columns were loaded, i.e. not deferred by scalar_columns
+
+    to_dict() includes the JSON details by default only when they are, so
+    serialising a listing does not load them row by row.
+    """
+    unloaded = inspect(record).unloaded
+    return not any(column.key in unloaded for column in record.__table__.columns
+                   if isinstance(column.type, JSON) and column.key != 'input_data')
+
+
+def get_dengue_predictions(user_id=None, limit=10, details=False):
+    """Get dengue predictions (JSON columns deferred unless details)"""
     query = DenguePrediction.query
+    if not details:
+        query = query.options(scalar_columns(DenguePrediction))
     if user_id:
         query = query.filter_by(user_id=user_id)
     return query.order_by(DenguePrediction.created_at.desc()).limit(limit).all()
 
 
-def get_kidney_predictions(user_id=None, limit=10):
-    """Get kidney disease predictions"""
+def get_kidney_predictions(user_id=None, limit=10, details=False):
+    """Get kidney disease predictions (JSON columns deferred unless details)"""
     query = KidneyDiseasePrediction.query
+    if not details:
+        query = query.options(scalar_columns(KidneyDiseasePrediction))
     if user_id:
         query = query.filter_by(user_id=user_id)
     return query.order_by(KidneyDiseasePrediction.created_at.desc()).limit(limit).all()
 
 
-def get_mental_health_assessments(user_id=None, limit=10):
-    """Get mental health assessments"""
+def get_mental_health_assessments(user_id=None, limit=10, details=False):
+    """Get mental health assessments (JSON columns deferred unless details)"""
     query = MentalHealthAssessment.query
+    if not details:
+        query = query.options(scalar_columns(MentalHealthAssessment))
     if user_id:
         query = query.filter_by(user_id=user_id)
     return query.order_by(MentalHealthAssessment.created_at.desc()).limit(limit).all()
 
 
-def get_mental_health_therapy_plans(user_id=None, limit=10):
-    """Get mental health therapy plans"""
+def get_mental_health_therapy_plans(user_id=None, limit=10, details=False):
+    """Get mental health therapy plans (JSON columns deferred unless details)"""
     query = MentalHealthTherapyPlan.query
+    if not details:
+        query = query.options(scalar_columns(MentalHealthTherapyPlan))
     if user_id:
         query = query.filter_by(user_id=user_id)
     return query.order_by(MentalHealthTherapyPlan.created_at.desc()).limit(limit).all()
 
 
-def get_risk_assessments(disease_type=None, user_id=None, limit=10):
-    """Get risk assessments"""
+def get_risk_assessments(disease_type=None, user_id=None, limit=10, details=False):
+    """Get risk assessments (JSON columns deferred unless details)"""
     query = RiskAssessment.query
+    if not details:
+        query = query.options(scalar_columns(RiskAssessment))
     if disease_type:
         query = query.filter_by(disease_type=disease_type)
     if user_id:
@@ -382,7 +616,7 @@ def add_dengue_prediction(user_id, age, temperature, prediction, probability,
         input_data=input_data
     )
     db.session.add(record)
-    db.session.commit()
+    commit_prediction(record)
     return record
 
 
@@ -405,7 +639,7 @@ def add_kidney_prediction(user_id, age, creatinine, prediction, probability,
         input_data=input_data
     )
     db.session.add(record)
-    db.session.commit()
+    commit_prediction(record)
     return record
 
 
@@ -425,7 +659,7 @@ def add_mental_health_assessment(user_id, assessment_score, predicted_class,
         input_data=input_data
     )
     db.session.add(record)
-    db.session.commit()
+    commit_prediction(record)
     return record
 
 
@@ -495,6 +729,425 @@ def add_batch_prediction(user_id, disease_type, total_records, processed_records
     return record
 
 
+def encode_json(value):
+    """Encode a JSON column value (with orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
+def fast_datetime_encoder(processor):
+    """Encoder formatting naive datetimes with isoformat() when that is exactly
+    what the dialect's DateTime processor produces (SQLite's default storage
+    format), and with the processor otherwise"""
+    probe = datetime(2000, 1, 2, 3, 4, 5, 6)
+    if processor is None or processor(probe) != probe.isoformat(' ', 'microseconds'):
+        return processor
+    
+    def encode(value):
+        if type(value) is datetime and value.tzinfo is None:
+            return value.isoformat(' ', 'microseconds')
+        return processor(value)
+    return encode
+
+
+def column_default(column):
+    """Python-side default of a column, evaluated once (None when it has none)"""
+    default = column.default
+    if default is None:
+        return None
+    if default.is_scalar:
+        return default.arg
+    if default.is_callable:
+        return default.arg(None)
+    return None
+
+
+def bulk_insert_plan(table, dialect):
+    """Columns, INSERT statement and value encoders for bulk inserts into a table
+    
+    JSON values are encoded here (orjson when available) and other values
+    with the dialect's own bind processors, so the rows can go straight to
+    the DB-API executemany. The SQL is None for dialects with a named
+    paramstyle, which are inserted through SQLAlchemy Core instead. nulls
+    holds what an explicit None is stored as: JSON 'null' for JSON columns,
+    as the ORM stores it, and SQL NULL otherwise.
+    """
+    key = (table.name, dialect.name)
+    plan = _bulk_insert_plans.get(key)
+    if plan is None:
+        columns = [column for column in table.columns if not column.primary_key]
+        
+        sql = None
+        placeholder = POSITIONAL_PLACEHOLDERS.get(dialect.paramstyle)
+        if placeholder:
+            quote = dialect.identifier_preparer.quote
+            sql = (f"INSERT INTO {quote(table.name)} ({', '.join(quote(column.name) for column in columns)}) "
+                   f"VALUES ({', '.join([placeholder] * len(columns))})")
+        
+        encoders = []
+        memoize = []
+        nulls = []
+        for column in columns:
+            processor = column.type.dialect_impl(dialect).bind_processor(dialect)
+            json_null = isinstance(column.type, JSON) and not column.type.none_as_null
+            nulls.append(encode_json(None) if json_null else None)
+            if isinstance(column.type, JSON):
+                encoders.append(encode_json)
+            elif isinstance(column.type, DateTime):
+                encoders.append(fast_datetime_encoder(processor))
+            else:
+                encoders.append(processor)
+            # Rows often share these objects (static recommendations, one timestamp)
+            memoize.append(isinstance(column.type, (JSON, DateTime)))
+        
+        plan = (columns, sql, encoders, memoize, nulls)
+        _bulk_insert_plans[key] = plan
+    return plan
+
+
+def insert_rows(connection, table, rows):
+    """Insert column dicts into a table with a single executemany
+    
+    Missing columns take their default, evaluated once for the whole call
+    (so all rows without created_at share one timestamp). As with the ORM,
+    a JSON column set to None holds JSON null and one left out SQL NULL.
+    """
+    columns, sql, encoders, memoize, nulls = bulk_insert_plan(table, connection.dialect)
+    defaults = [column_default(column) for column in columns]
+    if sql is None:
+        # Core stores None as JSON null, so columns left out without a
+        # default are left out of the INSERT; one executemany per run of
+        # rows with the same keys, keeping the insert order
+        params = [
+            {column.name: row.get(column.name, default) for column, default in zip(columns, defaults)
+             if column.name in row or default is not None}
+            for row in rows
+        ]
+        for _, batch in groupby(params, key=tuple):
+            connection.execute(table.insert(), list(batch))
+        return
+    
+    # Encoded values by id() per memoized column; rows keep the objects alive
+    fields = [
+        (column.name, default, encode, {} if shared else None, none)
+        for column, default, encode, shared, none in zip(columns, defaults, encoders, memoize, nulls)
+    ]
+    params = []
+    for row in rows:
+        values = []
+        for name, default, encode, encoded, none in fields:
+            value = row.get(name, default)
+            if value is None:
+                if none is not None and name in row:
+                    value = none
+            elif encode is not None:
+                if encoded is not None:
+                    cached = encoded.get(id(value))
+                    if cached is None:
+                        cached = encoded[id(value)] = encode(value)
+                    value = cached
+                else:
+                    value = encode(value)
+            values.append(value)
+        params.append(tuple(values))
+    
+    connection.exec_driver_sql(sql, params)
+
+
+def add_records_bulk(rows_by_table):
+    """Insert rows into several tables in one transaction
+    
+    rows_by_table maps table names to lists of column dicts; each list is
+    inserted with a single executemany, without building ORM objects. The
+    daily rollups are updated in the same transaction, also counting the
+    rows under ROLLUP_ONLY_PREFIX keys, which are not inserted.
+    """
+    try:
+        connection = db.session.connection()
+        rollup_rows = {}
+        for table_name, rows in rows_by_table.items():
+            if table_name.startswith(ROLLUP_ONLY_PREFIX):
+                # Stored already by the single add_* helpers, only counted here
+                rollup_rows.setdefault(table_name[len(ROLLUP_ONLY_PREFIX):], []).extend(rows)
+            elif rows:
+                insert_rows(connection, db.metadata.tables[table_name], rows)
+                rollup_rows.setdefault(table_name, []).extend(rows)
+        update_daily_rollups(connection, rollup_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def insert_bulk(model, rows):
+    """Insert column dicts into a model's table in one transaction; returns the row count"""
+    add_records_bulk({model.__tablename__: rows})
+    return len(rows)
+
+
+def select_bulk(model, user_id=None, since=None, until=None, limit=None):
+    """Read a model's rows oldest first as lightweight tuples
+    
+    Rows are SQLAlchemy Row tuples (columns by position or attribute name)
+    rather than ORM objects. since/until bound created_at (until excluded).
+    """
+    table = model.__table__
+    query = table.select()
+    if user_id:
+        query = query.where(table.c.user_id == user_id)
+    if since is not None:
+        query = query.where(table.c.created_at >= since)
+    if until is not None:
+        query = query.where(table.c.created_at < until)
+    query = query.order_by(table.c.id)
+    if limit:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def add_dengue_predictions_bulk(rows):
+    """Add dengue predictions (dicts of add_dengue_prediction's arguments) in one transaction"""
+    return insert_bulk(DenguePrediction, rows)
+
+
+def get_dengue_predictions_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get dengue predictions as tuples"""
+    return select_bulk(DenguePrediction, user_id, since, until, limit)
+
+
+def add_kidney_predictions_bulk(rows):
+    """Add kidney disease predictions (dicts of add_kidney_prediction's arguments) in one transaction"""
+    return insert_bulk(KidneyDiseasePrediction, rows)
+
+
+def get_kidney_predictions_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get kidney disease predictions as tuples"""
+    return select_bulk(KidneyDiseasePrediction, user_id, since, until, limit)
+
+
+def add_mental_health_assessments_bulk(rows):
+    """Add mental health assessments (dicts of add_mental_health_assessment's arguments) in one transaction"""
+    return insert_bulk(MentalHealthAssessment, rows)
+
+
+def get_mental_health_assessments_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get mental health assessments as tuples"""
+    return select_bulk(MentalHealthAssessment, user_id, since, until, limit)
+
+
+def add_mental_health_therapy_plans_bulk(rows):
+    """Add mental health therapy plans (dicts of add_mental_health_therapy_plan's arguments) in one transaction"""
+    return insert_bulk(MentalHealthTherapyPlan, rows)
+
+
+def get_mental_health_therapy_plans_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get mental health therapy plans as tuples"""
+    return select_bulk(MentalHealthTherapyPlan, user_id, since, until, limit)
+
+
+def add_risk_assessments_bulk(rows):
+    """Add risk assessments (dicts of add_risk_assessment's arguments) in one transaction"""
+    return insert_bulk(RiskAssessment, rows)
+
+
+def get_risk_assessments_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get risk assessments as tuples"""
+    return select_bulk(RiskAssessment, user_id, since, until, limit)
+
+
+def add_batch_predictions_bulk(rows):
+    """Add batch predictions (dicts of add_batch_prediction's arguments) in one transaction"""
+    return insert_bulk(BatchPrediction, rows)
+
+
+def get_batch_predictions_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get batch predictions as tuples"""
+    return select_bulk(BatchPrediction, user_id, since, until, limit)
+
+
+def add_prediction_history_bulk(rows):
+    """Add general prediction history records in one transaction"""
+    return insert_bulk(PredictionHistory, rows)
+
+
+def get_prediction_history_bulk(user_id=None, since=None, until=None, limit=None):
+    """Get general prediction history records as tuples"""
+    return select_bulk(PredictionHistory, user_id, since, until, limit)
+
+
+# Input field holding the district of a prediction, per disease
+ROLLUP_DISTRICT_FIELDS = {
+    'dengue': 'District_encoded'
+}
+
+# Rows read per round trip when rebuilding the rollups
+ROLLUP_REBUILD_CHUNK = 5000
+
+# add_records_bulk keys (prefix + table name) of rows stored already that
+# only need counting into the rollups
+ROLLUP_ONLY_PREFIX = 'rollup:'
+
+# Write-behind queue for the rollup updates of the single add_* helpers (see set_rollup_queue)
+_rollup_queue = None
+
+
+def rollup_key(disease_type, row, district_field=None):
+    """(disease, day, risk bucket, district) of a prediction row"""
+    label = HISTORY_SOURCES[disease_type][3]
+    created_at = row.get('created_at') or datetime.utcnow()
+    district = ''
+    if district_field and isinstance(row.get('input_data'), dict):
+        value = row['input_data'].get(district_field)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        district = '' if value is None else str(value)
+    return (disease_type, created_at.date(), row.get(label) or 'Unknown', district)
+
+
+def aggregate_rollups(rows_by_table, totals=None):
+    """Sum prediction rows into {rollup key: [count, probability sum]}"""
+    totals = {} if totals is None else totals
+    for disease_type, (model, score, _, _) in HISTORY_SOURCES.items():
+        rows = rows_by_table.get(model.__tablename__)
+        if not rows:
+            continue
+        district_field = ROLLUP_DISTRICT_FIELDS.get(disease_type)
+        for row in rows:
+            total = totals.setdefault(rollup_key(disease_type, row, district_field), [0, 0.0])
+            total[0] += 1
+            total[1] += row.get(score) or 0.0
+    return totals
+
+
+def upsert_rollups(connection, totals):
+    """Add counts to the daily rollups, creating missing rows"""
+    if not totals:
+        return
+    table = DailyRollup.__table__
+    now = datetime.utcnow()
+    rows = [{
+        'disease_type': disease_type,
+        'day': day,
+        'risk_bucket': risk_bucket,
+        'district': district,
+        'prediction_count': count,
+        'probability_sum': probability_sum,
+        'updated_at': now
+    } for (disease_type, day, risk_bucket, district), (count, probability_sum) in totals.items()]
+    
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['disease_type', 'day', 'risk_bucket', 'district'],
+            set_={
+                'prediction_count': table.c.prediction_count + statement.excluded.prediction_count,
+                'probability_sum': table.c.probability_sum + statement.excluded.probability_sum,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+        connection.execute(statement, rows)
+        return
+    
+    # No upsert statement: update, then insert the keys that did not exist
+    for row in rows:
+        result = connection.execute(update(table).where(
+            table.c.disease_type == row['disease_type'],
+            table.c.day == row['day'],
+            table.c.risk_bucket == row['risk_bucket'],
+            table.c.district == row['district']
+        ).values(
+            prediction_count=table.c.prediction_count + row['prediction_count'],
+            probability_sum=table.c.probability_sum + row['probability_sum'],
+            updated_at=now
+        ))
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+
+def update_daily_rollups(connection, rows_by_table):
+    """Count newly inserted prediction rows into the daily rollups"""
+    upsert_rollups(connection, aggregate_rollups(rows_by_table))
+
+
+def set_rollup_queue(queue):
+    """Hand the rollup updates of the single add_* helpers to a write-behind queue
+
+    queue is a HistoryWriter whose write_fn calls add_records_bulk; None
+    (or a disabled queue) updates the rollups in the request's transaction.
+    """
+    global _rollup_queue
+    _rollup_queue = queue
+
+
+def commit_prediction(record):
+    """Commit an ORM prediction record added to the session and count it into the daily rollups
+
+    With an enabled rollup queue the record is committed alone and its
+    rollup update is queued, to be written with the queue's next flush;
+    otherwise the rollups are updated in the same transaction.
+    """
+    db.session.flush()
+    row = {column.key: getattr(record, column.key) for column in record.__table__.columns}
+    queue = _rollup_queue
+    if queue is not None and queue.enabled:
+        db.session.commit()
+        queue.enqueue(ROLLUP_ONLY_PREFIX + record.__tablename__, row)
+        return
+    update_daily_rollups(db.session.connection(), {record.__tablename__: [row]})
+    db.session.commit()
+
+
+def rebuild_daily_rollups(since=None):
+    """Recompute the daily rollups from the prediction tables
+    
+    since (a date) limits the rebuild to that day onwards. Runs in one
+    transaction that deletes first, so concurrent writers wait for it
+    instead of having their counts lost. Returns the number of rollup rows.
+    """
+    rollups = DailyRollup.__table__
+    try:
+        connection = db.session.connection()
+        delete = rollups.delete()
+        if since is not None:
+            delete = delete.where(rollups.c.day >= since)
+        connection.execute(delete)
+        
+        totals = {}
+        for disease_type, (model, score, _, label) in HISTORY_SOURCES.items():
+            table = model.__table__
+            district_field = ROLLUP_DISTRICT_FIELDS.get(disease_type)
+            columns = [table.c.created_at, table.c[score], table.c[label]]
+            if district_field:
+                columns.append(table.c.input_data)
+            query = select(*columns).where(table.c.created_at.isnot(None))
+            if since is not None:
+                query = query.where(table.c.created_at >= datetime.combine(since, datetime.min.time()))
+            result = connection.execute(query, execution_options={'yield_per': ROLLUP_REBUILD_CHUNK})
+            for rows in result.mappings().partitions():
+                aggregate_rollups({table.name: rows}, totals)
+        
+        upsert_rollups(connection, totals)
+        db.session.commit()
+        return len(totals)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def get_daily_rollups(disease_type, since, until=None, risk_bucket=None, district=None):
+    """Get rollup rows of a disease for days since..until (inclusive), oldest first"""
+    query = DailyRollup.query.filter(DailyRollup.disease_type == disease_type, DailyRollup.day >= since)
+    if until is not None:
+        query = query.filter(DailyRollup.day <= until)
+    if risk_bucket is not None:
+        query = query.filter(DailyRollup.risk_bucket == risk_bucket)
+    if district is not None:
+        query = query.filter(DailyRollup.district == district)
+    return query.order_by(DailyRollup.day, DailyRollup.risk_bucket, DailyRollup.district).all()
+
+
 def add_model_performance(model_name, accuracy, precision, recall, f1_score, roc_auc=None):
     """Add model performance metrics"""
     record = ModelPerformance(
@@ -533,22 +1186,126 @@ def get_user_by_username(username):
     return User.query.filter_by(username=username).first()
 
 
-def get_user_predictions(user_id, disease_type=None, limit=20):
-    """Get all predictions for a user"""
-    predictions = []
+# Patient history sources: model and its (score, prediction, label) columns
+HISTORY_SOURCES = {
+    'dengue': (DenguePrediction, 'probability', 'prediction', 'risk_level'),
+    'kidney': (KidneyDiseasePrediction, 'probability', 'prediction', 'ckd_stage'),
+    'mental_health': (MentalHealthAssessment, 'assessment_score', 'predicted_class', 'severity_level')
+}
+
+# Scalar input columns listed in the history (NULL for tables without them)
+HISTORY_SUMMARY_COLUMNS = ('age', 'temperature', 'creatinine')
+
+
+def encode_history_cursor(row):
+    """Opaque cursor pointing after a history row"""
+    position = f'{row.created_at.isoformat()}|{row.disease}|{row.id}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """(created_at, disease, id) of a history cursor; ValueError if malformed"""
+    try:
+        created_at, disease, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), disease, int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f'Invalid history cursor: {cursor}') from e
+
+
+def history_branch(disease, user_id, after, limit):
+    """One disease's rows of a history page, newest first
+    
+    Filters and orders on (user_id, created_at, id) so the database walks the
+    (user_id, created_at) index and stops after limit rows. Without a user_id
+    every user's rows are included. Only scalar columns are read; the JSON
+    input_data is left for get_patient_record.
+    """
+    model, score, prediction, label = HISTORY_SOURCES[disease]
+    table = model.__table__
+    query = select(
+        literal(disease).label('disease'),
+        table.c.id,
+        table.c.created_at,
+        table.c[score].label('score'),
+        table.c[prediction].label('prediction'),
+        table.c[label].label('label'),
+        *[table.c[name] if name in table.c else null().label(name) for name in HISTORY_SUMMARY_COLUMNS]
+    )
+    if user_id:
+        query = query.where(table.c.user_id == user_id)
+    
+    if after is not None:
+        # Keyset on (created_at, disease, id) descending, the page order
+        created_at, after_disease, after_id = after
+        if disease < after_disease:
+            query = query.where(table.c.created_at <= created_at)
+        elif disease == after_disease:
+            query = query.where(or_(
+                table.c.created_at < created_at,
+                and_(table.c.created_at == created_at, table.c.id < after_id)
+            ))
+        else:
+            query = query.where(table.c.created_at < created_at)
     
-    # Get dengue predictions
-    dengue_preds = get_dengue_predictions(user_id, limit)
-    predictions.extend([{'type': 'dengue', 'data': pred.to_dict()} for pred in dengue_preds])
+    return query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit).subquery()
+
+
+def get_patient_history(user_id, limit=20, cursor=None, disease_type=None):
+    """Get one page of a user's predictions across diseases, newest first
+    
+    A single UNION ALL query over the per-disease tables with keyset
+    pagination: pass the returned next_cursor to get the following page
+    (None on the last page). Each page costs the same however many records
+    the user has. Returns (rows, next_cursor); rows are tuples of
+    (disease, id, created_at, score, prediction, label) followed by
+    HISTORY_SUMMARY_COLUMNS. Without a user_id the page covers all users.
+    Raises ValueError for an unknown disease_type.
+    """
+    after = decode_history_cursor(cursor) if cursor else None
+    diseases = [disease_type] if disease_type else list(HISTORY_SOURCES)
+    for disease in diseases:
+        if disease not in HISTORY_SOURCES:
+            raise ValueError(f'Unknown disease type: {disease}')
+    
+    # One row more than the page tells whether another page follows
+    branches = [select(history_branch(disease, user_id, after, limit + 1)) for disease in diseases]
+    history = union_all(*branches).subquery()
+    query = select(history).order_by(
+        history.c.created_at.desc(), history.c.disease.desc(), history.c.id.desc()
+    ).limit(limit + 1)
+    
+    rows = db.session.execute(query).all()
+    next_cursor = encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def get_patient_record(disease_type, record_id, user_id):
+    """Get one history record with all its columns, or None if the user has no such record"""
+    if disease_type not in HISTORY_SOURCES:
+        raise ValueError(f'Unknown disease type: {disease_type}')
+    model = HISTORY_SOURCES[disease_type][0]
+    return model.query.filter_by(id=record_id, user_id=user_id).first()
+
+
+def get_user_predictions(user_id, disease_type=None, limit=20):
+    """Get all predictions for a user, or for all users when user_id is None
     
-    # Get kidney predictions
-    kidney_preds = get_kidney_predictions(user_id, limit)
-    predictions.extend([{'type': 'kidney', 'data': pred.to_dict()} for pred in kidney_preds])
+    Returns [{'type': disease, 'data': record.to_dict()}], newest first and
+    at most limit long, optionally for one disease_type (ValueError if it is
+    unknown). The page is picked by get_patient_history, then its records are
+    loaded with one query per disease, without their JSON columns (see
+    get_patient_record for a full record).
+    """
+    rows, _ = get_patient_history(user_id, limit, disease_type=disease_type)
     
-    # Get mental health assessments
-    mh_assessments = get_mental_health_assessments(user_id, limit)
-    predictions.extend([{'type': 'mental_health', 'data': pred.to_dict()} for pred in mh_assessments])
+    ids_by_disease = {}
+    for row in rows:
+        ids_by_disease.setdefault(row.disease, []).append(row.id)
+    records = {}
+    for disease, ids in ids_by_disease.items():
+        model = HISTORY_SOURCES[disease][0]
+        for record in model.query.options(scalar_columns(model)).filter(model.id.in_(ids)):
+            records[(disease, record.id)] = record
     
-    # Sort by creation date and limit
-    predictions.sort(key=lambda x: x['data']['created_at'], reverse=True)
-    return predictions[:limit]
\ No newline at end of file
+    return [{'type': row.disease, 'data': records[(row.disease, row.id)].to_dict()}
+            for row in rows if (row.disease, row.id) in records]
@@ -0,0 +1,112 @@
+from multiprocessing import get_context
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from datetime import datetime
+import numpy as np
+import tempfile
+import shutil
+import time
+import os
+import logging
+
+from database import DenguePrediction, apply_sqlite_pragmas
+
+logger = logging.getLogger(__name__)
+
+# One prediction row as the API writes it
+BENCHMARK_ROW = {
+    'user_id': 'benchmark',
+    'age': 35,
+    'temperature': 39.5,
+    'prediction': 1,
+    'probability': 0.87,
+    'confidence': 0.87,
+    'risk_level': 'High Risk',
+    'recommendations': ['Consult a healthcare provider immediately', 'Rest and maintain hydration'],
+    'input_data': {'Age': 35, 'Temperature': 39.5, 'Platelet_Count': 120000}
+}
+
+
+def create_benchmark_engine(database_path, tuned):
+    """Engine on a SQLite file with either SQLAlchemy's defaults or the init_db profile"""
+    engine = create_engine(f'sqlite:///{database_path}')
+    if tuned:
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
+    return engine
+
+
+def write_worker(database_path, tuned, start_at, seconds, results):
+    """Insert one row per transaction until the deadline, like the add_* helpers"""
+    engine = create_benchmark_engine(database_path, tuned)
+    table = DenguePrediction.__table__
+    row = dict(BENCHMARK_ROW, created_at=datetime.utcnow())
+    latencies = []
+    errors = 0
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = start_at + seconds
+    while time.time() < deadline:
+        started_at = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), row)
+            latencies.append(time.perf_counter() - started_at)
+        except OperationalError:
+            # "database is locked" once the busy timeout runs out
+            errors += 1
+
+    engine.dispose()
+    results.put((latencies, errors))
+
+
+def run_write_benchmark(workers=4, seconds=5.0, tuned=True, directory=None):
+    """Measure concurrent single-row write throughput of N processes on one SQLite file
+
+    Returns commits per second, failed transactions and commit latency
+    percentiles (ms).
+    """
+    directory = tempfile.mkdtemp(prefix='medai-db-benchmark-', dir=directory)
+    database_path = os.path.join(directory, 'benchmark.db')
+    try:
+        engine = create_benchmark_engine(database_path, tuned)
+        DenguePrediction.__table__.create(engine)
+        engine.dispose()
+
+        context = get_context()
+        results = context.Queue()
+        start_at = time.time() + 1.0
+        processes = [
+            context.Process(target=write_worker, args=(database_path, tuned, start_at, seconds, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    latencies = np.concatenate([np.asarray(latencies) for latencies, _ in outcomes]) * 1000
+    commits = len(latencies)
+    return {
+        'profile': 'tuned' if tuned else 'default',
+        'workers': workers,
+        'seconds': seconds,
+        'commits': commits,
+        'commits_per_second': round(commits / seconds, 1),
+        'errors': sum(errors for _, errors in outcomes),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if commits else None,
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2) if commits else None,
+        'max_ms': round(float(latencies.max()), 2) if commits else None
+    }
+
+
+def compare_write_profiles(workers=4, seconds=5.0, directory=None):
+    """Run the write benchmark with SQLAlchemy's SQLite defaults, then with the init_db profile"""
+    results = []
+    for tuned in (False, True):
+        logger.info(f"Benchmarking {'tuned' if tuned else 'default'} SQLite profile "
+                    f"({workers} writers, {seconds:g}s)")
+        results.append(run_write_benchmark(workers, seconds, tuned, directory))
+    return results
@@ -0,0 +1,140 @@
+from collections import deque
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Write-behind queue persisting prediction records in bulk
+
+    Request threads only append (table, row) to a deque. A writer thread
+    flushes the queued rows in one transaction through write_fn once
+    flush_rows rows are waiting or every flush_interval_ms, whichever comes
+    first. close() flushes what is left, so it should run on shutdown.
+
+    At most max_pending rows are held; beyond that new rows are dropped
+    (and counted) rather than letting a stalled database grow the queue
+    without bound.
+    """
+
+    def __init__(self, write_fn, flush_rows=500, flush_interval_ms=200.0, max_pending=100000,
+                 enabled=False):
+        self.write_fn = write_fn
+        self.flush_rows = max(1, int(flush_rows))
+        self.interval = max(0.001, float(flush_interval_ms) / 1000.0)
+        self.max_pending = max(self.flush_rows, int(max_pending))
+        self.enabled = bool(enabled)
+
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
+        self._closed = False
+
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def configure(self, enabled=None, flush_rows=None, flush_interval_ms=None):
+        """Switch persistence on or off and change the flush triggers"""
+        if flush_rows is not None:
+            self.flush_rows = max(1, int(flush_rows))
+        if flush_interval_ms is not None:
+            self.interval = max(0.001, float(flush_interval_ms) / 1000.0)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        logger.info(f"Prediction history {'enabled' if self.enabled else 'disabled'} "
+                    f"(flush every {self.flush_rows} rows or {self.interval * 1000:.0f} ms)")
+
+    def enqueue(self, table, row):
+        """Queue one row for table; returns without touching the database"""
+        if not self.enabled:
+            return
+        if self._writer_pid != os.getpid():
+            self._ensure_writer()
+
+        pending = len(self._pending)
+        if pending >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((table, row))
+        if pending + 1 == self.flush_rows:
+            self._wakeup.set()
+
+    def _ensure_writer(self):
+        """Start the writer thread in this process (threads do not survive a fork)"""
+        with self._lock:
+            pid = os.getpid()
+            if self._writer_pid == pid:
+                return
+            if self._writer_pid is not None:
+                # Forked worker: rows queued in the parent are the parent's to write
+                self._pending = deque()
+            self._closed = False
+            self._writer_pid = pid
+            self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        """Writer loop: wait for flush_rows rows or the interval, then flush"""
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all queued rows in one transaction, grouped by table"""
+        with self._flush_lock:
+            popleft = self._pending.popleft
+            count = len(self._pending)
+            if not count:
+                return 0
+
+            rows_by_table = {}
+            for _ in range(count):
+                table, row = popleft()
+                rows_by_table.setdefault(table, []).append(row)
+
+            started_at = time.perf_counter()
+            try:
+                self.write_fn(rows_by_table)
+            except Exception as e:
+                self.failed += count
+                logger.error(f"Failed to write {count} prediction history rows: {str(e)}")
+                return 0
+
+            self.written += count
+            self.flushes += 1
+            self.last_flush_ms = (time.perf_counter() - started_at) * 1000
+            return count
+
+    def close(self):
+        """Stop the writer thread and flush the remaining rows"""
+        self._closed = True
+        self._wakeup.set()
+        writer = self._writer
+        if writer is not None and self._writer_pid == os.getpid() and writer is not threading.current_thread():
+            writer.join(timeout=5.0)
+        count = self.flush()
+        if count:
+            logger.info(f"Flushed {count} pending prediction history rows on shutdown")
+
+    def stats(self):
+        """Get write-behind statistics"""
+        return {
+            'enabled': self.enabled,
+            'pending': len(self._pending),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'last_flush_ms': round(self.last_flush_ms, 2)
+        }
@@ -0,0 +1,272 @@
+import numpy as np
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Layers that are the identity at inference time
+INFERENCE_NOOP_LAYERS = {'InputLayer', 'Dropout', 'AlphaDropout', 'GaussianDropout', 'GaussianNoise'}
+
+
+def _sigmoid(x):
+    # tanh form is numerically stable for large negative logits
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _softmax(x):
+    shifted = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return shifted / np.sum(shifted, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': _sigmoid,
+    'softmax': _softmax,
+    'tanh': np.tanh
+}
+
+
+class NumpyDenseModel:
+    """Dense feed-forward network evaluated with plain NumPy matmuls"""
+
+    def __init__(self, layers, name='model'):
+        # Each layer is a (kernel, bias, activation) tuple
+        self.layers = layers
+        self.name = name
+        # True once a StandardScaler has been folded into the first layer
+        self.expects_raw_input = False
+
+    @property
+    def input_features(self):
+        """Number of input features expected by the first layer"""
+        return self.layers[0][0].shape[0]
+
+    def predict(self, X, verbose=0):
+        """Run the forward pass (same call signature as keras.Model.predict)"""
+        output = np.asarray(X, dtype=np.float64)
+        if output.ndim == 1:
+            output = output.reshape(1, -1)
+
+        for kernel, bias, activation in self.layers:
+            output = ACTIVATIONS[activation](output @ kernel + bias)
+
+        return output
+
+    def fold_input_scaler(self, mean, scale):
+        """Return a copy whose first layer also applies (x - mean) / scale
+
+        (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W)
+        """
+        kernel, bias, activation = self.layers[0]
+        inverse_scale = 1.0 / np.asarray(scale, dtype=np.float64)
+
+        folded_kernel = kernel * inverse_scale[:, None]
+        folded_bias = bias - (np.asarray(mean, dtype=np.float64) * inverse_scale) @ kernel
+
+        fused = NumpyDenseModel([(folded_kernel, folded_bias, activation)] + self.layers[1:], name=self.name)
+        fused.expects_raw_input = True
+        return fused
+
+    def summary(self):
+        """Describe the folded layer stack"""
+        return [
+            {'units': int(kernel.shape[1]), 'activation': activation}
+            for kernel, _, activation in self.layers
+        ]
+
+
+def scaler_statistics(scaler):
+    """Get (mean, scale) from a fitted StandardScaler, honouring with_mean/with_std"""
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def _decode_attr(value):
+    """Decode an HDF5 string attribute"""
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _activation_name(layer_config):
+    """Get the activation name from a Dense/Activation layer config"""
+    activation = layer_config.get('activation', 'linear')
+    if isinstance(activation, dict):
+        activation = activation.get('config', {}).get('name', activation.get('class_name', 'linear'))
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for NumPy engine: {activation}")
+    return activation
+
+
+def _read_layer_weights(weights_group, layer_name):
+    """Read a layer's weights from the HDF5 file, keyed by short weight name"""
+    if layer_name not in weights_group:
+        return {}
+
+    layer_group = weights_group[layer_name]
+    weights = {}
+    for weight_name in layer_group.attrs.get('weight_names', []):
+        weight_name = _decode_attr(weight_name)
+        short_name = weight_name.split('/')[-1].split(':')[0]
+        weights[short_name] = np.asarray(layer_group[weight_name], dtype=np.float64)
+    return weights
+
+
+def _inbound_count(layer):
+    """Count the input tensors of a functional-model layer"""
+    inbound_nodes = layer.get('inbound_nodes', [])
+    if not inbound_nodes:
+        return 0
+
+    node = inbound_nodes[0]
+    if isinstance(node, dict):  # Keras 3 format: {'args': [...], 'kwargs': {...}}
+        args = node.get('args', [])
+        return len(args[0]) if args and isinstance(args[0], list) else len(args)
+    return len(node)
+
+
+def fold_layers(layer_specs):
+    """Fold BatchNormalization into the Dense layers and drop inference no-ops
+
+    layer_specs is a list of (class_name, config, weights) in forward order.
+    BatchNormalization is an affine transform at inference time, so it is
+    carried forward and merged into the kernel and bias of the next Dense layer.
+    """
+    folded = []
+    pending_scale = None
+    pending_shift = None
+
+    for class_name, config, weights in layer_specs:
+        if class_name in INFERENCE_NOOP_LAYERS:
+            continue
+
+        if class_name == 'Dense':
+            kernel = weights['kernel']
+            bias = weights.get('bias', np.zeros(kernel.shape[1]))
+            if pending_scale is not None:
+                bias = pending_shift @ kernel + bias
+                kernel = pending_scale[:, None] * kernel
+                pending_scale = pending_shift = None
+            folded.append((kernel, bias, _activation_name(config)))
+
+        elif class_name == 'BatchNormalization':
+            axis = config.get('axis', -1)
+            if isinstance(axis, list):
+                axis = axis[0] if len(axis) == 1 else axis
+            if axis not in (-1, 1):
+                raise ValueError(f"Unsupported BatchNormalization axis for NumPy engine: {axis}")
+
+            mean = weights['moving_mean']
+            variance = weights['moving_variance']
+            gamma = weights.get('gamma', np.ones_like(mean))
+            beta = weights.get('beta', np.zeros_like(mean))
+
+            scale = gamma / np.sqrt(variance + config.get('epsilon', 1e-3))
+            shift = beta - mean * scale
+
+            if pending_scale is None:
+                pending_scale, pending_shift = scale, shift
+            else:
+                pending_scale, pending_shift = pending_scale * scale, pending_shift * scale + shift
+
+        elif class_name == 'Activation':
+            if pending_scale is not None or not folded or folded[-1][2] != 'linear':
+                raise ValueError("Activation layer can only follow a linear Dense layer in NumPy engine")
+            kernel, bias, _ = folded[-1]
+            folded[-1] = (kernel, bias, _activation_name(config))
+
+        else:
+            raise ValueError(f"Unsupported layer type for NumPy engine: {class_name}")
+
+    # A trailing BatchNormalization becomes a diagonal linear layer
+    if pending_scale is not None:
+        folded.append((np.diag(pending_scale), pending_shift, 'linear'))
+
+    if not folded:
+        raise ValueError("Model has no Dense layers")
+
+    return folded
+
+
+def load_keras_h5(filepath):
+    """Export the weights of a Keras .h5 model into a NumpyDenseModel
+
+    Reads the HDF5 file directly with h5py, so TensorFlow is not needed.
+    Only linear stacks of Dense/BatchNormalization/Dropout layers are supported;
+    anything else raises ValueError so callers can fall back to Keras.
+    """
+    import h5py
+
+    with h5py.File(filepath, 'r') as f:
+        if 'model_config' not in f.attrs:
+            raise ValueError(f"No model config found in {filepath}")
+
+        model_config = json.loads(_decode_attr(f.attrs['model_config']))
+        weights_group = f['model_weights'] if 'model_weights' in f else f
+
+        layer_configs = model_config.get('config', {})
+        name = 'model'
+        if isinstance(layer_configs, dict):
+            name = layer_configs.get('name', name)
+            layer_configs = layer_configs.get('layers', [])
+
+        layer_specs = []
+        for layer in layer_configs:
+            if _inbound_count(layer) > 1:
+                raise ValueError(f"Layer {layer['config']['name']} has multiple inputs")
+
+            config = layer['config']
+            layer_specs.append((
+                layer['class_name'],
+                config,
+                _read_layer_weights(weights_group, config['name'])
+            ))
+
+    model = NumpyDenseModel(fold_layers(layer_specs), name=name)
+    logger.info(f"NumPy engine loaded {filepath} with {len(model.layers)} folded layers")
+    return model
+
+
+def verify_parity(model_path, n_samples=256, tolerance=1e-5, seed=42):
+    """Compare NumPy engine probabilities against Keras on random scaled inputs"""
+    from tensorflow import keras
+
+    keras_model = keras.models.load_model(model_path)
+    numpy_model = load_keras_h5(model_path)
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, numpy_model.input_features)).astype(np.float32)
+
+    keras_output = keras_model.predict(X, verbose=0)
+    numpy_output = numpy_model.predict(X)
+    max_abs_diff = float(np.max(np.abs(keras_output - numpy_output)))
+
+    return {
+        'model_path': model_path,
+        'samples': n_samples,
+        'max_abs_diff': max_abs_diff,
+        'tolerance': tolerance,
+        'passed': max_abs_diff <= tolerance
+    }
+
+
+def verify_scaler_fold(model, scaler, n_samples=256, tolerance=1e-9, seed=42):
+    """Compare the unfused path (scaler.transform then model) with the fused model"""
+    mean, scale = scaler_statistics(scaler)
+    fused_model = model.fold_input_scaler(mean, scale)
+
+    # Raw inputs spread around the training distribution
+    rng = np.random.default_rng(seed)
+    X = mean + scale * rng.normal(size=(n_samples, len(mean)))
+
+    unfused_output = model.predict(scaler.transform(X))
+    fused_output = fused_model.predict(X)
+    max_abs_diff = float(np.max(np.abs(unfused_output - fused_output)))
+
+    return {
+        'samples': n_samples,
+        'max_abs_diff': max_abs_diff,
+        'tolerance': tolerance,
+        'passed': max_abs_diff <= tolerance
+    }
@@ -0,0 +1,112 @@
+import numpy as np
+import logging
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_validators = {}
+
+
+def format_number(value):
+    """Format a float for error messages, without a trailing .0 on whole numbers"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+class FeatureValidator:
+    """Feature validation rules compiled into per-feature NumPy arrays
+
+    Built from Config.FEATURE_VALIDATION. Every feature must be finite;
+    features with a rule must also lie within [min, max] and be whole numbers
+    when their type is 'int'. validate() checks a whole matrix at once and
+    only loops over the rows that failed, to describe what is wrong.
+    """
+
+    def __init__(self, features, rules):
+        self.features = list(features)
+        self.rules = rules
+        self.lower = np.full(len(self.features), -np.inf)
+        self.upper = np.full(len(self.features), np.inf)
+        self.integer = np.zeros(len(self.features), dtype=bool)
+
+        for index, feature in enumerate(self.features):
+            rule = rules.get(feature)
+            if not rule:
+                continue
+            self.lower[index] = rule.get('min', -np.inf)
+            self.upper[index] = rule.get('max', np.inf)
+            self.integer[index] = rule.get('type') == 'int'
+        self.ruled_columns = np.flatnonzero(np.isfinite(self.lower) | np.isfinite(self.upper) | self.integer)
+
+        unknown = set(rules) - set(self.features)
+        if unknown:
+            logger.warning(f"Validation rules for unknown features ignored: {', '.join(sorted(unknown))}")
+
+    def validate(self, matrix, present=None):
+        """Validate a raw feature matrix, returning {row index: error message}
+
+        present is an optional boolean mask of the cells given in the input;
+        cells filled with default values are not checked.
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        candidates = np.flatnonzero(self._screen_rows(matrix, present))
+        if not len(candidates):
+            return {}
+
+        rows = matrix[candidates]
+        with np.errstate(invalid='ignore'):
+            not_finite = ~np.isfinite(rows)
+            out_of_range = (rows < self.lower) | (rows > self.upper)
+            not_integer = self.integer & (rows != np.floor(rows)) & ~not_finite
+
+        invalid = not_finite | out_of_range | not_integer
+        if present is not None:
+            invalid &= present[candidates]
+
+        row_errors = {}
+        for position in np.flatnonzero(invalid.any(axis=1)).tolist():
+            messages = []
+            for column in np.flatnonzero(invalid[position]).tolist():
+                feature = self.features[column]
+                value = format_number(rows[position, column])
+                if not_finite[position, column]:
+                    messages.append(f"Feature '{feature}' must be a finite number, got {value}")
+                elif out_of_range[position, column]:
+                    lower = format_number(self.lower[column])
+                    upper = format_number(self.upper[column])
+                    messages.append(f"Feature '{feature}' must be between {lower} and {upper}, got {value}")
+                else:
+                    messages.append(f"Feature '{feature}' must be an integer, got {value}")
+            row_errors[int(candidates[position])] = '; '.join(messages)
+
+        return row_errors
+
+    def _screen_rows(self, matrix, present):
+        """Flag rows that may be invalid with whole-column comparisons
+
+        Cheap vectorized passes over the matrix; flagged rows are then
+        checked cell by cell.
+        """
+        with np.errstate(invalid='ignore'):
+            finite = np.isfinite(matrix)
+            flagged = np.zeros(len(matrix), dtype=bool) if finite.all() else ~finite.all(axis=1)
+            for column in self.ruled_columns.tolist():
+                values = matrix[:, column]
+                bad = (values < self.lower[column]) | (values > self.upper[column])
+                if self.integer[column]:
+                    bad |= values != np.floor(values)
+                if present is not None:
+                    bad &= present[:, column]
+                flagged |= bad
+        return flagged
+
+
+def get_validator(disease_type):
+    """Get the compiled validator for a disease (built once)"""
+    validator = _validators.get(disease_type)
+    if validator is None:
+        validator = FeatureValidator(Config.get_features(disease_type),
+                                     Config.FEATURE_VALIDATION.get(disease_type, {}))
+        _validators[disease_type] = validator
+    return validator
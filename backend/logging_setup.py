@@ -0,0 +1,165 @@
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_queue_handler = None
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that gzips rotated files (api.log.1.gz, ...)
+
+    Pre-fork workers share the log file; a process that finds the file was
+    rotated by another one reopens it instead of writing to the old file.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, destination):
+        with open(source, 'rb') as f_in, gzip.open(destination, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def emit(self, record):
+        if self.stream is not None:
+            try:
+                if os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino:
+                    self.stream.close()
+                    self.stream = None
+            except OSError:
+                self.stream = None
+        super().emit(record)
+
+
+class RepeatedWarningFilter(logging.Filter):
+    """Let one of each warning through every interval and count the repeats
+
+    Warnings are the same when they come from the same call site with the
+    same message, so different warnings from one line are all logged. The
+    next copy let through reports how many were suppressed. At most
+    max_keys distinct warnings are tracked.
+    """
+
+    def __init__(self, interval_seconds=60, max_keys=1024):
+        super().__init__()
+        self.interval = interval_seconds
+        self.max_keys = max_keys
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno != logging.WARNING or self.interval <= 0:
+            return True
+
+        message = record.getMessage()
+        key = (record.pathname, record.lineno, message)
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            suppressed = seen[1] if seen is not None else 0
+            self._seen[key] = [now, 0]
+            if len(self._seen) > self.max_keys:
+                self._prune(now)
+
+        if suppressed:
+            record.msg = f"{message} ({suppressed} repeats suppressed in the last {self.interval:g}s)"
+            record.args = None
+        return True
+
+    def _prune(self, now):
+        """Forget warnings whose interval has passed, then the oldest beyond max_keys
+
+        The suppressed counts of forgotten warnings are lost.
+        """
+        recent = [(key, seen) for key, seen in self._seen.items() if now - seen[0] < self.interval]
+        if len(recent) > self.max_keys:
+            recent = sorted(recent, key=lambda item: item[1][0])[-self.max_keys:]
+        self._seen = dict(recent)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler owning the listener that writes its records out
+
+    Closing it (logging.shutdown() does, at exit) drains the queue first.
+    """
+
+    def __init__(self, handlers):
+        super().__init__(queue.SimpleQueue())
+        self.handlers = handlers
+        self.listener = None
+
+    def start_listener(self):
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def before_fork(self):
+        """Wait for the listener to finish writing and flush, so a forked
+        child inherits no half-written or buffered records"""
+        for handler in self.handlers:
+            handler.acquire()
+            handler.flush()
+
+    def after_fork_in_parent(self):
+        for handler in reversed(self.handlers):
+            handler.release()
+
+    def restart_after_fork(self):
+        """Give a forked child its own queue and listener thread
+
+        The handler locks held across the fork are re-created unlocked in the
+        child by the logging module.
+        """
+        self.queue = queue.SimpleQueue()
+        self.start_listener()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def configure_logging(log_file, level='INFO', max_bytes=1024 * 1024, backup_count=5, rate_limit_seconds=60):
+    """Route all logging through a queue so callers never block on the disk
+
+    Records are written to log_file (rotated at max_bytes, keeping
+    backup_count gzipped files) and to stderr by a listener thread. Repeated
+    warnings from one call site are collapsed to one per rate_limit_seconds.
+    Only the first call configures logging; later calls are no-ops.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [CompressedRotatingFileHandler(log_file, max_bytes, backup_count), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = NonBlockingQueueHandler(handlers)
+    _queue_handler.addFilter(RepeatedWarningFilter(rate_limit_seconds))
+    _queue_handler.start_listener()
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before=_queue_handler.before_fork,
+                            after_in_parent=_queue_handler.after_fork_in_parent,
+                            after_in_child=_queue_handler.restart_after_fork)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    return _queue_handler
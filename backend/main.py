@@ -2,20 +2,26 @@
 Main script to run the complete medical prediction system
 """
 
+import time
+
+# Taken before any heavy import so the API can report startup-to-first-prediction
+STARTED_AT = time.perf_counter()
+
 import sys
+import signal
 import argparse
 from config import Config
+from logging_setup import configure_logging
 import logging
 import os
 
 # Configure logging first
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(Config.LOG_FILE),
-        logging.StreamHandler()
-    ]
+configure_logging(
+    Config.LOG_FILE,
+    level=Config.LOG_LEVEL,
+    max_bytes=Config.LOG_MAX_BYTES,
+    backup_count=Config.LOG_BACKUP_COUNT,
+    rate_limit_seconds=Config.LOG_RATE_LIMIT_SECONDS
 )
 logger = logging.getLogger(__name__)
 
@@ -198,39 +204,109 @@ def train_all_models():
         return False
 
 
-def start_api_server():
-    """Start API server"""
+def dispose_database_connections(worker_index):
+    """Drop pooled database connections inherited from the master after a fork"""
+    from database import db
+    from api_endpoints import app
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def start_worker(worker_index):
+    """Prepare a forked worker: fresh database connections and its own model watcher"""
+    from api_endpoints import model_reloader
+    
+    dispose_database_connections(worker_index)
+    model_reloader.start()
+
+
+def flush_prediction_history(worker_index):
+    """Write the prediction history rows still queued in this process"""
+    from api_endpoints import history_writer
+    
+    history_writer.close()
+
+
+def start_api_server(lite=False, workers=None):
+    """Start API server (lite mode serves bundles without TensorFlow or sklearn)
+    
+    With more than one worker, models are loaded once here and the workers are
+    forked from this process, sharing the model weights copy-on-write.
+    """
+    workers = workers or Config.API_WORKERS
     logger.info("=" * 60)
-    logger.info("Starting API Server")
+    logger.info("Starting API Server" + (" (lite mode)" if lite else ""))
     logger.info("=" * 60)
     
     try:
+        if lite:
+            Config.LITE_MODE = True
+        
+        # Pin BLAS/TensorFlow threads before NumPy or TensorFlow is imported
+        threads_per_worker = None
+        if workers > 1:
+            from prefork_server import pin_worker_threads
+            threads_per_worker = pin_worker_threads(workers, Config.WORKER_THREADS)
+        
         # Import here to avoid circular imports during training
-        from api_endpoints import app, load_models
+        from api_endpoints import app, load_models, warm_up_models, model_engines, history_writer, model_reloader
         
-        # Initialize database
-        initialize_database()
+        # Initialize database; prediction history is written once it is ready
+        if initialize_database() and Config.HISTORY_ENABLED:
+            from database import set_rollup_queue
+            history_writer.configure(enabled=True)
+            # Rollup updates of single-record inserts go through the same writer
+            set_rollup_queue(history_writer)
         
         # Load models before starting server
         if load_models():
+            startup = warm_up_models(STARTED_AT)
+            
             print(f"\nSTARTING Medical AI API Server")
             print(f"Server URL: http://{Config.API_HOST}:{Config.API_PORT}")
             print(f"Debug Mode: {Config.DEBUG}")
+            print(f"Lite Mode: {Config.LITE_MODE}")
+            if threads_per_worker:
+                print(f"Workers: {workers} ({threads_per_worker} BLAS/TF threads each)")
+            print(f"Startup to first prediction: {startup['startup_to_first_prediction_ms'] / 1000:.2f}s")
             print("\nAvailable Endpoints:")
             print("   POST /api/dengue/predict          - Dengue risk prediction")
             print("   POST /api/kidney/predict          - Kidney disease prediction") 
             print("   POST /api/mental-health/assessment - Mental health assessment")
+            print("   GET  /api/history                 - Patient prediction history")
             print("   GET  /api/health                  - Health check")
             print("   GET  /api/model-info              - Model information")
+            print("   GET  /api/metrics                 - Prometheus metrics")
             print("\nPress CTRL+C to stop the server\n")
             
             logger.info(f"Server starting on {Config.API_HOST}:{Config.API_PORT}")
-            app.run(
-                host=Config.API_HOST, 
-                port=Config.API_PORT, 
-                debug=Config.DEBUG,
-                use_reloader=False  # Prevent double initialization
-            )
+            if workers > 1:
+                from prefork_server import PreforkServer
+                
+                if 'keras' in model_engines.values():
+                    logger.warning("TensorFlow models do not survive fork reliably; "
+                                   "use the numpy engine or bundles with --workers")
+                
+                PreforkServer(
+                    app,
+                    Config.API_HOST,
+                    Config.API_PORT,
+                    workers,
+                    after_fork=start_worker,
+                    before_exit=flush_prediction_history
+                ).serve()
+            else:
+                # Exit through SystemExit on SIGTERM so atexit handlers flush
+                # the queued prediction history
+                signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+                model_reloader.start()
+                app.run(
+                    host=Config.API_HOST, 
+                    port=Config.API_PORT, 
+                    debug=Config.DEBUG,
+                    use_reloader=False  # Prevent double initialization
+                )
         else:
             logger.error("Failed to load models. Server not started.")
             print("ERROR: Failed to load models. Please train models first.")
@@ -285,6 +361,185 @@ def evaluate_models(model_type=None):
         return False
 
 
+def verify_models():
+    """Verify that the NumPy inference engine and folded scalers match Keras"""
+    logger.info("Verifying NumPy inference engine parity with Keras...")
+    
+    try:
+        import joblib
+        from inference_engine import load_keras_h5, verify_parity, verify_scaler_fold
+        
+        print("\n" + "="*50)
+        print("INFERENCE ENGINE PARITY (NumPy vs Keras)")
+        print("="*50)
+        
+        all_passed = True
+        for disease_type in ['dengue', 'kidney', 'mental_health']:
+            model_path = Config.get_model_path(disease_type)
+            if not os.path.exists(model_path):
+                print(f"   {disease_type:<15} SKIPPED (model not found)")
+                continue
+            
+            result = verify_parity(model_path)
+            status = "PASSED" if result['passed'] else "FAILED"
+            all_passed = all_passed and result['passed']
+            print(f"   {disease_type:<15} max |diff| = {result['max_abs_diff']:.2e} "
+                  f"(tolerance {result['tolerance']:.0e}) [{status}]")
+            
+            # Folded scaler vs scaler.transform followed by the unfused model
+            scaler_path = Config.get_scaler_path(disease_type)
+            if os.path.exists(scaler_path):
+                result = verify_scaler_fold(load_keras_h5(model_path), joblib.load(scaler_path))
+                status = "PASSED" if result['passed'] else "FAILED"
+                all_passed = all_passed and result['passed']
+                print(f"   {'':<15} scaler fold max |diff| = {result['max_abs_diff']:.2e} "
+                      f"(tolerance {result['tolerance']:.0e}) [{status}]")
+        
+        logger.info(f"Inference engine parity check {'passed' if all_passed else 'failed'}")
+        return all_passed
+        
+    except Exception as e:
+        logger.error(f"Error verifying models: {str(e)}")
+        print(f"ERROR: Model verification failed: {str(e)}")
+        return False
+
+
+def export_bundles():
+    """Export serving bundles from the existing .h5 models and .pkl scalers"""
+    logger.info("Exporting model bundles...")
+    
+    try:
+        from model_bundle import export_bundle
+        
+        exported = 0
+        for disease_type in ['dengue', 'kidney', 'mental_health']:
+            model_path = Config.get_model_path(disease_type)
+            scaler_path = Config.get_scaler_path(disease_type)
+            if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+                print(f"   {disease_type:<15} SKIPPED (model or scaler not found)")
+                continue
+            
+            bundle_path = export_bundle(
+                disease_type,
+                model_path,
+                scaler_path,
+                Config.get_bundle_path(disease_type),
+                summary_path=Config.get_summary_path(disease_type),
+                features=Config.get_features(disease_type)
+            )
+            exported += 1
+            print(f"   {disease_type:<15} -> {bundle_path}")
+        
+        logger.info(f"Exported {exported} model bundles")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error exporting bundles: {str(e)}")
+        print(f"ERROR: Bundle export failed: {str(e)}")
+        return False
+
+
+def register_model(disease_type, bundle_path=None, summary_path=None, notes=None, shadow=False):
+    """Add a serving bundle to the model registry (default: the one being served)"""
+    try:
+        from model_registry import ModelRegistry
+        
+        bundle_path = bundle_path or Config.get_bundle_path(disease_type)
+        if summary_path is None and bundle_path == Config.get_bundle_path(disease_type):
+            summary_path = Config.get_summary_path(disease_type)
+        if not os.path.exists(bundle_path):
+            print(f"ERROR: Bundle {bundle_path} not found (run: python main.py export-bundles)")
+            return False
+        
+        registry = ModelRegistry(Config.MODEL_REGISTRY_DIR)
+        manifest = registry.register(disease_type, bundle_path, summary_path, notes=notes, shadow=shadow)
+        if shadow and not manifest['shadow']:
+            manifest = registry.set_shadow(disease_type, manifest['version'], True)
+        
+        print(f"Registered {disease_type} model version {manifest['version']}")
+        print(f"   Bundle: {registry.bundle_path(disease_type, manifest['version'])}")
+        print(f"   Shadow candidate: {'yes' if manifest['shadow'] else 'no'}")
+        return True
+    except Exception as e:
+        logger.error(f"Error registering model: {str(e)}")
+        print(f"ERROR: Model registration failed: {str(e)}")
+        return False
+
+
+def score_csv_file(disease_type, input_path, output_path=None):
+    """Score a CSV file with a trained model, writing the scored CSV"""
+    logger.info(f"Scoring {input_path} with the {disease_type} model...")
+    
+    try:
+        from api_endpoints import load_models, models, predict_matrix
+        from csv_scoring import score_csv
+        
+        if not load_models() or models.get(disease_type) is None:
+            print(f"ERROR: {disease_type} model not available")
+            return False
+        
+        output_path = output_path or f"{os.path.splitext(input_path)[0]}_{disease_type}_predictions.csv"
+        stats = {}
+        with open(output_path, 'w', newline='') as output:
+            for text in score_csv(input_path, disease_type,
+                                  lambda matrix: predict_matrix(matrix, disease_type), stats=stats):
+                output.write(text)
+        
+        print(f"\nScored CSV written to: {output_path}")
+        print(f"   Rows: {stats['rows']} ({stats['failed']} failed)")
+        print(f"   Throughput: {stats['rows_per_second']} rows/s")
+        print(f"   Peak memory: {stats['peak_memory_mb']} MB")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error scoring CSV: {str(e)}")
+        print(f"ERROR: CSV scoring failed: {str(e)}")
+        return False
+
+
+def benchmark_database(workers=4, seconds=5.0):
+    """Compare concurrent write throughput of the default and tuned SQLite profiles"""
+    try:
+        from db_benchmark import compare_write_profiles
+        from database import sqlite_database_path
+        
+        # Benchmark files go next to a configured SQLite database, on the same disk
+        database_path = sqlite_database_path(Config.DATABASE_URL)
+        directory = os.path.dirname(database_path) if database_path else None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        results = compare_write_profiles(workers, seconds, directory)
+        
+        print(f"\nSQLite write benchmark: {workers} processes, one row per transaction, {seconds:g}s each")
+        print(f"{'Profile':<10}{'Commits/s':>12}{'Errors':>9}{'p50 ms':>10}{'p99 ms':>10}{'Max ms':>10}")
+        for result in results:
+            print(f"{result['profile']:<10}{result['commits_per_second']:>12}{result['errors']:>9}"
+                  f"{result['p50_ms']!s:>10}{result['p99_ms']!s:>10}{result['max_ms']!s:>10}")
+        return True
+    except Exception as e:
+        logger.error(f"Database benchmark failed: {str(e)}")
+        print(f"ERROR: Database benchmark failed: {str(e)}")
+        return False
+
+
+def rebuild_rollups(since=None):
+    """Recompute the dashboard's daily rollups from the prediction tables"""
+    try:
+        from datetime import date
+        from database import rebuild_daily_rollups
+        from api_endpoints import app
+        
+        if not initialize_database():
+            return False
+        with app.app_context():
+            rows = rebuild_daily_rollups(date.fromisoformat(since) if since else None)
+        print(f"Rebuilt {rows} daily rollup rows since {since or 'the beginning'}")
+        return True
+    except Exception as e:
+        logger.error(f"Rollup rebuild failed: {str(e)}")
+        print(f"ERROR: Rollup rebuild failed: {str(e)}")
+        return False
+
 def check_system_health():
     """Check system health and dependencies"""
     logger.info("Performing system health check...")
@@ -329,7 +584,15 @@ Examples:
   python main.py train-all          # Train all models
   python main.py train-dengue       # Train dengue model only  
   python main.py api                # Start API server
+  python main.py api --lite         # Start API server without TensorFlow/sklearn
+  python main.py api --workers 4    # Start API server with 4 pre-forked workers
   python main.py evaluate           # Evaluate all models
+  python main.py verify-models      # Check NumPy engine and scaler-fold parity
+  python main.py export-bundles     # Build serving bundles from .h5/.pkl files
+  python main.py register-model --disease kidney --bundle candidate.bundle.npz --shadow
+  python main.py score-csv --disease dengue --input lab_results.csv
+  python main.py benchmark-db       # Compare SQLite write throughput, default vs tuned
+  python main.py rebuild-rollups    # Recompute dashboard rollups from prediction history
   python main.py health-check       # System health check
         """
     )
@@ -343,13 +606,49 @@ Examples:
     subparsers.add_parser('train-all', help='Train all models')
     
     # API command
-    subparsers.add_parser('api', help='Start Flask API server')
+    api_parser = subparsers.add_parser('api', help='Start Flask API server')
+    api_parser.add_argument('--lite', action='store_true',
+                           help='Serve model bundles only, without importing TensorFlow or sklearn')
+    api_parser.add_argument('--workers', type=int, default=None,
+                           help='Number of pre-forked worker processes (default: API_WORKERS or 1)')
     
     # Evaluation command
     eval_parser = subparsers.add_parser('evaluate', help='Evaluate trained models')
     eval_parser.add_argument('--model', choices=['dengue', 'kidney', 'mental'], 
                             help='Specific model to evaluate')
     
+    # Inference engine verification command
+    subparsers.add_parser('verify-models', help='Check NumPy engine and folded-scaler parity with Keras')
+    
+    # Bundle export command
+    subparsers.add_parser('export-bundles', help='Build serving bundles from existing models and scalers')
+    
+    # Model registry command
+    register_parser = subparsers.add_parser('register-model', help='Add a serving bundle to the versioned model registry')
+    register_parser.add_argument('--disease', required=True, choices=['dengue', 'kidney', 'mental_health'],
+                                help='Disease the model predicts')
+    register_parser.add_argument('--bundle', help='Bundle to register (default: the serving bundle)')
+    register_parser.add_argument('--summary', help='Training summary with the test metrics to record')
+    register_parser.add_argument('--notes', help='Free-text notes stored in the manifest')
+    register_parser.add_argument('--shadow', action='store_true',
+                                help='Score a sample of live predictions with this version in the background')
+    
+    # CSV scoring command
+    csv_parser = subparsers.add_parser('score-csv', help='Score a CSV file of patient records')
+    csv_parser.add_argument('--disease', required=True, choices=['dengue', 'kidney', 'mental_health'],
+                           help='Model to score the file with')
+    csv_parser.add_argument('--input', required=True, help='CSV file to score')
+    csv_parser.add_argument('--output', help='Scored CSV path (default: <input>_<disease>_predictions.csv)')
+    
+    # Database benchmark command
+    bench_parser = subparsers.add_parser('benchmark-db', help='Benchmark concurrent SQLite writes, default vs tuned profile')
+    bench_parser.add_argument('--workers', type=int, default=4, help='Concurrent writer processes (default: 4)')
+    bench_parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run (default: 5)')
+    
+    # Rollup rebuild command
+    rollup_parser = subparsers.add_parser('rebuild-rollups', help='Recompute the daily dashboard rollups from the prediction tables')
+    rollup_parser.add_argument('--since', help='First day to rebuild, YYYY-MM-DD (default: all)')
+    
     # Health check command
     subparsers.add_parser('health-check', help='Check system health and dependencies')
     
@@ -368,9 +667,27 @@ Examples:
         elif args.command == 'train-all':
             train_all_models()
         elif args.command == 'api':
-            start_api_server()
+            start_api_server(lite=args.lite, workers=args.workers)
         elif args.command == 'evaluate':
             evaluate_models(args.model)
+        elif args.command == 'verify-models':
+            if not verify_models():
+                sys.exit(1)
+        elif args.command == 'export-bundles':
+            if not export_bundles():
+                sys.exit(1)
+        elif args.command == 'register-model':
+            if not register_model(args.disease, args.bundle, args.summary, args.notes, args.shadow):
+                sys.exit(1)
+        elif args.command == 'score-csv':
+            if not score_csv_file(args.disease, args.input, args.output):
+                sys.exit(1)
+        elif args.command == 'benchmark-db':
+            if not benchmark_database(args.workers, args.seconds):
+                sys.exit(1)
+        elif args.command == 'rebuild-rollups':
+            if not rebuild_rollups(args.since):
+                sys.exit(1)
         elif args.command == 'health-check':
             issues = check_system_health()
             if issues:
@@ -0,0 +1,287 @@
+from collections import deque
+import numpy as np
+import functools
+import threading
+import time
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Request and stage latency buckets in seconds, 100 us to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rows per forward pass
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_value(value):
+    """Format a sample value for the text exposition format"""
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values):
+    """Format a label set as {name="value",...}"""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Series:
+    """One labelled series; observations are queued and folded in batches
+
+    Appending to a deque is atomic, so recording takes no lock. The queue is
+    drained under a lock every DRAIN_THRESHOLD observations and before
+    rendering, which keeps the per-observation cost to an append.
+    """
+
+    DRAIN_THRESHOLD = 256
+
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def _record(self, value):
+        self._pending.append(value)
+        if len(self._pending) >= self.DRAIN_THRESHOLD:
+            self.drain()
+
+    def drain(self):
+        """Fold the queued observations into the totals"""
+        with self._lock:
+            popleft = self._pending.popleft
+            values = [popleft() for _ in range(len(self._pending))]
+            if values:
+                self._fold(values)
+
+    def _fold(self, values):
+        raise NotImplementedError
+
+
+class CounterChild(Series):
+    """One labelled counter series"""
+
+    def __init__(self):
+        super().__init__()
+        self.value = 0
+
+    def inc(self, amount=1):
+        self._record(amount)
+
+    def _fold(self, values):
+        self.value += sum(values)
+
+
+class GaugeChild:
+    """One labelled gauge series"""
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def drain(self):
+        pass
+
+
+class HistogramChild(Series):
+    """One labelled histogram series with fixed bucket upper bounds
+
+    Bucket counts are kept per bucket (not cumulative) and accumulated when
+    the metrics are rendered.
+    """
+
+    def __init__(self, buckets):
+        super().__init__()
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self.counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self._record(value)
+
+    def _fold(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.counts += np.bincount(np.searchsorted(self.buckets, values, side='left'),
+                                   minlength=len(self.counts))
+        self.sum += float(values.sum())
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return Timer(self)
+
+
+class Timer:
+    """Observe the duration of a with-block, in seconds"""
+
+    __slots__ = ('child', 'started_at')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.started_at)
+
+
+class MetricFamily:
+    """A named metric with a fixed set of label names"""
+
+    kind = None
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Get the series for a label set, creating it on first use
+
+        Hot paths should look the series up once and keep it.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self):
+        """Drop all series (for label sets that go stale, like model versions)"""
+        with self._lock:
+            self._children = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        """Render the family in the text exposition format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            child.drain()
+            lines.extend(self._render_child(format_labels(self.label_names, values), values, child))
+        return lines
+
+    def _render_child(self, labels, values, child):
+        return [f'{self.name}{labels} {format_value(child.value)}']
+
+
+class Counter(MetricFamily):
+    kind = 'counter'
+
+    def _new_child(self):
+        return CounterChild()
+
+
+class Gauge(MetricFamily):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return GaugeChild()
+
+
+class Histogram(MetricFamily):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def _render_child(self, labels, values, child):
+        with child._lock:
+            counts = child.counts.tolist()
+            total = child.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            bucket_labels = format_labels(self.label_names + ('le',), values + (format_value(float(bound)),))
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """In-process registry of metric families
+
+    Collectors are callables run at scrape time to refresh gauges from state
+    kept elsewhere (model status, cache statistics). Each process of a
+    pre-fork server keeps its own registry.
+    """
+
+    def __init__(self):
+        self.families = {}
+        self.collectors = []
+
+    def _register(self, family):
+        if family.name in self.families:
+            raise ValueError(f"Metric already registered: {family.name}")
+        self.families[family.name] = family
+        return family
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+
+        lines = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(child):
+    """Decorator observing each call's duration on a histogram series"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started_at)
+        return wrapper
+    return decorator
@@ -0,0 +1,228 @@
+import numpy as np
+from datetime import datetime
+import hashlib
+import zipfile
+import struct
+import mmap
+import json
+import os
+import logging
+
+from inference_engine import NumpyDenseModel, load_keras_h5, scaler_statistics
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+
+# Size and signature of the fixed part of a zip local file header
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# General purpose flag bit of encrypted zip members
+ZIP_FLAG_ENCRYPTED = 0x1
+
+
+class BundleScaler:
+    """StandardScaler replacement backed by the statistics stored in a bundle"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X):
+        """Standardize features: (X - mean) / scale"""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ModelBundle:
+    """Self-contained serving artifact: weights, scaler statistics, features and threshold"""
+
+    def __init__(self, model, scaler_mean, scaler_scale, features, optimal_threshold=0.5, metadata=None):
+        self.model = model
+        self.scaler = BundleScaler(scaler_mean, scaler_scale)
+        self.features = list(features)
+        self.optimal_threshold = float(optimal_threshold)
+        self.metadata = metadata or {}
+
+
+def save_bundle(path, model, scaler, features, optimal_threshold=0.5, metadata=None):
+    """Write a bundle as an uncompressed .npz so it can be memory-mapped
+
+    The file is written next to the target and renamed into place, so readers
+    never see a partially written bundle.
+    """
+    scaler_mean, scaler_scale = scaler_statistics(scaler)
+
+    arrays = {
+        'scaler_mean': scaler_mean,
+        'scaler_scale': scaler_scale,
+        'features': np.array(features, dtype=str),
+        'activations': np.array([activation for _, _, activation in model.layers], dtype=str),
+        'optimal_threshold': np.array(float(optimal_threshold)),
+        'metadata': np.array(json.dumps({
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            **(metadata or {})
+        }))
+    }
+    for index, (kernel, bias, _) in enumerate(model.layers):
+        arrays[f'kernel_{index}'] = np.ascontiguousarray(kernel, dtype=np.float64)
+        arrays[f'bias_{index}'] = np.ascontiguousarray(bias, dtype=np.float64)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+    logger.info(f"Model bundle saved to {path}")
+    return path
+
+
+class _BufferReader:
+    """Minimal file-like reader over a buffer, for numpy's .npy header parser"""
+
+    def __init__(self, buffer, position):
+        self.buffer = buffer
+        self.position = position
+
+    def read(self, size):
+        data = self.buffer[self.position:self.position + size]
+        self.position += size
+        return data
+
+
+def mmap_npz(path):
+    """Map every stored (uncompressed) member of an .npz as a zero-copy array view
+
+    Members are located through the zip headers, so anything other than
+    plain stored .npy entries (compressed, encrypted, truncated) raises
+    ValueError rather than being misread. Zip64 entries, which numpy writes
+    itself, are supported.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Bundle {path} is not a valid .npz file: {str(e)}")
+
+    with archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Bundle member {info.filename} is compressed and cannot be memory-mapped")
+            if info.flag_bits & ZIP_FLAG_ENCRYPTED:
+                raise ValueError(f"Bundle member {info.filename} is encrypted")
+            if not info.filename.endswith('.npy'):
+                raise ValueError(f"Bundle member {info.filename} is not a .npy array")
+
+            # Skip the local file header to reach the .npy payload
+            header = buffer[info.header_offset:info.header_offset + ZIP_LOCAL_HEADER_SIZE]
+            if len(header) < ZIP_LOCAL_HEADER_SIZE or header[:4] != ZIP_LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"Bundle member {info.filename} has no valid local file header")
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            offset = info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+            end = offset + info.file_size
+            if end > len(buffer):
+                raise ValueError(f"Bundle member {info.filename} is truncated")
+
+            # Parse the .npy header to find dtype, shape and where the data starts
+            npy = _BufferReader(buffer, offset)
+            version = np.lib.format.read_magic(npy)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(npy)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(npy)
+            if dtype.hasobject:
+                raise ValueError(f"Bundle member {info.filename} contains Python objects")
+
+            count = int(np.prod(shape)) if shape else 1
+            if npy.position + count * dtype.itemsize > end:
+                raise ValueError(f"Bundle member {info.filename} is shorter than its .npy header says")
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=npy.position)
+            arrays[info.filename[:-len('.npy')]] = array.reshape(shape, order='F' if fortran_order else 'C')
+
+    return arrays
+
+
+def load_bundle(path, mmap_mode=True):
+    """Load a bundle without TensorFlow or sklearn
+
+    With mmap_mode the weights are read-only views onto the mapped file, so
+    processes loading the same bundle share its pages.
+    """
+    if mmap_mode:
+        arrays = mmap_npz(path)
+    else:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+
+    metadata = json.loads(str(arrays['metadata']))
+    if metadata.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Bundle {path} has unsupported format version {metadata['format_version']}")
+
+    activations = [str(activation) for activation in arrays['activations']]
+    layers = [
+        (arrays[f'kernel_{index}'], arrays[f'bias_{index}'], activation)
+        for index, activation in enumerate(activations)
+    ]
+
+    return ModelBundle(
+        model=NumpyDenseModel(layers, name=metadata.get('disease_type', 'model')),
+        scaler_mean=arrays['scaler_mean'],
+        scaler_scale=arrays['scaler_scale'],
+        features=[str(feature) for feature in arrays['features']],
+        optimal_threshold=float(arrays['optimal_threshold']),
+        metadata=metadata
+    )
+
+
+def file_sha256(path):
+    """Hash a model artifact so bundles can be matched to their source"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_model_version(*paths):
+    """Short content hash of the artifacts a model was loaded from"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def bundle_matches_model(bundle, model_path):
+    """Check that a bundle was exported from the current .h5 model (if there is one)"""
+    if not os.path.exists(model_path):
+        return True
+    return bundle.metadata.get('source_sha256') == file_sha256(model_path)
+
+
+def export_bundle(disease_type, model_path, scaler_path, bundle_path, summary_path=None, features=None):
+    """Build a bundle from the existing .h5 model, .pkl scaler and training summary"""
+    import joblib
+
+    optimal_threshold = 0.5
+    if summary_path and os.path.exists(summary_path):
+        with open(summary_path) as f:
+            summary = json.load(f)
+        optimal_threshold = summary.get('optimal_threshold', optimal_threshold)
+        features = features or summary.get('features_used')
+
+    return save_bundle(
+        bundle_path,
+        load_keras_h5(model_path),
+        joblib.load(scaler_path),
+        features or [],
+        optimal_threshold=optimal_threshold,
+        metadata={
+            'disease_type': disease_type,
+            'source_model': os.path.basename(model_path),
+            'source_sha256': file_sha256(model_path)
+        }
+    )
@@ -0,0 +1,129 @@
+from datetime import datetime
+import shutil
+import json
+import re
+import os
+import logging
+
+from model_bundle import load_bundle, compute_model_version
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+BUNDLE_NAME = 'model.bundle.npz'
+
+# Versions are the content hashes made by compute_model_version
+VERSION_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+
+def write_json(path, data):
+    """Write a JSON file next to the target and rename it into place"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+class ModelRegistry:
+    """Versioned serving bundles with their manifests, under root/<disease>/<version>/
+
+    A version is the content hash of its bundle, the same version the API
+    reports for the model it serves, so registering the serving bundle gives
+    the serving version. Each manifest records where the bundle came from,
+    its features, threshold and test metrics, and whether the version runs
+    as a shadow candidate.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def version_dir(self, disease_type, version):
+        """Directory of one registered version (raises ValueError for malformed versions)"""
+        if not isinstance(version, str) or not VERSION_PATTERN.match(version):
+            raise ValueError(f"Invalid model version: {version}")
+        return os.path.join(self.root, disease_type, version)
+
+    def bundle_path(self, disease_type, version):
+        """Bundle file of one registered version"""
+        return os.path.join(self.version_dir(disease_type, version), BUNDLE_NAME)
+
+    def manifest(self, disease_type, version):
+        """Manifest of a registered version, or None when it is not registered"""
+        path = os.path.join(self.version_dir(disease_type, version), MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def versions(self, disease_type):
+        """Manifests of a disease's registered versions, newest first"""
+        directory = os.path.join(self.root, disease_type)
+        if not os.path.isdir(directory):
+            return []
+
+        manifests = []
+        for name in os.listdir(directory):
+            if VERSION_PATTERN.match(name):
+                manifest = self.manifest(disease_type, name)
+                if manifest is not None:
+                    manifests.append(manifest)
+        return sorted(manifests, key=lambda manifest: manifest['registered_at'], reverse=True)
+
+    def register(self, disease_type, bundle_path, summary_path=None, notes=None, shadow=False):
+        """Copy a bundle into the registry and write its manifest
+
+        Returns the manifest; a version that is already registered is
+        returned unchanged.
+        """
+        version = compute_model_version(bundle_path)
+        existing = self.manifest(disease_type, version)
+        if existing is not None:
+            return existing
+
+        bundle = load_bundle(bundle_path)
+        bundle_disease = bundle.metadata.get('disease_type', disease_type)
+        if bundle_disease != disease_type:
+            raise ValueError(f"{bundle_path} is a {bundle_disease} model, not {disease_type}")
+
+        summary = {}
+        if summary_path and os.path.exists(summary_path):
+            with open(summary_path) as f:
+                summary = json.load(f)
+
+        directory = self.version_dir(disease_type, version)
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, BUNDLE_NAME)
+        shutil.copyfile(bundle_path, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+
+        # The manifest is written last; a version without one is not registered
+        manifest = {
+            'disease_type': disease_type,
+            'version': version,
+            'bundle': BUNDLE_NAME,
+            'registered_at': datetime.now().isoformat(),
+            'source': bundle_path,
+            'features': bundle.features,
+            'optimal_threshold': bundle.optimal_threshold,
+            'bundle_metadata': bundle.metadata,
+            'test_metrics': summary.get('test_metrics'),
+            'notes': notes,
+            'shadow': bool(shadow)
+        }
+        write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+
+        logger.info(f"Registered {disease_type} model version {version} from {bundle_path}")
+        return manifest
+
+    def set_shadow(self, disease_type, version, enabled):
+        """Mark a registered version as a shadow candidate (loaded at startup) or not
+
+        Returns the updated manifest, or None when the version is not registered.
+        """
+        manifest = self.manifest(disease_type, version)
+        if manifest is None:
+            return None
+        manifest['shadow'] = bool(enabled)
+        write_json(os.path.join(self.version_dir(disease_type, version), MANIFEST_NAME), manifest)
+        return manifest
@@ -0,0 +1,146 @@
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_signature(paths):
+    """(mtime, size) of each artifact file, None for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class ModelReloader:
+    """Watch model artifacts and hot-reload a disease's model when they change
+
+    A watcher thread stats each disease's artifact files every
+    interval_seconds. A changed signature is acted on once it holds for two
+    polls in a row, since training writes the model, scaler and bundle one
+    after the other; then reload_fn(disease_type) loads, warms and swaps in
+    the new model. reload_fn returns the new version, or None when the
+    artifacts hold the model already serving.
+
+    Threads do not survive a fork, so start() must run in every serving
+    process (each pre-fork worker reloads its own copy).
+    """
+
+    def __init__(self, artifacts, reload_fn, interval_seconds=5.0, enabled=False):
+        self.artifacts = artifacts
+        self.reload_fn = reload_fn
+        self.interval = max(0.1, float(interval_seconds))
+        self.enabled = bool(enabled)
+
+        self._loaded = {}
+        self._seen = {}
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._watcher_pid = None
+
+        # Statistics
+        self.checks = 0
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload = {}
+        self.last_error = None
+
+    def configure(self, enabled=None, interval_seconds=None):
+        """Switch watching on or off and change the poll interval"""
+        if interval_seconds is not None:
+            self.interval = max(0.1, float(interval_seconds))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def mark_loaded(self, disease_type):
+        """Record the artifacts a model was just loaded from (call before loading)"""
+        signature = artifact_signature(self.artifacts[disease_type])
+        self._loaded[disease_type] = signature
+        self._seen[disease_type] = signature
+
+    def start(self):
+        """Start the watcher thread in this process, if enabled"""
+        if not self.enabled or (self._watcher_pid == os.getpid() and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher_pid = os.getpid()
+        self._watcher = threading.Thread(target=self._run, name='model-reloader', daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching model artifacts every {self.interval:g}s (pid {os.getpid()})")
+
+    def stop(self):
+        """Stop the watcher thread"""
+        self._stop.set()
+
+    def _run(self):
+        """Watcher loop"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model artifact check failed: {str(e)}")
+
+    def check(self, force=False, settle=True, diseases=None):
+        """Reload the models whose artifacts changed and have settled
+
+        settle=False acts on a change right away and force=True reloads even
+        unchanged artifacts; diseases limits the check (default all). Returns
+        {disease: result} for the diseases acted on, where result has the new
+        version or an error.
+        """
+        results = {}
+        with self._reload_lock:
+            self.checks += 1
+            for disease_type, paths in self.artifacts.items():
+                if diseases is not None and disease_type not in diseases:
+                    continue
+                signature = artifact_signature(paths)
+                settled = signature == self._seen.get(disease_type)
+                self._seen[disease_type] = signature
+                if not force and (signature == self._loaded.get(disease_type) or (settle and not settled)):
+                    continue
+                results[disease_type] = self._reload(disease_type, signature)
+        return results
+
+    def _reload(self, disease_type, signature):
+        """Run reload_fn for one disease and record the outcome"""
+        started_at = time.perf_counter()
+        try:
+            version = self.reload_fn(disease_type)
+        except Exception as e:
+            # Keep serving the old model; retry once the artifacts change again
+            self._loaded[disease_type] = signature
+            self.failures += 1
+            self.last_error = f"{disease_type}: {str(e)}"
+            logger.error(f"Reloading the {disease_type} model failed, keeping the current one: {str(e)}")
+            return {'reloaded': False, 'error': str(e)}
+
+        self._loaded[disease_type] = signature
+        elapsed_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        if version is None:
+            return {'reloaded': False, 'elapsed_ms': elapsed_ms}
+
+        self.reloads += 1
+        self.last_reload[disease_type] = {'version': version, 'at': time.time(), 'elapsed_ms': elapsed_ms}
+        logger.info(f"Reloaded the {disease_type} model (version {version}) in {elapsed_ms} ms")
+        return {'reloaded': True, 'version': version, 'elapsed_ms': elapsed_ms}
+
+    def stats(self):
+        """Get watcher statistics"""
+        return {
+            'enabled': self.enabled,
+            'watching': self._watcher_pid == os.getpid() and self._watcher is not None and self._watcher.is_alive(),
+            'interval_seconds': self.interval,
+            'checks': self.checks,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_reload': self.last_reload,
+            'last_error': self.last_error
+        }
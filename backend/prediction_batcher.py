@@ -0,0 +1,135 @@
+import numpy as np
+from concurrent.futures import Future
+import threading
+import queue
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCoalescer:
+    """Coalesce concurrent single-row predictions into one batched forward pass
+
+    Callers block in predict() while a worker thread gathers queued rows for up
+    to window_ms (or until max_batch_size rows arrive), runs predict_fn once on
+    the stacked matrix and hands each caller its own output row.
+
+    Each row is queued with a key that is passed on as predict_fn(X, key);
+    rows with different keys (e.g. two model versions during a hot reload)
+    are never stacked into the same forward pass.
+    """
+
+    def __init__(self, name, predict_fn, max_batch_size=32, window_ms=2.0):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+
+        self._queue = None
+        self._worker = None
+        self._worker_pid = None
+        self._lock = threading.Lock()
+        self._last_batch_size = 1
+
+        # Statistics
+        self.batches = 0
+        self.rows = 0
+        self.max_observed_batch = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread (again after a fork, threads do not survive it)"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+
+            self._queue = queue.Queue()
+            self._worker_pid = pid
+            self._worker = threading.Thread(
+                target=self._run,
+                args=(self._queue,),
+                name=f"coalescer-{self.name}",
+                daemon=True
+            )
+            self._worker.start()
+            logger.info(f"Prediction coalescer started for {self.name} "
+                        f"(batch size {self.max_batch_size}, window {self.window * 1000:.1f} ms)")
+
+    def predict(self, row, timeout=None, key=None):
+        """Queue one input row and block until its output row is ready"""
+        self._ensure_worker()
+
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).reshape(-1), future, key))
+        return future.result(timeout=timeout)
+
+    def _collect(self, request_queue, first):
+        """Gather a batch starting with the first queued request"""
+        batch = [first]
+
+        # Take whatever is already waiting without blocking
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(request_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Only hold the batch open when recent traffic was concurrent, so a
+        # lone request at low load is dispatched without waiting for the window
+        if len(batch) == 1 and self._last_batch_size == 1:
+            return batch
+
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(request_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self, request_queue):
+        """Worker loop: collect, predict, distribute"""
+        while True:
+            batch = self._collect(request_queue, request_queue.get())
+            self._last_batch_size = len(batch)
+
+            groups = {}
+            for row, future, key in batch:
+                groups.setdefault(id(key), (key, []))[1].append((row, future))
+            for key, group in groups.values():
+                self._predict_group(key, group)
+
+    def _predict_group(self, key, group):
+        """Run one forward pass over rows sharing a key and resolve their futures"""
+        try:
+            outputs = self.predict_fn(np.vstack([row for row, _ in group]), key)
+        except Exception as e:
+            logger.error(f"Batched prediction failed for {self.name}: {str(e)}")
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        for index, (_, future) in enumerate(group):
+            future.set_result(outputs[index:index + 1])
+
+        self.batches += 1
+        self.rows += len(group)
+        self.max_observed_batch = max(self.max_observed_batch, len(group))
+
+    def stats(self):
+        """Get coalescing statistics"""
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'average_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'max_batch_size': self.max_observed_batch
+        }
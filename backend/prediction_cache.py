@@ -0,0 +1,83 @@
+import numpy as np
+from collections import OrderedDict
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_key(model_version, feature_vector):
+    """Build a cache key from the model version and the feature vector
+
+    Values are normalized to float64 (and -0.0 to 0.0) so equal payloads give
+    equal keys regardless of how the numbers were written in the JSON.
+    """
+    vector = np.ascontiguousarray(feature_vector, dtype=np.float64).reshape(-1) + 0.0
+    return model_version, vector.tobytes()
+
+
+class PredictionCache:
+    """Bounded LRU cache with a per-entry time to live"""
+
+    def __init__(self, name, max_entries=10000, ttl_seconds=300):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Get a cached value, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries when full"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+        logger.info(f"Prediction cache cleared for {self.name}")
+
+    def stats(self):
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
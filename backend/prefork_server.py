@@ -0,0 +1,152 @@
+import os
+import sys
+import signal
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Thread-count variables read by the BLAS libraries behind NumPy and by TensorFlow
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'TF_NUM_INTRAOP_THREADS',
+    'TF_NUM_INTEROP_THREADS'
+]
+
+# Minimum seconds between respawns of crashing workers
+RESPAWN_BACKOFF = 1.0
+
+
+def pin_worker_threads(workers, threads_per_worker=0):
+    """Limit BLAS/TensorFlow threads so N workers do not oversubscribe the CPUs
+
+    Must run before NumPy or TensorFlow is imported. Variables already set in
+    the environment are left alone. Returns the thread count per worker.
+    """
+    if threads_per_worker <= 0:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // max(1, workers))
+
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads_per_worker))
+
+    # Libraries that are already loaded no longer read the environment
+    if 'numpy' in sys.modules:
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(threads_per_worker)
+        except ImportError:
+            logger.warning("NumPy was imported before thread pinning; BLAS thread count may not be limited")
+
+    return threads_per_worker
+
+
+class PreforkServer:
+    """Serve a WSGI app from N forked worker processes sharing one listening socket
+
+    The master binds the socket and must already hold the loaded models, so
+    workers share their read-only pages copy-on-write. Each worker runs a
+    threaded werkzeug server on the inherited socket and the kernel spreads
+    connections between them. The master only supervises: it respawns
+    workers that die and stops them all on SIGINT/SIGTERM.
+
+    after_fork(index) runs in each worker before it serves and
+    before_exit(index) when it stops; workers leave through os._exit, so
+    atexit handlers do not run there.
+    """
+
+    def __init__(self, app, host, port, workers, after_fork=None, before_exit=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, int(workers))
+        self.after_fork = after_fork
+        self.before_exit = before_exit
+
+        self.server = None
+        self.children = {}
+        self.stopping = False
+
+    def serve(self):
+        """Bind, fork the workers and supervise them until stopped"""
+        from werkzeug.serving import make_server
+
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Pre-fork workers need os.fork (not available on this platform)")
+
+        self.server = make_server(self.host, self.port, self.app, threaded=True)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for index in range(self.workers):
+            self._spawn(index)
+        logger.info(f"Master {os.getpid()} serving on {self.host}:{self.port} with {self.workers} workers")
+
+        last_respawn = 0.0
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            index = self.children.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+
+            logger.warning(f"Worker {pid} exited with status {status}, respawning")
+            wait = RESPAWN_BACKOFF - (time.monotonic() - last_respawn)
+            if wait > 0:
+                time.sleep(wait)
+            last_respawn = time.monotonic()
+            if not self.stopping:
+                self._spawn(index)
+
+        self.server.server_close()
+        logger.info("All workers stopped")
+
+    def _spawn(self, index):
+        """Fork one worker"""
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            return
+
+        # Worker process
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        signal.signal(signal.SIGINT, lambda signum, frame: sys.exit(0))
+        exit_code = 0
+        try:
+            if self.after_fork:
+                self.after_fork(index)
+            logger.info(f"Worker {index} started (pid {os.getpid()})")
+            self.server.serve_forever()
+        except SystemExit:
+            pass
+        except Exception as e:
+            logger.error(f"Worker {index} failed: {str(e)}")
+            exit_code = 1
+        finally:
+            if self.before_exit:
+                try:
+                    self.before_exit(index)
+                except Exception as e:
+                    logger.error(f"Worker {index} cleanup failed: {str(e)}")
+            # os._exit skips atexit, so flush (queued) log records first
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def _handle_stop(self, signum, frame):
+        """Stop all workers (master only)"""
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Received signal {signum}, stopping {len(self.children)} workers")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
@@ -0,0 +1,121 @@
+import json
+import logging
+
+from flask import Response
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is None:
+    logger.info("orjson not installed, using the standard library JSON encoder")
+
+
+def _default(obj):
+    """Encode NumPy scalars and arrays"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes
+
+    Uses orjson when it is installed and the standard library encoder
+    otherwise. NumPy values are encoded in both cases.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def join_object(encoded_items):
+    """Build a JSON object from {key: already-encoded JSON bytes}"""
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in encoded_items.items()) + b'}'
+
+
+def json_response(body, status=200):
+    """Build a JSON response from a document or already-encoded bytes"""
+    if not isinstance(body, bytes):
+        body = dumps(body)
+    return Response(body, status=status, mimetype='application/json')
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider that serializes with dumps(), so jsonify() uses orjson
+
+    Request bodies are still parsed with the standard library, which accepts
+    the same inputs as before (NaN, Infinity).
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        return json_response(self._prepare_response_obj(args, kwargs))
+
+
+class Slot:
+    """Placeholder for a dynamic field of a ResponseTemplate"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class ResponseTemplate:
+    """A JSON document encoded once, with its Slot fields filled in per response
+
+    The document is encoded with a marker string in place of each Slot and the
+    bytes are split around the markers. Rendering then only encodes the
+    dynamic values and joins them with the static fragments. Values passed as
+    bytes are inserted as already-encoded JSON.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.slots = []
+
+        rest = dumps(self._mark(document))
+        self.fragments = []
+        for name in self.slots:
+            head, rest = rest.split(dumps(self._marker(name)), 1)
+            self.fragments.append(head)
+        self.fragments.append(rest)
+
+    @staticmethod
+    def _marker(name):
+        return f'\x00slot:{name}\x00'
+
+    def _mark(self, value):
+        """Copy the document with markers in place of the slots, in encoding order"""
+        if isinstance(value, Slot):
+            if value.name in self.slots:
+                raise ValueError(f"Duplicate template slot: {value.name}")
+            self.slots.append(value.name)
+            return self._marker(value.name)
+        if isinstance(value, dict):
+            return {key: self._mark(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._mark(item) for item in value]
+        return value
+
+    def with_fields(self, **fields):
+        """Get a template of this document with extra static fields appended"""
+        return ResponseTemplate({**self.document, **fields})
+
+    def render(self, **values):
+        """Encode one response: the static fragments joined with the slot values"""
+        parts = [self.fragments[0]]
+        for name, fragment in zip(self.slots, self.fragments[1:]):
+            value = values[name]
+            parts.append(value if isinstance(value, bytes) else dumps(value))
+            parts.append(fragment)
+        return b''.join(parts)
@@ -0,0 +1,185 @@
+from collections import Counter
+import itertools
+import os
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Deepest stack recorded per sample (outermost frames are dropped)
+MAX_STACK_DEPTH = 128
+
+
+def frame_name(code):
+    """Name a code object for a collapsed stack: function (file:first line)"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame):
+    """Collapse a frame's call stack to 'outer;...;inner'"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(frame_name(frame.f_code).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class RequestProfiler:
+    """Statistical profiler for one request in every N
+
+    While a sampled request runs, a background thread reads its Python stack
+    every interval_ms through sys._current_frames(). Stacks are counted per
+    endpoint in the collapsed format read by flamegraph.pl and speedscope
+    ('endpoint;outer;...;inner count'), and written to one file per
+    window_seconds under directory, keeping the newest max_files files.
+
+    Unsampled requests only pay for the enabled check. State is per process;
+    the sampler thread is started lazily, so it also runs in forked workers.
+    """
+
+    def __init__(self, directory, sample_rate=100, interval_ms=1.0, window_seconds=300,
+                 max_files=48, enabled=False):
+        self.directory = directory
+        self.sample_rate = max(1, int(sample_rate))
+        self.interval = max(0.0001, float(interval_ms) / 1000.0)
+        self.window_seconds = max(1, int(window_seconds))
+        self.max_files = max(1, int(max_files))
+        self.enabled = bool(enabled)
+
+        self._counter = itertools.count()
+        self._active = {}
+        self._stacks = Counter()
+        self._window_start = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler = None
+        self._sampler_pid = None
+
+        # Statistics
+        self.profiled_requests = 0
+        self.samples = 0
+
+    def configure(self, enabled=None, sample_rate=None):
+        """Switch profiling on or off and change the sampling rate at runtime"""
+        if sample_rate is not None:
+            self.sample_rate = max(1, int(sample_rate))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+            self._wakeup.set()
+        logger.info(f"Request profiling {'enabled' if self.enabled else 'disabled'} "
+                    f"(1 in {self.sample_rate} requests)")
+
+    def should_profile(self):
+        """Decide whether the current request is sampled"""
+        return self.enabled and next(self._counter) % self.sample_rate == 0
+
+    def start(self, label):
+        """Start sampling the calling thread under the given label"""
+        self._ensure_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = label.replace(';', ':')
+            self.profiled_requests += 1
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop sampling the calling thread"""
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _ensure_sampler(self):
+        """Start the sampler thread in this process if needed"""
+        pid = os.getpid()
+        if self._sampler_pid == pid and self._sampler.is_alive():
+            return
+        with self._lock:
+            if self._sampler_pid == pid and self._sampler.is_alive():
+                return
+            if self._sampler_pid != pid:
+                # Forked worker: stacks inherited from the parent belong to its file
+                self._stacks = Counter()
+                self._window_start = None
+            self._sampler_pid = pid
+            self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._sampler.start()
+
+    def _run(self):
+        """Sample the active requests until profiling is switched off"""
+        last_flush = time.monotonic()
+        while self.enabled:
+            with self._lock:
+                active = dict(self._active)
+            if active:
+                time.sleep(self.interval)
+                frames = sys._current_frames()
+                with self._lock:
+                    for thread_id, label in active.items():
+                        frame = frames.get(thread_id)
+                        if frame is not None:
+                            self._stacks[f"{label};{collapse_stack(frame)}"] += 1
+                            self.samples += 1
+                del frames
+            else:
+                # Idle until a sampled request starts
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+            if time.monotonic() - last_flush >= 5.0:
+                self.flush()
+                last_flush = time.monotonic()
+        self.flush()
+
+    def _window_path(self, window_start):
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(window_start))
+        return os.path.join(self.directory, f"profile-{stamp}-{os.getpid()}.collapsed")
+
+    def flush(self):
+        """Write the current window's stacks to its file and roll the window when due"""
+        now = time.time()
+        with self._lock:
+            if self._window_start is None:
+                self._window_start = now - now % self.window_seconds
+            window_start = self._window_start
+            stacks = Counter(self._stacks)
+            if now - window_start >= self.window_seconds:
+                self._stacks = Counter()
+                self._window_start = now - now % self.window_seconds
+
+        if not stacks:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._window_path(window_start)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        os.replace(temp_path, path)
+        self._prune()
+
+    def _prune(self):
+        """Delete all but the newest max_files profile files"""
+        for name in self.list_files()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def list_files(self):
+        """Profile file names, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if name.endswith('.collapsed')]
+        return sorted(names, reverse=True)
+
+    def stats(self):
+        """Get profiler status"""
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'interval_ms': self.interval * 1000,
+            'window_seconds': self.window_seconds,
+            'profiled_requests': self.profiled_requests,
+            'samples': self.samples,
+            'files': self.list_files()
+        }
@@ -0,0 +1,234 @@
+from collections import deque
+from datetime import datetime
+import numpy as np
+import threading
+import random
+import time
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept per candidate for the percentiles in stats()
+LATENCY_WINDOW = 2048
+
+
+class ShadowScorer:
+    """Score a sample of live predictions with candidate models, off the request path
+
+    Request threads call submit() with the serving model and the model input
+    of a prediction; one in every 1/sample_rate is queued and the call
+    returns. A scorer thread wakes every interval_ms and runs each queued
+    row through the serving model and every candidate of its disease, one
+    row per forward pass as the request path would, timing both.
+
+    prepare_fn(candidate, serving, model_input) converts the serving
+    model's input into the candidate's, and interpret_fn(outputs,
+    disease_type) gives (probabilities, predictions) for stacked output
+    rows. Each comparison is appended to a JSON lines file per process in
+    log_dir, passed to record_fn if given, and summarised in stats().
+
+    At most max_pending rows wait; further samples are dropped (and
+    counted), so a slow candidate never holds on to request data.
+    """
+
+    def __init__(self, prepare_fn, interpret_fn, log_dir, sample_rate=0.1, max_pending=1000,
+                 interval_ms=100.0, record_fn=None):
+        self.prepare_fn = prepare_fn
+        self.interpret_fn = interpret_fn
+        self.log_dir = log_dir
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.max_pending = max(1, int(max_pending))
+        self.interval = max(0.001, float(interval_ms) / 1000.0)
+        self.record_fn = record_fn
+
+        # {disease: {version: candidate}}, replaced rather than changed in place
+        self.candidates = {}
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._scorer = None
+        self._scorer_pid = None
+        self._comparisons = {}
+
+        # Statistics
+        self.sampled = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def configure(self, sample_rate=None):
+        """Change the fraction of predictions scored by the candidates"""
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+
+    def add_candidate(self, disease_type, version, candidate):
+        """Start shadowing a disease's predictions with a candidate model"""
+        with self._lock:
+            candidates = dict(self.candidates.get(disease_type, {}))
+            candidates[version] = candidate
+            self.candidates = {**self.candidates, disease_type: candidates}
+
+    def remove_candidate(self, disease_type, version):
+        """Stop shadowing with a candidate; returns whether it was loaded"""
+        with self._lock:
+            candidates = dict(self.candidates.get(disease_type, {}))
+            removed = candidates.pop(version, None)
+            self.candidates = {**self.candidates, disease_type: candidates}
+            self._comparisons.pop((disease_type, version), None)
+        return removed is not None
+
+    def submit(self, disease_type, serving, model_input):
+        """Queue a sample of a prediction for the candidates (no-op without candidates)"""
+        if not self.candidates.get(disease_type) or random.random() >= self.sample_rate:
+            return
+        if self._scorer_pid != os.getpid():
+            self._ensure_scorer()
+
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.sampled += 1
+        self._pending.append((disease_type, serving, model_input))
+
+    def _ensure_scorer(self):
+        """Start the scorer thread in this process (threads do not survive a fork)"""
+        with self._lock:
+            pid = os.getpid()
+            if self._scorer_pid == pid:
+                return
+            if self._scorer_pid is not None:
+                # Forked worker: samples queued in the parent are the parent's
+                self._pending = deque()
+                self._comparisons = {}
+            self._scorer_pid = pid
+            self._scorer = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+            self._scorer.start()
+
+    def _run(self):
+        """Scorer loop"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.score_pending()
+            except Exception as e:
+                logger.error(f"Shadow scoring failed: {str(e)}")
+
+    def score_pending(self):
+        """Score the queued samples with every candidate; returns the comparisons made"""
+        popleft = self._pending.popleft
+        records = []
+        for _ in range(len(self._pending)):
+            disease_type, serving, model_input = popleft()
+            for version, candidate in self.candidates.get(disease_type, {}).items():
+                if version == serving.version:
+                    continue
+                try:
+                    records.append(self._compare(disease_type, serving, version, candidate, model_input))
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Shadow {disease_type} model {version} failed: {str(e)}")
+                # Hand the GIL back to request threads between rows
+                time.sleep(0)
+
+        if records:
+            self._write(records)
+        return len(records)
+
+    def _compare(self, disease_type, serving, version, candidate, model_input):
+        """Run one row through the serving model and a candidate and record both"""
+        started_at = time.perf_counter()
+        serving_output = np.asarray(serving.model.predict(model_input, verbose=0))
+        serving_ms = (time.perf_counter() - started_at) * 1000
+
+        candidate_input = self.prepare_fn(candidate, serving, model_input)
+        started_at = time.perf_counter()
+        candidate_output = np.asarray(candidate.model.predict(candidate_input, verbose=0))
+        candidate_ms = (time.perf_counter() - started_at) * 1000
+
+        probabilities, predictions = self.interpret_fn(np.vstack([serving_output, candidate_output]), disease_type)
+        record = {
+            'at': datetime.now().isoformat(),
+            'disease': disease_type,
+            'serving_version': serving.version,
+            'candidate_version': version,
+            'serving_output': serving_output[0].round(6).tolist(),
+            'candidate_output': candidate_output[0].round(6).tolist(),
+            'serving_prediction': int(predictions[0]),
+            'candidate_prediction': int(predictions[1]),
+            'probability_diff': round(float(probabilities[1] - probabilities[0]), 6),
+            'serving_ms': round(serving_ms, 3),
+            'candidate_ms': round(candidate_ms, 3)
+        }
+
+        abs_diff = abs(record['probability_diff'])
+        with self._lock:
+            comparison = self._comparisons.get((disease_type, version))
+            if comparison is None:
+                comparison = self._comparisons[(disease_type, version)] = {
+                    'scored': 0,
+                    'agreed': 0,
+                    'abs_diff_sum': 0.0,
+                    'max_abs_diff': 0.0,
+                    'serving_ms': deque(maxlen=LATENCY_WINDOW),
+                    'candidate_ms': deque(maxlen=LATENCY_WINDOW)
+                }
+            comparison['scored'] += 1
+            comparison['agreed'] += record['serving_prediction'] == record['candidate_prediction']
+            comparison['abs_diff_sum'] += abs_diff
+            comparison['max_abs_diff'] = max(comparison['max_abs_diff'], abs_diff)
+            comparison['serving_ms'].append(serving_ms)
+            comparison['candidate_ms'].append(candidate_ms)
+
+        if self.record_fn:
+            self.record_fn(record)
+        return record
+
+    def _write(self, records):
+        """Append comparisons to this process's file for the day"""
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, f"shadow-{time.strftime('%Y%m%d')}-{os.getpid()}.jsonl")
+            with open(path, 'a') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+        except OSError as e:
+            logger.error(f"Failed to write {len(records)} shadow comparisons: {str(e)}")
+
+    def stats(self):
+        """Get sampling statistics and the comparison summary of each candidate"""
+        with self._lock:
+            comparisons = {
+                key: dict(comparison, serving_ms=np.array(comparison['serving_ms']),
+                          candidate_ms=np.array(comparison['candidate_ms']))
+                for key, comparison in self._comparisons.items()
+            }
+
+        candidates = {}
+        for disease_type, versions in self.candidates.items():
+            for version in versions:
+                comparison = comparisons.get((disease_type, version))
+                summary = {'scored': 0}
+                if comparison and comparison['scored']:
+                    scored = comparison['scored']
+                    serving_ms = comparison['serving_ms']
+                    candidate_ms = comparison['candidate_ms']
+                    summary = {
+                        'scored': scored,
+                        'agreement_rate': round(comparison['agreed'] / scored, 4),
+                        'mean_abs_probability_diff': round(comparison['abs_diff_sum'] / scored, 6),
+                        'max_abs_probability_diff': round(comparison['max_abs_diff'], 6),
+                        'serving_p50_ms': round(float(np.percentile(serving_ms, 50)), 3),
+                        'serving_p99_ms': round(float(np.percentile(serving_ms, 99)), 3),
+                        'candidate_p50_ms': round(float(np.percentile(candidate_ms, 50)), 3),
+                        'candidate_p99_ms': round(float(np.percentile(candidate_ms, 99)), 3)
+                    }
+                candidates.setdefault(disease_type, {})[version] = summary
+
+        return {
+            'sample_rate': self.sample_rate,
+            'pending': len(self._pending),
+            'sampled': self.sampled,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'candidates': candidates
+        }
@@ -0,0 +1,143 @@
+import numpy as np
+import hashlib
+import stat
+import os
+import logging
+
+from inference_engine import NumpyDenseModel
+from model_bundle import mmap_npz
+
+logger = logging.getLogger(__name__)
+
+
+def shared_weights_path(directory, key):
+    """Path of the shared weight file for a model key"""
+    return os.path.join(directory, f"{key}.npz")
+
+
+def prepare_shared_dir(directory):
+    """Create the shared weight directory private to this user, or check that it is
+
+    The default location under /dev/shm is predictable, so a directory that
+    is a symlink, belongs to another user or is open to others is refused
+    (PermissionError) rather than trusted.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{directory} is not a directory")
+    if info.st_uid != os.geteuid():
+        raise PermissionError(f"{directory} is owned by uid {info.st_uid}, not this user")
+    if info.st_mode & 0o077:
+        os.chmod(directory, 0o700)
+
+
+def weights_digest(layers):
+    """sha256 of a model's serving layers, as published by publish_weights"""
+    digest = hashlib.sha256()
+    for kernel, bias, activation in layers:
+        digest.update(str(activation).encode())
+        for array in (kernel, bias):
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            digest.update(str(array.shape).encode())
+            digest.update(array.data)
+    return digest.hexdigest()
+
+
+def publish_weights(model, path):
+    """Write a model's serving layers to an uncompressed .npz for memory-mapping
+
+    Each process writes to its own temporary file (created exclusively,
+    readable by this user only) and renames it into place, so concurrent
+    publishers of the same key never expose a partial file.
+    """
+    arrays = {'activations': np.array([activation for _, _, activation in model.layers], dtype=str)}
+    for index, (kernel, bias, _) in enumerate(model.layers):
+        arrays[f'kernel_{index}'] = np.ascontiguousarray(kernel, dtype=np.float64)
+        arrays[f'bias_{index}'] = np.ascontiguousarray(bias, dtype=np.float64)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def map_weights(path):
+    """Serving layers of a published weight file, as read-only memory-mapped views"""
+    arrays = mmap_npz(path)
+    activations = [str(activation) for activation in arrays['activations']]
+    return [
+        (arrays[f'kernel_{index}'], arrays[f'bias_{index}'], activation)
+        for index, activation in enumerate(activations)
+    ]
+
+
+def share_model(model, key, directory):
+    """Get a copy of a NumpyDenseModel whose weights live in a shared memory-mapped file
+
+    key must identify the weights exactly (disease, model version, scaler
+    folding): the first process to share a key publishes the file, and every
+    process then maps it, so all workers read the same physical pages as
+    read-only zero-copy views however many model versions are loaded.
+
+    The mapped weights are only used when their sha256 matches that of the
+    weights loaded from the model's bundle; a file that does not match is
+    published again. Raises PermissionError for an unsafe directory and
+    ValueError when the published weights still do not match.
+    """
+    prepare_shared_dir(directory)
+    path = shared_weights_path(directory, key)
+    expected = weights_digest(model.layers)
+
+    layers = None
+    if os.path.exists(path):
+        try:
+            layers = map_weights(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Shared weights {path} unreadable, publishing them again: {str(e)}")
+        if layers is not None and weights_digest(layers) != expected:
+            logger.warning(f"Shared weights {path} do not match model {key}, publishing them again")
+            layers = None
+
+    if layers is None:
+        publish_weights(model, path)
+        layers = map_weights(path)
+        if weights_digest(layers) != expected:
+            raise ValueError(f"Shared weights {path} do not match model {key}")
+
+    shared = NumpyDenseModel(layers, name=model.name)
+    shared.expects_raw_input = model.expects_raw_input
+    logger.info(f"Model {key} mapped from {path}")
+    return shared
+
+
+def remove_stale_weights(directory, disease_type, keep_versions):
+    """Delete a disease's shared weight files for versions not in keep_versions
+
+    Files are named <disease>-<version>-<folding>.npz. Processes still
+    mapping a deleted file keep their pages until they unmap it. Returns the
+    number of files removed.
+    """
+    if not os.path.isdir(directory):
+        return 0
+
+    prefix = f"{disease_type}-"
+    removed = 0
+    for name in os.listdir(directory):
+        if not name.startswith(prefix) or not name.endswith('.npz'):
+            continue
+        version = name[len(prefix):].split('-', 1)[0]
+        if version in keep_versions:
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    if removed:
+        logger.info(f"Removed {removed} stale shared weight files for {disease_type}")
+    return removed
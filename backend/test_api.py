@@ -6,6 +6,7 @@ import requests
 import json
 import time
 import random
+import os
 
 BASE_URL = 'http://localhost:5000'
 
@@ -255,6 +256,61 @@ class APITester:
             print(f"Error: {str(e)}")
             return False
     
+    def test_kidney_batch_predict(self):
+        """Test kidney disease batch prediction endpoint"""
+        print("\n" + "="*60)
+        print("Testing Kidney Batch Prediction Endpoint")
+        print("="*60)
+        
+        batch_data = [
+            {
+                'age': 45,
+                'bp': 140,
+                'sg': 1.02,
+                'al': 1,
+                'su': 0,
+                'bgr': 120,
+                'bu': 25,
+                'sc': 1.2,
+                'sod': 138,
+                'pot': 5.2,
+                'hemo': 10.5,
+                'pcv': 35,
+                'wc': 8000
+            },
+            {
+                'age': 60,
+                'bp': 160,
+                'sg': 1.01,
+                'al': 3,
+                'su': 1,
+                'bgr': 180,
+                'bu': 45,
+                'sc': 2.8,
+                'sod': 132,
+                'pot': 5.8,
+                'hemo': 9.0,
+                'pcv': 29,
+                'wc': 11000
+            }
+        ]
+        
+        try:
+            response = self.session.post(
+                f'{self.base_url}/api/kidney/batch-predict',
+                json=batch_data,
+                headers={'Content-Type': 'application/json'}
+            )
+            print(f"Status Code: {response.status_code}")
+            if response.status_code == 200:
+                print(f"Response: {json.dumps(response.json(), indent=2)}")
+            else:
+                print(f"Error Response: {response.text}")
+            return response.status_code == 200
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
     def test_mental_health_assessment(self):
         """Test mental health assessment endpoint with correct features"""
         print("\n" + "="*60)
@@ -294,6 +350,252 @@ class APITester:
             print(f"Error: {str(e)}")
             return False
     
+    def test_mental_health_batch_predict(self):
+        """Test mental health batch assessment endpoint"""
+        print("\n" + "="*60)
+        print("Testing Mental Health Batch Assessment Endpoint")
+        print("="*60)
+        
+        batch_data = [
+            {
+                'age': 30,
+                'gender': 1,
+                'employment': 2,
+                'work_env': 3,
+                'stress': 7,
+                'sleep': 5,
+                'activity': 2,
+                'depression': 6,
+                'anxiety': 7,
+                'support': 3,
+                'productivity': 4,
+                'mh_history': 1,
+                'treatment': 0
+            },
+            {
+                'age': 42,
+                'gender': 0,
+                'employment': 1,
+                'work_env': 1,
+                'stress': 3,
+                'sleep': 8,
+                'activity': 5,
+                'depression': 2,
+                'anxiety': 2,
+                'support': 8,
+                'productivity': 7,
+                'mh_history': 0,
+                'treatment': 0
+            }
+        ]
+        
+        try:
+            response = self.session.post(
+                f'{self.base_url}/api/mental-health/batch-predict',
+                json=batch_data,
+                headers={'Content-Type': 'application/json'}
+            )
+            print(f"Status Code: {response.status_code}")
+            if response.status_code == 200:
+                print(f"Response: {json.dumps(response.json(), indent=2)}")
+            else:
+                print(f"Error Response: {response.text}")
+            return response.status_code == 200
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_dengue_batch_predict_stream(self):
+        """Test streaming NDJSON dengue batch prediction endpoint"""
+        print("\n" + "="*60)
+        print("Testing Dengue Streaming Batch Prediction Endpoint")
+        print("="*60)
+        
+        record = {
+            'Age': 35, 'Gender': 1, 'NS1': 1, 'IgG': 0, 'IgM': 1,
+            'Area': 2, 'AreaType': 1, 'HouseType': 2, 'District_encoded': 5,
+            'Temperature': 39.5, 'Symptoms': 1, 'Platelet_Count': 120000, 'WBC_Count': 5000
+        }
+        body = '\n'.join(json.dumps(record) for _ in range(5)) + '\nnot json\n'
+        
+        try:
+            response = self.session.post(
+                f'{self.base_url}/api/dengue/batch-predict/stream',
+                data=body,
+                headers={'Content-Type': 'application/x-ndjson'}
+            )
+            print(f"Status Code: {response.status_code}")
+            if response.status_code != 200:
+                print(f"Error Response: {response.text}")
+                return False
+            
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            for line in lines:
+                print(f"Line: {json.dumps(line)}")
+            return lines[-1]['summary'] == {'total_records': 6, 'processed': 5, 'failed': 1}
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_kidney_batch_predict_csv(self):
+        """Test CSV upload batch prediction endpoint for kidney disease"""
+        print("\n" + "="*60)
+        print("Testing Kidney CSV Batch Prediction Endpoint")
+        print("="*60)
+        
+        csv_data = (
+            "age,bp,sg,al,su,bgr,bu,sc,sod,pot,hemo,pcv,wc\n"
+            "45,140,1.02,1,0,120,25,1.2,138,5.2,10.5,35,8000\n"
+            "60,90,1.01,2,1,180,60,3.4,130,4.1,9.0,28,11000\n"
+            "unknown,80,1.02,0,0,100,20,0.9,140,4.5,14.0,44,7000\n"
+            "50,80,1.02,0,0,100,20,0.9,140,4.5,,44,7000\n"
+        )
+        
+        try:
+            response = requests.post(
+                f'{self.base_url}/api/kidney/batch-predict/csv',
+                files={'file': ('kidney.csv', csv_data, 'text/csv')}
+            )
+            print(f"Status Code: {response.status_code}")
+            print(f"Response:\n{response.text}")
+            if response.status_code != 200:
+                return False
+            
+            rows = response.text.strip().splitlines()
+            return len(rows) == 5 and rows[0].endswith('prediction,probability,status,message') \
+                and rows[3].endswith('error,Invalid value for age') \
+                and rows[4].endswith('success,Defaulted to 0.0: hemo')
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_dengue_batch_predict_csv_missing_columns(self):
+        """Test that dengue CSV rows without the clinical columns are scored with defaults, as in JSON"""
+        print("\n" + "="*60)
+        print("Testing Dengue CSV Batch Prediction With Missing Columns")
+        print("="*60)
+        
+        csv_data = (
+            "Gender,Age,NS1,IgG,IgM,Area,AreaType,HouseType,District\n"
+            "1,45,0,0,0,3,1,2,5\n"
+        )
+        
+        try:
+            response = requests.post(
+                f'{self.base_url}/api/dengue/batch-predict/csv',
+                data=csv_data,
+                headers={'Content-Type': 'text/csv'}
+            )
+            print(f"Status Code: {response.status_code}")
+            print(f"Response:\n{response.text}")
+            if response.status_code != 200:
+                return False
+            
+            rows = response.text.strip().splitlines()
+            return len(rows) == 2 and \
+                rows[1].endswith(',success,"Defaulted to 0.0: Temperature, Symptoms, Platelet_Count, WBC_Count"')
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_feature_validation(self):
+        """Test FEATURE_VALIDATION: fractional values pass, out-of-range and nested values are rejected per row"""
+        print("\n" + "="*60)
+        print("Testing Feature Validation")
+        print("="*60)
+        
+        record = {
+            'age': 30.5, 'gender': 1, 'employment': 2, 'work_env': 3, 'stress': 7,
+            'sleep': 6.5, 'activity': 2, 'depression': 6, 'anxiety': 7, 'support': 3,
+            'productivity': 4, 'mh_history': 1, 'treatment': 0
+        }
+        
+        try:
+            # Fractional age and sleep hours are valid
+            response = self.session.post(f'{self.base_url}/api/mental-health/assessment', json=record)
+            print(f"Fractional values: {response.status_code}")
+            if response.status_code != 200:
+                print(f"Error Response: {response.text}")
+                return False
+            
+            # Out-of-range values are rejected with the rule that failed
+            response = self.session.post(f'{self.base_url}/api/mental-health/assessment',
+                                         json=dict(record, sleep=30))
+            print(f"Out of range: {response.status_code} {response.text}")
+            if response.status_code != 400 or \
+                    response.json().get('error') != "Feature 'sleep' must be between 0 and 24, got 30":
+                return False
+            
+            # Nested values are a validation error, not a server error
+            response = self.session.post(f'{self.base_url}/api/mental-health/assessment',
+                                         json=dict(record, age=[30, 31]))
+            print(f"Array value: {response.status_code} {response.text}")
+            if response.status_code != 400 or \
+                    response.json().get('error') != "Feature 'age' must be a number, got array":
+                return False
+            
+            # In a batch, each invalid record gets its own message and the rest are scored
+            batch = [record, dict(record, age=130, stress=7.5), dict(record, sleep=-1), dict(record, age=[30, 31])]
+            response = self.session.post(f'{self.base_url}/api/mental-health/batch-predict', json=batch)
+            print(f"Batch: {response.status_code}")
+            if response.status_code != 200:
+                print(f"Error Response: {response.text}")
+                return False
+            
+            results = response.json()['results']
+            print(f"Results: {json.dumps(results, indent=2)}")
+            return results[0].get('status') != 'error' and \
+                results[1] == {'index': 1, 'status': 'error',
+                               'message': "Feature 'age' must be between 0 and 120, got 130; "
+                                          "Feature 'stress' must be an integer, got 7.5"} and \
+                results[2] == {'index': 2, 'status': 'error',
+                               'message': "Feature 'sleep' must be between 0 and 24, got -1"} and \
+                results[3] == {'index': 3, 'status': 'error',
+                               'message': "Feature 'age' must be a number, got array"}
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_screen(self):
+        """Test combined multi-disease screening endpoint"""
+        print("\n" + "="*60)
+        print("Testing Combined Screening Endpoint")
+        print("="*60)
+        
+        test_data = {
+            'dengue': {
+                'Age': 35, 'Gender': 1, 'NS1': 1, 'IgG': 0, 'IgM': 1,
+                'Area': 2, 'AreaType': 1, 'HouseType': 2, 'District_encoded': 5,
+                'Temperature': 39.5, 'Symptoms': 1, 'Platelet_Count': 120000, 'WBC_Count': 5000
+            },
+            'kidney': {
+                'age': 45, 'bp': 140, 'sg': 1.02, 'al': 1, 'su': 0, 'bgr': 120, 'bu': 25,
+                'sc': 1.2, 'sod': 138, 'pot': 5.2, 'hemo': 10.5, 'pcv': 35, 'wc': 8000
+            },
+            'mental_health': {
+                'age': 30, 'gender': 1, 'employment': 2, 'work_env': 3, 'stress': 7,
+                'sleep': 5, 'activity': 2, 'depression': 6, 'anxiety': 7, 'support': 3,
+                'productivity': 4, 'mh_history': 1, 'treatment': 0
+            }
+        }
+        
+        try:
+            response = self.session.post(
+                f'{self.base_url}/api/screen',
+                json=test_data,
+                headers={'Content-Type': 'application/json'}
+            )
+            print(f"Status Code: {response.status_code}")
+            if response.status_code == 200:
+                print(f"Response: {json.dumps(response.json(), indent=2)}")
+                return response.json()['failed'] == 0
+            else:
+                print(f"Error Response: {response.text}")
+            return False
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
     def test_mental_health_therapy_plan(self):
         """Test mental health therapy plan endpoint"""
         print("\n" + "="*60)
@@ -427,6 +729,277 @@ class APITester:
         
         return all(results)
     
+    def test_metrics(self):
+        """Test Prometheus metrics endpoint"""
+        print("\n" + "="*60)
+        print("Testing Metrics Endpoint")
+        print("="*60)
+        
+        try:
+            response = self.session.get(f'{self.base_url}/api/metrics')
+            print(f"Status Code: {response.status_code}")
+            lines = response.text.splitlines()
+            print(f"Series: {sum(1 for line in lines if not line.startswith('#'))}")
+            return response.status_code == 200 \
+                and response.headers['Content-Type'].startswith('text/plain') \
+                and any(line.startswith('medai_request_duration_seconds_bucket{endpoint="dengue_predict"') for line in lines) \
+                and any(line.startswith('medai_stage_duration_seconds_count{stage="preprocess"}') for line in lines) \
+                and 'medai_model_loaded{disease="dengue"} 1' in lines
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_prediction_history(self):
+        """Test that predictions are written to the history tables"""
+        print("\n" + "="*60)
+        print("Testing Prediction History")
+        print("="*60)
+        
+        try:
+            # Give the write-behind writer time to flush the earlier predictions
+            time.sleep(1)
+            response = self.session.get(f'{self.base_url}/api/health')
+            history = response.json()['prediction_history']
+            print(f"History: {json.dumps(history, indent=2)}")
+            if not history['enabled']:
+                return True
+            return history['written'] > 0 and history['failed'] == 0 and history['dropped'] == 0
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def user_token_headers(self, user_id):
+        """Authorization headers for a user, from the admin token endpoint (None when unavailable)"""
+        token = os.getenv('ADMIN_TOKEN')
+        if not token:
+            return None
+        response = self.session.post(f'{self.base_url}/api/admin/auth/token', json={'user_id': user_id},
+                                     headers={'X-Admin-Token': token})
+        if response.status_code != 200:
+            print(f"No user token for {user_id}: {response.status_code} {response.text}")
+            return None
+        return {'Authorization': f"Bearer {response.json()['token']}"}
+    
+    def test_patient_history(self):
+        """Test the paginated patient history endpoint (uses ADMIN_TOKEN and JWT_SECRET_KEY from the environment)"""
+        print("\n" + "="*60)
+        print("Testing Patient History Endpoint")
+        print("="*60)
+        
+        dengue_data = {
+            'Age': 35, 'Gender': 1, 'NS1': 1, 'IgG': 0, 'IgM': 1, 'Area': 2, 'AreaType': 1,
+            'HouseType': 2, 'District_encoded': 5, 'Temperature': 39.5, 'Symptoms': 1,
+            'Platelet_Count': 120000, 'WBC_Count': 5000
+        }
+        kidney_data = {
+            'age': 45, 'bp': 140, 'sg': 1.02, 'al': 1, 'su': 0, 'bgr': 120, 'bu': 25,
+            'sc': 1.2, 'sod': 138, 'pot': 5.2, 'hemo': 10.5, 'pcv': 35, 'wc': 8000
+        }
+        
+        try:
+            # Without a user token there is no history to read, whatever user id is claimed
+            response = self.session.get(f'{self.base_url}/api/history', headers={'X-User-Id': 'someone'},
+                                        params={'user_id': 'someone'})
+            print(f"Without token: {response.status_code}")
+            if response.status_code == 503:
+                return True
+            if response.status_code != 401:
+                return False
+            
+            headers = self.user_token_headers(f'history-test-{random.randint(0, 10**9)}')
+            if headers is None:
+                print("Skipping history listing (needs ADMIN_TOKEN and JWT_SECRET_KEY)")
+                return True
+            
+            self.session.post(f'{self.base_url}/api/dengue/predict', json=dengue_data, headers=headers)
+            self.session.post(f'{self.base_url}/api/kidney/predict', json=kidney_data, headers=headers)
+            # Give the write-behind writer time to flush both predictions
+            time.sleep(1)
+            
+            response = self.session.get(f'{self.base_url}/api/history', params={'limit': 1}, headers=headers)
+            print(f"Status Code: {response.status_code}")
+            first = response.json()
+            print(f"First page: {json.dumps(first, indent=2)}")
+            if response.status_code != 200 or len(first['items']) != 1 or not first['next_cursor']:
+                return False
+            
+            response = self.session.get(f'{self.base_url}/api/history', headers=headers,
+                                        params={'limit': 1, 'cursor': first['next_cursor']})
+            second = response.json()
+            print(f"Second page: {json.dumps(second, indent=2)}")
+            
+            # Listings carry scalar inputs only; opening a record returns all of it
+            item = first['items'][0]
+            response = self.session.get(f"{self.base_url}/api/history/{item['disease']}/{item['record_id']}",
+                                        headers=headers)
+            record = response.json().get('record', {})
+            print(f"Record Status Code: {response.status_code}")
+            
+            # Newest first: the kidney prediction, then the dengue one
+            return (response.status_code == 200 and
+                    [first['items'][0]['disease'], second['items'][0]['disease']] == ['kidney', 'dengue'] and
+                    'sc' not in item['details'] and record.get('input_data', {}).get('sc') == 1.2)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_history_isolation(self):
+        """Test that one user can neither list nor open another user's records"""
+        print("\n" + "="*60)
+        print("Testing Patient History Isolation")
+        print("="*60)
+        
+        user_a = f'history-a-{random.randint(0, 10**9)}'
+        user_b = f'history-b-{random.randint(0, 10**9)}'
+        kidney_data = {
+            'age': 45, 'bp': 140, 'sg': 1.02, 'al': 1, 'su': 0, 'bgr': 120, 'bu': 25,
+            'sc': 1.2, 'sod': 138, 'pot': 5.2, 'hemo': 10.5, 'pcv': 35, 'wc': 8000
+        }
+        
+        try:
+            headers_a = self.user_token_headers(user_a)
+            headers_b = self.user_token_headers(user_b)
+            if headers_a is None or headers_b is None:
+                print("Skipping (needs ADMIN_TOKEN and JWT_SECRET_KEY)")
+                return True
+            
+            self.session.post(f'{self.base_url}/api/kidney/predict', json=kidney_data, headers=headers_a)
+            # Claiming A's id without A's token does not add to A's history
+            self.session.post(f'{self.base_url}/api/kidney/predict', json=dict(kidney_data, user_id=user_a),
+                              headers={'X-User-Id': user_a})
+            time.sleep(1)
+            
+            listing_a = self.session.get(f'{self.base_url}/api/history', headers=headers_a).json()
+            listing_b = self.session.get(f'{self.base_url}/api/history', headers=headers_b).json()
+            print(f"A: {len(listing_a['items'])} items, B: {len(listing_b['items'])} items")
+            if len(listing_a['items']) != 1 or listing_b['items']:
+                return False
+            
+            item = listing_a['items'][0]
+            url = f"{self.base_url}/api/history/{item['disease']}/{item['record_id']}"
+            as_owner = self.session.get(url, headers=headers_a)
+            as_other = self.session.get(url, headers=headers_b)
+            as_nobody = self.session.get(url, params={'user_id': user_a}, headers={'X-User-Id': user_a})
+            forged = self.session.get(url, headers={'Authorization': headers_a['Authorization'][:-4] + 'AAAA'})
+            print(f"Record as A: {as_owner.status_code}, as B: {as_other.status_code}, "
+                  f"without token: {as_nobody.status_code}, forged token: {forged.status_code}")
+            return (as_owner.status_code == 200 and as_other.status_code == 404 and
+                    as_nobody.status_code == 401 and forged.status_code == 401)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_dashboard(self):
+        """Test the dashboard aggregates served from the daily rollups"""
+        print("\n" + "="*60)
+        print("Testing Dashboard Endpoints")
+        print("="*60)
+        
+        try:
+            response = self.session.get(f'{self.base_url}/api/dashboard/daily', params={'disease': 'dengue', 'days': 7})
+            print(f"Status Code: {response.status_code}")
+            if response.status_code == 503:
+                return True
+            daily = response.json()
+            print(f"Daily: {json.dumps(daily, indent=2)}")
+            
+            response = self.session.get(f'{self.base_url}/api/dashboard/distribution', params={'disease': 'kidney', 'days': 7})
+            distribution = response.json()
+            print(f"Distribution: {json.dumps(distribution, indent=2)}")
+            
+            # The predictions made by the earlier tests are counted today
+            return (response.status_code == 200 and
+                    any(item['day'] == daily['until'] and item['count'] > 0 for item in daily['series']) and
+                    distribution['total'] > 0)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_profiling(self):
+        """Test admin profiling endpoint (uses ADMIN_TOKEN from the environment)"""
+        print("\n" + "="*60)
+        print("Testing Profiling Endpoint")
+        print("="*60)
+        
+        token = os.getenv('ADMIN_TOKEN')
+        try:
+            if not token:
+                response = self.session.get(f'{self.base_url}/api/admin/profiling')
+                print(f"Status Code: {response.status_code} (no ADMIN_TOKEN set)")
+                return response.status_code in (401, 403)
+            
+            headers = {'X-Admin-Token': token}
+            response = self.session.post(f'{self.base_url}/api/admin/profiling',
+                                         json={'enabled': True, 'sample_rate': 1}, headers=headers)
+            print(f"Status Code: {response.status_code}")
+            self.test_health_check()
+            response = self.session.post(f'{self.base_url}/api/admin/profiling',
+                                         json={'enabled': False}, headers=headers)
+            print(f"Response: {json.dumps(response.json(), indent=2)}")
+            return response.status_code == 200 and response.json()['profiled_requests'] > 0
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_model_reload(self):
+        """Test the admin model reload endpoint (uses ADMIN_TOKEN from the environment)"""
+        print("\n" + "="*60)
+        print("Testing Model Reload Endpoint")
+        print("="*60)
+        
+        token = os.getenv('ADMIN_TOKEN')
+        try:
+            if not token:
+                response = self.session.post(f'{self.base_url}/api/admin/models/reload', json={'disease': 'dengue'})
+                print(f"Status Code: {response.status_code} (no ADMIN_TOKEN set)")
+                return response.status_code in (401, 403)
+            
+            # A forced reload of unchanged artifacts keeps the serving version
+            response = self.session.post(f'{self.base_url}/api/admin/models/reload',
+                                         json={'disease': 'dengue', 'force': True},
+                                         headers={'X-Admin-Token': token})
+            print(f"Status Code: {response.status_code}")
+            print(f"Response: {json.dumps(response.json(), indent=2)}")
+            result = response.json()
+            return (response.status_code == 200 and
+                    'error' not in result['results'].get('dengue', {}) and
+                    self.test_dengue_prediction())
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
+    def test_shadow_models(self):
+        """Test the shadow scoring endpoint and registry listing (uses ADMIN_TOKEN from the environment)"""
+        print("\n" + "="*60)
+        print("Testing Shadow Models Endpoint")
+        print("="*60)
+        
+        token = os.getenv('ADMIN_TOKEN')
+        try:
+            response = self.session.get(f'{self.base_url}/api/model-info')
+            versions = response.json()['models']['kidney']['registered_versions']
+            print(f"Registered kidney versions: {[item['version'] for item in versions]}")
+            
+            if not token:
+                response = self.session.get(f'{self.base_url}/api/admin/models/shadow')
+                print(f"Status Code: {response.status_code} (no ADMIN_TOKEN set)")
+                return response.status_code in (401, 403)
+            
+            headers = {'X-Admin-Token': token}
+            response = self.session.post(f'{self.base_url}/api/admin/models/shadow',
+                                         json={'disease': 'kidney', 'version': '0' * 16}, headers=headers)
+            print(f"Unregistered version: {response.status_code}")
+            if response.status_code != 404:
+                return False
+            
+            response = self.session.get(f'{self.base_url}/api/admin/models/shadow', headers=headers)
+            print(f"Status Code: {response.status_code}")
+            print(f"Response: {json.dumps(response.json(), indent=2)}")
+            return response.status_code == 200 and 'candidates' in response.json()
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return False
+    
     def run_all_tests(self):
         """Run all tests"""
         print("\n" + "="*70)
@@ -438,14 +1011,29 @@ class APITester:
             'model_info': self.test_model_info(),
             'dengue_prediction': self.test_dengue_prediction(),
             'dengue_batch_prediction': self.test_dengue_batch_predict(),
+            'dengue_batch_prediction_stream': self.test_dengue_batch_predict_stream(),
             'dengue_risk_assessment': self.test_dengue_risk_assessment(),
             'kidney_prediction': self.test_kidney_prediction(),
             'kidney_risk_assessment': self.test_kidney_risk_assessment(),
+            'kidney_batch_prediction': self.test_kidney_batch_predict(),
+            'kidney_batch_prediction_csv': self.test_kidney_batch_predict_csv(),
+            'dengue_csv_missing_columns': self.test_dengue_batch_predict_csv_missing_columns(),
             'mental_health_assessment': self.test_mental_health_assessment(),
+            'mental_health_batch_prediction': self.test_mental_health_batch_predict(),
+            'feature_validation': self.test_feature_validation(),
+            'screen': self.test_screen(),
             'mental_health_therapy_plan': self.test_mental_health_therapy_plan(),
             'mental_health_chat': self.test_mental_health_chat(),
             'model_evaluation': self.test_model_evaluation(),
             'batch_evaluation': self.test_batch_evaluation(),
+            'metrics': self.test_metrics(),
+            'prediction_history': self.test_prediction_history(),
+            'patient_history': self.test_patient_history(),
+            'history_isolation': self.test_history_isolation(),
+            'dashboard': self.test_dashboard(),
+            'profiling': self.test_profiling(),
+            'model_reload': self.test_model_reload(),
+            'shadow_models': self.test_shadow_models(),
         }
         
         print("\n" + "="*70)
@@ -0,0 +1,125 @@
+"""
+Tests for the prediction history queries (python -m pytest test_database.py)
+"""
+
+import time
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, text
+
+import database
+from database import (db, init_db, add_dengue_prediction, add_kidney_prediction, get_dengue_predictions,
+                      get_user_predictions, add_records_bulk, bulk_insert_plan, DenguePrediction)
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App with a fresh SQLite prediction database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    init_db(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def count_queries(app):
+    """List that collects the SQL statements run while the test executes"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_predictions(user_id, count):
+    """Store alternating dengue and kidney predictions for a user, oldest first"""
+    for index in range(count):
+        if index % 2:
+            add_kidney_prediction(user_id, 40 + index, 1.2, 1, 0.8, 0.8, 'Stage 3', 'CKD', '30-59', 'Moderate',
+                                  ['See a nephrologist'], {'age': 40 + index, 'sc': 1.2})
+        else:
+            add_dengue_prediction(user_id, 30 + index, 39.0, 1, 0.9, 0.9, 'High Risk', 'High',
+                                  ['Rest'], {'Age': 30 + index, 'District_encoded': 5})
+        # Distinct created_at values keep the expected order unambiguous
+        time.sleep(0.002)
+
+
+def test_listing_to_dict_does_not_load_json_columns(app, count_queries):
+    add_predictions('user-a', 10)
+    db.session.expunge_all()
+    count_queries.clear()
+
+    records = [record.to_dict() for record in get_dengue_predictions('user-a', limit=20)]
+
+    assert len(records) == 5
+    assert len(count_queries) == 1
+    assert 'recommendations' not in records[0] and 'input_data' not in records[0]
+
+
+def test_full_record_to_dict_includes_details(app):
+    add_predictions('user-a', 1)
+    db.session.expunge_all()
+
+    record = get_dengue_predictions('user-a', details=True)[0]
+    assert record.to_dict()['recommendations'] == ['Rest']
+    assert 'input_data' not in record.to_dict()
+    assert record.to_dict(inputs=True)['input_data'] == {'Age': 30, 'District_encoded': 5}
+
+
+def test_user_predictions_are_newest_first_without_json(app, count_queries):
+    add_predictions('user-a', 6)
+    add_predictions('user-b', 2)
+    db.session.expunge_all()
+    count_queries.clear()
+
+    predictions = get_user_predictions('user-a', limit=4)
+
+    assert [prediction['type'] for prediction in predictions] == ['kidney', 'dengue', 'kidney', 'dengue']
+    assert [prediction['data']['age'] for prediction in predictions] == [45, 34, 43, 32]
+    assert all(prediction['data']['user_id'] == 'user-a' for prediction in predictions)
+    assert all('recommendations' not in prediction['data'] for prediction in predictions)
+    # The page, then one query per disease on it
+    assert len(count_queries) == 3
+
+
+def test_user_predictions_without_user_cover_all_users(app):
+    add_predictions('user-a', 2)
+    add_predictions('user-b', 2)
+
+    predictions = get_user_predictions(None, limit=10)
+
+    assert [prediction['data']['user_id'] for prediction in predictions] == ['user-b'] * 2 + ['user-a'] * 2
+
+
+def test_user_predictions_by_disease_type(app):
+    add_predictions('user-a', 4)
+
+    predictions = get_user_predictions('user-a', disease_type='kidney')
+
+    assert [prediction['type'] for prediction in predictions] == ['kidney', 'kidney']
+    with pytest.raises(ValueError, match='Unknown disease type: malaria'):
+        get_user_predictions('user-a', disease_type='malaria')
+
+
+@pytest.mark.parametrize('core', [False, True])
+def test_bulk_insert_stores_none_like_the_orm(app, monkeypatch, core):
+    table = DenguePrediction.__table__
+    if core:
+        # The SQLAlchemy Core path taken by dialects with named parameters
+        columns, _, *rest = bulk_insert_plan(table, db.engine.dialect)
+        monkeypatch.setitem(database._bulk_insert_plans, (table.name, db.engine.dialect.name), (columns, None, *rest))
+
+    db.session.add(DenguePrediction(user_id='orm', recommendations=None))
+    db.session.commit()
+    add_records_bulk({'dengue_predictions': [{'user_id': 'bulk', 'recommendations': None},
+                                             {'user_id': 'bulk', 'recommendations': ['Rest']}]})
+
+    stored = db.session.execute(text('SELECT user_id, recommendations, input_data FROM dengue_predictions')).all()
+    # Set to None: JSON null; left out: SQL NULL
+    assert [tuple(row) for row in stored] == [('orm', 'null', None), ('bulk', 'null', None), ('bulk', '["Rest"]', None)]
@@ -0,0 +1,146 @@
+"""
+Parity tests for the NumPy inference engine (python -m pytest test_inference_engine.py)
+"""
+
+import numpy as np
+import pytest
+
+from inference_engine import NumpyDenseModel, fold_layers, load_keras_h5, verify_parity, verify_scaler_fold
+
+
+def batch_norm_reference(x, gamma, beta, mean, variance, epsilon):
+    """BatchNormalization at inference time, written out"""
+    return gamma * (x - mean) / np.sqrt(variance + epsilon) + beta
+
+
+def random_batch_norm(rng, units):
+    """BatchNormalization weights far from the identity"""
+    return {
+        'gamma': rng.uniform(0.5, 2.0, units),
+        'beta': rng.normal(size=units),
+        'moving_mean': rng.normal(size=units),
+        'moving_variance': rng.uniform(0.2, 3.0, units)
+    }
+
+
+def test_fold_layers_matches_unfolded_batch_norm():
+    rng = np.random.default_rng(0)
+    dense_1 = {'kernel': rng.normal(size=(13, 8)), 'bias': rng.normal(size=8)}
+    norm_1 = random_batch_norm(rng, 8)
+    norm_2 = random_batch_norm(rng, 8)
+    dense_2 = {'kernel': rng.normal(size=(8, 1)), 'bias': rng.normal(size=1)}
+    epsilon = 1e-3
+
+    model = NumpyDenseModel(fold_layers([
+        ('InputLayer', {}, {}),
+        ('Dense', {'activation': 'relu'}, dense_1),
+        ('BatchNormalization', {'axis': -1, 'epsilon': epsilon}, norm_1),
+        ('Dropout', {}, {}),
+        ('BatchNormalization', {'axis': -1, 'epsilon': epsilon}, norm_2),
+        ('Dense', {'activation': 'sigmoid'}, dense_2)
+    ]))
+
+    X = rng.normal(size=(64, 13))
+    hidden = np.maximum(X @ dense_1['kernel'] + dense_1['bias'], 0.0)
+    for norm in (norm_1, norm_2):
+        hidden = batch_norm_reference(hidden, norm['gamma'], norm['beta'],
+                                      norm['moving_mean'], norm['moving_variance'], epsilon)
+    expected = 1.0 / (1.0 + np.exp(-(hidden @ dense_2['kernel'] + dense_2['bias'])))
+
+    assert len(model.layers) == 2
+    np.testing.assert_allclose(model.predict(X), expected, rtol=0, atol=1e-12)
+
+
+def test_trailing_batch_norm_becomes_linear_layer():
+    rng = np.random.default_rng(1)
+    dense = {'kernel': rng.normal(size=(4, 3)), 'bias': rng.normal(size=3)}
+    norm = random_batch_norm(rng, 3)
+
+    model = NumpyDenseModel(fold_layers([
+        ('Dense', {'activation': 'linear'}, dense),
+        ('BatchNormalization', {'epsilon': 1e-3}, norm)
+    ]))
+
+    X = rng.normal(size=(16, 4))
+    expected = batch_norm_reference(X @ dense['kernel'] + dense['bias'], norm['gamma'], norm['beta'],
+                                    norm['moving_mean'], norm['moving_variance'], 1e-3)
+    np.testing.assert_allclose(model.predict(X), expected, rtol=0, atol=1e-12)
+
+
+def test_fold_input_scaler_matches_scaled_input():
+    rng = np.random.default_rng(2)
+    model = NumpyDenseModel([
+        (rng.normal(size=(13, 8)), rng.normal(size=8), 'relu'),
+        (rng.normal(size=(8, 2)), rng.normal(size=2), 'softmax')
+    ])
+    mean = rng.normal(50, 20, 13)
+    scale = rng.uniform(0.1, 30, 13)
+
+    fused = model.fold_input_scaler(mean, scale)
+    X = mean + scale * rng.normal(size=(64, 13))
+
+    assert fused.expects_raw_input and not model.expects_raw_input
+    np.testing.assert_allclose(fused.predict(X), model.predict((X - mean) / scale), rtol=0, atol=1e-12)
+
+
+def test_unsupported_layer_is_rejected():
+    with pytest.raises(ValueError):
+        fold_layers([('Conv1D', {}, {})])
+
+
+@pytest.fixture(scope='module')
+def keras_model_path(tmp_path_factory):
+    """Small Keras model with BatchNormalization and Dropout saved as .h5"""
+    keras = pytest.importorskip('tensorflow').keras
+
+    model = keras.Sequential([
+        keras.Input(shape=(13,)),
+        keras.layers.Dense(16, activation='relu'),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(8, activation='relu'),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+    # Moving statistics away from their initial values, so folding them matters
+    rng = np.random.default_rng(3)
+    for layer in model.layers:
+        if isinstance(layer, keras.layers.BatchNormalization):
+            units = layer.gamma.shape[0]
+            norm = random_batch_norm(rng, units)
+            layer.set_weights([norm['gamma'], norm['beta'], norm['moving_mean'], norm['moving_variance']])
+
+    path = tmp_path_factory.mktemp('models') / 'parity_model.h5'
+    model.save(path)
+    return str(path)
+
+
+def test_numpy_engine_matches_keras(keras_model_path):
+    from tensorflow import keras
+
+    keras_model = keras.models.load_model(keras_model_path)
+    numpy_model = load_keras_h5(keras_model_path)
+
+    X = np.random.default_rng(4).normal(size=(128, 13)).astype(np.float32)
+    np.testing.assert_allclose(numpy_model.predict(X), keras_model.predict(X, verbose=0), rtol=0, atol=1e-5)
+
+    result = verify_parity(keras_model_path)
+    assert result['passed'], result
+
+
+def test_folded_scaler_matches_keras(keras_model_path):
+    from tensorflow import keras
+    StandardScaler = pytest.importorskip('sklearn.preprocessing').StandardScaler
+
+    rng = np.random.default_rng(5)
+    scaler = StandardScaler().fit(rng.normal(40, 15, size=(500, 13)))
+    numpy_model = load_keras_h5(keras_model_path)
+    fused = numpy_model.fold_input_scaler(scaler.mean_, scaler.scale_)
+
+    X = rng.normal(40, 15, size=(128, 13))
+    keras_output = keras.models.load_model(keras_model_path).predict(scaler.transform(X).astype(np.float32), verbose=0)
+    np.testing.assert_allclose(fused.predict(X), keras_output, rtol=0, atol=1e-5)
+
+    result = verify_scaler_fold(numpy_model, scaler)
+    assert result['passed'], result
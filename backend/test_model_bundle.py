@@ -0,0 +1,117 @@
+"""
+Round-trip tests for serving bundles (python -m pytest test_model_bundle.py)
+"""
+
+import zipfile
+import os
+
+import numpy as np
+import pytest
+
+from inference_engine import NumpyDenseModel
+from model_bundle import BundleScaler, save_bundle, load_bundle, mmap_npz
+
+FEATURES = ['age', 'bp', 'sg', 'al']
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    """Bundle of a small two-layer model written by save_bundle"""
+    rng = np.random.default_rng(0)
+    model = NumpyDenseModel([
+        (rng.normal(size=(4, 6)), rng.normal(size=6), 'relu'),
+        (rng.normal(size=(6, 1)), rng.normal(size=1), 'sigmoid')
+    ])
+    scaler = BundleScaler(rng.normal(50, 10, 4), rng.uniform(1, 5, 4))
+    path = str(tmp_path / 'kidney.bundle.npz')
+    save_bundle(path, model, scaler, FEATURES, optimal_threshold=0.42,
+                metadata={'disease_type': 'kidney', 'source_sha256': 'abc'})
+    return path, model, scaler
+
+
+def rewrite_members(source, target, force_zip64=False, shorten=None):
+    """Copy an .npz member by member, optionally as zip64 or with one member's data cut short"""
+    with zipfile.ZipFile(source) as archive, zipfile.ZipFile(target, 'w') as output:
+        for info in archive.infolist():
+            data = archive.read(info)
+            if info.filename == shorten:
+                data = data[:-8]
+            with output.open(info.filename, 'w', force_zip64=force_zip64) as member:
+                member.write(data)
+
+
+@pytest.mark.parametrize('mmap_mode', [True, False])
+def test_round_trip(bundle_path, mmap_mode):
+    path, model, scaler = bundle_path
+    bundle = load_bundle(path, mmap_mode=mmap_mode)
+
+    assert bundle.features == FEATURES
+    assert bundle.optimal_threshold == pytest.approx(0.42)
+    assert bundle.metadata['disease_type'] == 'kidney'
+    assert bundle.metadata['source_sha256'] == 'abc'
+    assert bundle.metadata['format_version'] == 1
+    for (kernel, bias, activation), (saved_kernel, saved_bias, saved_activation) in zip(bundle.model.layers, model.layers):
+        np.testing.assert_array_equal(kernel, saved_kernel)
+        np.testing.assert_array_equal(bias, saved_bias)
+        assert activation == saved_activation
+
+    X = np.random.default_rng(1).normal(50, 10, size=(32, 4))
+    np.testing.assert_array_equal(bundle.scaler.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(bundle.model.predict(bundle.scaler.transform(X)), model.predict(scaler.transform(X)))
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_mmapped_weights_are_read_only_views(bundle_path):
+    path, _, _ = bundle_path
+    kernel = load_bundle(path).model.layers[0][0]
+
+    assert not kernel.flags.writeable
+    with pytest.raises(ValueError):
+        kernel[0, 0] = 1.0
+
+
+def test_zip64_members_are_mapped(bundle_path, tmp_path):
+    path, _, _ = bundle_path
+    zip64_path = str(tmp_path / 'zip64.npz')
+    rewrite_members(path, zip64_path, force_zip64=True)
+
+    expected = mmap_npz(path)
+    arrays = mmap_npz(zip64_path)
+    assert arrays.keys() == expected.keys()
+    for name, array in expected.items():
+        np.testing.assert_array_equal(arrays[name], array)
+
+
+def test_compressed_bundle_is_rejected(bundle_path, tmp_path):
+    path, _, _ = bundle_path
+    compressed_path = str(tmp_path / 'compressed.npz')
+    with np.load(path) as npz:
+        np.savez_compressed(compressed_path, **{name: npz[name] for name in npz.files})
+
+    with pytest.raises(ValueError, match='compressed'):
+        load_bundle(compressed_path)
+
+    # np.load decompresses, so the non-mapped path still reads it
+    assert load_bundle(compressed_path, mmap_mode=False).features == FEATURES
+
+
+@pytest.mark.parametrize('size', [0, 100])
+def test_truncated_file_is_rejected(bundle_path, tmp_path, size):
+    path, _, _ = bundle_path
+    with open(path, 'rb') as f:
+        data = f.read(size)
+    truncated_path = str(tmp_path / 'truncated.npz')
+    with open(truncated_path, 'wb') as f:
+        f.write(data)
+
+    with pytest.raises(ValueError):
+        load_bundle(truncated_path)
+
+
+def test_short_member_is_rejected(bundle_path, tmp_path):
+    path, _, _ = bundle_path
+    short_path = str(tmp_path / 'short.npz')
+    rewrite_members(path, short_path, shorten='kernel_0.npy')
+
+    with pytest.raises(ValueError, match='kernel_0.npy'):
+        load_bundle(short_path)
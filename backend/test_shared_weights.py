@@ -0,0 +1,76 @@
+"""
+Tests for shared memory-mapped serving weights (python -m pytest test_shared_weights.py)
+"""
+
+import stat
+import os
+
+import numpy as np
+import pytest
+
+from inference_engine import NumpyDenseModel
+from shared_weights import share_model, shared_weights_path, publish_weights, remove_stale_weights
+
+
+def make_model(seed):
+    """Small two-layer model with seeded random weights"""
+    rng = np.random.default_rng(seed)
+    return NumpyDenseModel([
+        (rng.normal(size=(4, 6)), rng.normal(size=6), 'relu'),
+        (rng.normal(size=(6, 1)), rng.normal(size=1), 'sigmoid')
+    ])
+
+
+def test_shared_model_matches_and_directory_is_private(tmp_path):
+    directory = str(tmp_path / 'shared')
+    model = make_model(0)
+    shared = share_model(model, 'kidney-0123456789abcdef-raw', directory)
+
+    X = np.random.default_rng(1).normal(size=(8, 4))
+    np.testing.assert_array_equal(shared.predict(X), model.predict(X))
+    assert not shared.layers[0][0].flags.writeable
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(shared_weights_path(directory, 'kidney-0123456789abcdef-raw')).st_mode) & 0o077 == 0
+
+
+def test_open_directory_is_made_private(tmp_path):
+    directory = tmp_path / 'shared'
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+
+    share_model(make_model(0), 'kidney-0123456789abcdef-raw', str(directory))
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_symlinked_directory_is_refused(tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.mkdir()
+    link = tmp_path / 'shared'
+    link.symlink_to(target)
+
+    with pytest.raises(PermissionError):
+        share_model(make_model(0), 'kidney-0123456789abcdef-raw', str(link))
+
+
+def test_mismatched_published_file_is_replaced(tmp_path):
+    directory = str(tmp_path / 'shared')
+    key = 'kidney-0123456789abcdef-raw'
+    share_model(make_model(0), key, directory)
+
+    # Another model's weights planted under this key
+    publish_weights(make_model(1), shared_weights_path(directory, key))
+
+    model = make_model(0)
+    shared = share_model(model, key, directory)
+    X = np.random.default_rng(2).normal(size=(8, 4))
+    np.testing.assert_array_equal(shared.predict(X), model.predict(X))
+
+
+def test_stale_versions_are_removed(tmp_path):
+    directory = str(tmp_path / 'shared')
+    for key in ['kidney-aaaaaaaaaaaaaaaa-raw', 'kidney-aaaaaaaaaaaaaaaa-folded',
+                'kidney-bbbbbbbbbbbbbbbb-folded', 'dengue-aaaaaaaaaaaaaaaa-folded']:
+        share_model(make_model(0), key, directory)
+
+    assert remove_stale_weights(directory, 'kidney', {'bbbbbbbbbbbbbbbb'}) == 2
+    assert sorted(os.listdir(directory)) == ['dengue-aaaaaaaaaaaaaaaa-folded.npz', 'kidney-bbbbbbbbbbbbbbbb-folded.npz']
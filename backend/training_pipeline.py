@@ -11,6 +11,8 @@ import logging
 # Import from our existing modules
 from reinforcement_learning import PredictionEnvironment, QLearningAgent, DQNAgent, train_rl_agent
 from reward_system import MedicalRewardCalculator, AdaptiveRewardSystem
+from inference_engine import load_keras_h5
+from model_bundle import save_bundle, file_sha256
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,9 @@ class TrainingPipeline:
         self.models_dir = "models"
         os.makedirs(self.models_dir, exist_ok=True)
         
+        # Self-contained serving bundle written alongside the .h5 model
+        self.bundle_path = os.path.join(self.models_dir, f"{disease_type}.bundle.npz")
+        
         # Set paths based on disease type
         if disease_type == 'dengue':
             self.model_path = os.path.join(self.models_dir, "dengue_model.h5")
@@ -210,12 +215,29 @@ class TrainingPipeline:
         # Save model and scaler
         self.model.save(self.model_path)
         joblib.dump(self.scaler, self.scaler_path)
+        self.save_bundle()
         
         print(f"Model saved to: {self.model_path}")
         print(f"Scaler saved to: {self.scaler_path}")
+        print(f"Bundle saved to: {self.bundle_path}")
         
         return history
     
+    def save_bundle(self):
+        """Write the serving bundle (weights, scaler statistics, features, threshold)"""
+        return save_bundle(
+            self.bundle_path,
+            load_keras_h5(self.model_path),
+            self.scaler,
+            self.features,
+            optimal_threshold=self.optimal_threshold,
+            metadata={
+                'disease_type': self.disease_type,
+                'source_model': os.path.basename(self.model_path),
+                'source_sha256': file_sha256(self.model_path)
+            }
+        )
+    
     def optimize_with_rl(self, X_test, y_test):
         """Optimize model predictions using RL"""
         logger.info(f"Optimizing {self.disease_type} model with RL...")
@@ -308,6 +330,9 @@ class TrainingPipeline:
             print(f"\n📈 Evaluating with Optimal Threshold...")
             results = self.evaluate_with_optimal_threshold(X_test, y_test)
             
+            # Record the optimal threshold in the serving bundle
+            self.save_bundle()
+            
             # Save training results
             training_summary = {
                 'disease_type': self.disease_type,
@@ -340,6 +365,7 @@ class TrainingPipeline:
             print(f"✅ Training pipeline completed for {self.disease_type.upper()}")
             print(f"📁 Model saved: {self.model_path}")
             print(f"📁 Scaler saved: {self.scaler_path}")
+            print(f"📁 Bundle saved: {self.bundle_path}")
             print(f"📁 Summary saved: {summary_path}")
             print(f"🎯 Optimal threshold: {optimal_threshold:.3f}")
             print(f"{'='*60}\n")
@@ -0,0 +1,72 @@
+import base64
+import hashlib
+import hmac
+import time
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = {'alg': 'HS256', 'typ': 'JWT'}
+
+_firebase_app = None
+
+
+def b64encode(data):
+    """URL-safe base64 without padding, as used in JWTs"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def b64decode(text):
+    """Decode URL-safe base64 with its padding stripped"""
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def sign_user_token(user_id, secret, ttl_seconds):
+    """HS256 JWT naming user_id as its subject, valid for ttl_seconds"""
+    now = int(time.time())
+    payload = {'sub': str(user_id), 'iat': now, 'exp': now + int(ttl_seconds)}
+    signing_input = f"{b64encode(json.dumps(TOKEN_HEADER).encode())}.{b64encode(json.dumps(payload).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{b64encode(signature)}"
+
+
+def verify_user_token(token, secret):
+    """User id of a token made by sign_user_token; raises ValueError when it is invalid or expired"""
+    try:
+        header, payload, signature = token.split('.')
+        expected = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(b64decode(signature), expected):
+            raise ValueError('Invalid token signature')
+        if json.loads(b64decode(header)) != TOKEN_HEADER:
+            raise ValueError('Unsupported token header')
+        claims = json.loads(b64decode(payload))
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError, ValueError) as e:
+        raise ValueError(f'Invalid token: {str(e)}')
+
+    if not isinstance(claims.get('exp'), int) or claims['exp'] <= time.time():
+        raise ValueError('Token expired')
+    if not claims.get('sub'):
+        raise ValueError('Token has no subject')
+    return str(claims['sub'])
+
+
+def verify_firebase_token(token, project_id):
+    """Firebase uid of a Firebase ID token, or None when firebase-admin is not installed
+
+    Raises ValueError when the token is invalid.
+    """
+    global _firebase_app
+    try:
+        import firebase_admin
+        from firebase_admin import auth
+    except ImportError:
+        logger.warning("firebase-admin is not installed, Firebase ID tokens are not accepted")
+        return None
+
+    if _firebase_app is None:
+        _firebase_app = firebase_admin.initialize_app(options={'projectId': project_id}, name='medai-auth')
+    try:
+        return auth.verify_id_token(token, app=_firebase_app)['uid']
+    except Exception as e:
+        raise ValueError(f'Invalid Firebase token: {str(e)}')
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { auth } from '../config/firebase';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
 
@@ -12,8 +13,15 @@ const axiosInstance = axios.create({
 
 // Request interceptor
 axiosInstance.interceptors.request.use(
-  (config) => {
+  async (config) => {
     console.log('Making request to:', config.url);
+    // The Firebase ID token identifies the signed-in user, whose history
+    // predictions are recorded in and read from
+    const currentUser = auth?.currentUser;
+    if (currentUser) {
+      const token = await currentUser.getIdToken();
+      config.headers.Authorization = `Bearer ${token}`;
+    }
     return config;
   },
   (error) => Promise.reject(error)
@@ -40,6 +48,19 @@ export const mentalHealthAPI = {
   predict: (data) => axiosInstance.post('/mental-health/assessment', data)
 };
 
+// One request scoring any of { dengue, kidney, mental_health } feature sets
+export const screeningAPI = {
+  screen: (data) => axiosInstance.post('/screen', data)
+};
+
+// The signed-in user's history, newest first, one page per call; pass
+// next_cursor back as cursor for the next page
+export const historyAPI = {
+  list: (params) => axiosInstance.get('/history', { params }),
+  // Full record (inputs and recommendations) of one listed prediction
+  get: (disease, recordId) => axiosInstance.get(`/history/${disease}/${recordId}`)
+};
+
 export const healthAPI = {
   check: () => axiosInstance.get('/health')
 };
@@ -1,13 +1,19 @@
 import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { useStore } from '../store/store';
-import { FiTrash2, FiDownload, FiCalendar, FiBarChart2, FiTrendingUp } from 'react-icons/fi';
+import { FiTrash2, FiDownload, FiCalendar, FiBarChart2, FiTrendingUp, FiEye } from 'react-icons/fi';
 import { toast } from 'react-toastify';
+import { historyAPI } from '../api/api';
+
+const HISTORY_PAGE_SIZE = 20;
 
 export const PatientHistory = () => {
   const { user } = useStore();
   const [predictions, setPredictions] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [openRecords, setOpenRecords] = useState({});
   const [selectedDisease, setSelectedDisease] = useState('all');
   const [sortBy, setSortBy] = useState('recent');
 
@@ -15,12 +21,27 @@ export const PatientHistory = () => {
     loadPredictionHistory();
   }, []);
 
-  const loadPredictionHistory = () => {
+  const loadLocalHistory = () => {
+    const userId = user?.id || 'anonymous';
+    return JSON.parse(localStorage.getItem(`predictionHistory_${userId}`) || '[]');
+  };
+
+  const loadPredictionHistory = async () => {
     setLoading(true);
     try {
-      const userId = user?.id || 'anonymous';
-      const history = JSON.parse(localStorage.getItem(`predictionHistory_${userId}`) || '[]');
-      setPredictions(history);
+      // Signed-in users get their server-side history, a page at a time
+      if (user?.id) {
+        try {
+          const response = await historyAPI.list({ limit: HISTORY_PAGE_SIZE });
+          setPredictions(response.data.items);
+          setNextCursor(response.data.next_cursor);
+          return;
+        } catch (error) {
+          console.error('Error loading server history, using local history:', error);
+        }
+      }
+      setPredictions(loadLocalHistory());
+      setNextCursor(null);
     } catch (error) {
       console.error('Error loading history:', error);
       setPredictions([]);
@@ -29,20 +50,54 @@ export const PatientHistory = () => {
     }
   };
 
+  const loadMorePredictions = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await historyAPI.list({ limit: HISTORY_PAGE_SIZE, cursor: nextCursor });
+      setPredictions(current => [...current, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more history:', error);
+      toast.error('Could not load more predictions');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const toggleRecord = async (prediction) => {
+    if (openRecords[prediction.id]) {
+      setOpenRecords(({ [prediction.id]: _, ...rest }) => rest);
+      return;
+    }
+    try {
+      // Listings only carry scalar inputs; the full record is fetched on open
+      const response = await historyAPI.get(prediction.disease, prediction.record_id);
+      setOpenRecords(current => ({ ...current, [prediction.id]: response.data.record }));
+    } catch (error) {
+      console.error('Error loading prediction details:', error);
+      toast.error('Could not load prediction details');
+    }
+  };
+
+  // Predictions from the server history carry a record_id; the server has no
+  // delete endpoint, so only predictions kept in this browser can be deleted
+  const isLocalPrediction = (prediction) => !prediction.record_id;
+  const hasLocalPredictions = predictions.some(isLocalPrediction);
+
   const deletePrediction = (id) => {
-    const updatedPredictions = predictions.filter(p => p.id !== id);
-    setPredictions(updatedPredictions);
+    setPredictions(predictions.filter(p => p.id !== id || !isLocalPrediction(p)));
     const userId = user?.id || 'anonymous';
-    localStorage.setItem(`predictionHistory_${userId}`, JSON.stringify(updatedPredictions));
+    const localHistory = loadLocalHistory().filter(p => p.id !== id);
+    localStorage.setItem(`predictionHistory_${userId}`, JSON.stringify(localHistory));
     toast.success('Prediction deleted');
   };
 
   const deleteAllPredictions = () => {
-    if (window.confirm('Are you sure you want to delete all predictions?')) {
-      setPredictions([]);
+    if (window.confirm('Are you sure you want to delete all predictions saved in this browser?')) {
+      setPredictions(predictions.filter(p => !isLocalPrediction(p)));
       const userId = user?.id || 'anonymous';
       localStorage.setItem(`predictionHistory_${userId}`, JSON.stringify([]));
-      toast.success('All predictions deleted');
+      toast.success('Predictions saved in this browser deleted');
     }
   };
 
@@ -193,7 +248,7 @@ export const PatientHistory = () => {
               whileHover={{ scale: 1.05 }}
               whileTap={{ scale: 0.95 }}
               onClick={deleteAllPredictions}
-              disabled={predictions.length === 0}
+              disabled={!hasLocalPredictions}
               className="py-2 px-4 bg-gradient-to-r from-red-500 to-pink-600 text-white font-semibold rounded-lg hover:shadow-lg transition-all disabled:opacity-50 mt-7 flex items-center justify-center gap-2"
             >
               <FiTrash2 /> Clear All
@@ -261,14 +316,26 @@ export const PatientHistory = () => {
                   </div>
 
                   <div className="flex items-center gap-2">
-                    <motion.button
-                      whileHover={{ scale: 1.1 }}
-                      whileTap={{ scale: 0.95 }}
-                      onClick={() => deletePrediction(prediction.id)}
-                      className="p-3 bg-red-500/20 border border-red-500/30 rounded-lg text-red-400 hover:bg-red-500/30 transition-all"
-                    >
-                      <FiTrash2 size={20} />
-                    </motion.button>
+                    {prediction.record_id && (
+                      <motion.button
+                        whileHover={{ scale: 1.1 }}
+                        whileTap={{ scale: 0.95 }}
+                        onClick={() => toggleRecord(prediction)}
+                        className="p-3 bg-white/10 border border-white/20 rounded-lg text-white hover:bg-white/20 transition-all"
+                      >
+                        <FiEye size={20} />
+                      </motion.button>
+                    )}
+                    {isLocalPrediction(prediction) && (
+                      <motion.button
+                        whileHover={{ scale: 1.1 }}
+                        whileTap={{ scale: 0.95 }}
+                        onClick={() => deletePrediction(prediction.id)}
+                        className="p-3 bg-red-500/20 border border-red-500/30 rounded-lg text-red-400 hover:bg-red-500/30 transition-all"
+                      >
+                        <FiTrash2 size={20} />
+                      </motion.button>
+                    )}
                   </div>
                 </div>
 
@@ -286,8 +353,42 @@ export const PatientHistory = () => {
                     </div>
                   </div>
                 )}
+
+                {openRecords[prediction.id] && (
+                  <div className="mt-4 pt-4 border-t border-white/10 text-sm">
+                    <div className="grid grid-cols-2 md:grid-cols-4 gap-4">
+                      {Object.entries(openRecords[prediction.id].input_data || {}).map(([key, value]) => (
+                        <div key={key}>
+                          <p className="text-white/60 text-xs capitalize">{key.replace(/_/g, ' ')}</p>
+                          <p className="text-white font-semibold">{String(value)}</p>
+                        </div>
+                      ))}
+                    </div>
+                    {(openRecords[prediction.id].recommendations || []).length > 0 && (
+                      <ul className="mt-4 list-disc list-inside text-white/80 space-y-1">
+                        {openRecords[prediction.id].recommendations.map((recommendation, i) => (
+                          <li key={i}>{recommendation}</li>
+                        ))}
+                      </ul>
+                    )}
+                  </div>
+                )}
               </motion.div>
             ))}
+
+            {nextCursor && (
+              <div className="text-center pt-4">
+                <motion.button
+                  whileHover={{ scale: 1.05 }}
+                  whileTap={{ scale: 0.95 }}
+                  onClick={loadMorePredictions}
+                  disabled={loadingMore}
+                  className="px-6 py-3 bg-white/10 border border-white/20 rounded-lg text-white hover:bg-white/20 transition-all disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </motion.button>
+              </div>
+            )}
           </div>
         )}
       </div>